@@ -0,0 +1,107 @@
+import { NextRequest, NextResponse } from "next/server";
+import { QAItem } from "@/data/qa-data";
+import { hasBearerToken } from "@/lib/bearer";
+import { queryWords } from "@/lib/category-router";
+import { answerSnippet } from "@/lib/passages";
+import { retrieve, searchIndexStats, updateSearchIndex } from "@/lib/rag";
+
+/**
+ * Live FAQ edits for retrieval, without a redeploy
+ *
+ * POST a QAItem to add it or replace the entry with the same id, DELETE
+ * ?id=N to remove one, GET for index statistics. GET ?query=... shows the
+ * hits and category routing retrieval produces for a query, and the
+ * snippet of each answer the chat prompt would get. Edits reach
+ * the chat retrieval index immediately and are journaled until the next
+ * import.
+ * Requires `Authorization: Bearer $QA_ADMIN_TOKEN`; without that variable
+ * the route is disabled.
+ */
+
+const authorized = (request: NextRequest) => hasBearerToken(request.headers, process.env.QA_ADMIN_TOKEN);
+
+const forbidden = () => NextResponse.json({ error: "Forbidden" }, { status: 403 });
+
+const isStringArray = (value: unknown) =>
+  value === undefined || (Array.isArray(value) && value.every((item) => typeof item === "string"));
+
+function parseQA(body: any): QAItem | null {
+  if (
+    !body ||
+    !Number.isInteger(body.id) ||
+    typeof body.question !== "string" ||
+    !body.question.trim() ||
+    typeof body.answer !== "string" ||
+    typeof body.category !== "string" ||
+    !isStringArray(body.links) ||
+    !isStringArray(body.keywords)
+  ) {
+    return null;
+  }
+  const { id, category, question, answer, links, keywords } = body;
+  return { id, category, question, answer, links, keywords };
+}
+
+export async function GET(request: NextRequest) {
+  if (!authorized(request)) return forbidden();
+  const query = new URL(request.url).searchParams.get("query");
+  if (query) {
+    try {
+      const { hits, routing, pooled } = await retrieve(query);
+      const words = queryWords(query);
+      return NextResponse.json({
+        query,
+        pooled,
+        routing,
+        hits: hits.map(({ qa, score }) => ({
+          id: qa.id,
+          category: qa.category,
+          question: qa.question,
+          score,
+          snippet: answerSnippet(qa, words),
+        })),
+      });
+    } catch (error: any) {
+      console.error("Admin QA API Error:", error);
+      return NextResponse.json({ error: "Retrieval failed" }, { status: 503 });
+    }
+  }
+  return NextResponse.json(searchIndexStats());
+}
+
+export async function POST(request: NextRequest) {
+  if (!authorized(request)) return forbidden();
+  try {
+    const qa = parseQA(await request.json());
+    if (!qa) {
+      return NextResponse.json(
+        { error: "Expected a QA item with numeric id and question, answer and category strings" },
+        { status: 400 }
+      );
+    }
+    const start = performance.now();
+    await updateSearchIndex({ op: "upsert", qa });
+    return NextResponse.json(
+      { ok: true, id: qa.id, index: searchIndexStats() },
+      { headers: { "Server-Timing": `index;dur=${(performance.now() - start).toFixed(3)}` } }
+    );
+  } catch (error: any) {
+    console.error("Admin QA API Error:", error);
+    return NextResponse.json({ error: "Failed to update the index" }, { status: 500 });
+  }
+}
+
+export async function DELETE(request: NextRequest) {
+  if (!authorized(request)) return forbidden();
+  const id = Number(new URL(request.url).searchParams.get("id"));
+  if (!Number.isInteger(id)) {
+    return NextResponse.json({ error: "Expected ?id=N" }, { status: 400 });
+  }
+  try {
+    await updateSearchIndex({ op: "delete", id });
+    return NextResponse.json({ ok: true, id, index: searchIndexStats() });
+  } catch (error: any) {
+    console.error("Admin QA API Error:", error);
+    return NextResponse.json({ error: "Failed to update the index" }, { status: 500 });
+  }
+}
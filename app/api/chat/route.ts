@@ -1,39 +1,59 @@
 import { NextRequest, NextResponse } from "next/server";
-import { GoogleGenerativeAI } from "@google/generative-ai";
-import { searchRelevantQAs } from "@/lib/rag";
+import { QAItem } from "@/data/qa-data";
+import { admitUpstream, clientKey, recordShed, ShedReason } from "@/lib/admission";
+import { getConversation, historyBlock, recordTurn, rewriteQuery } from "@/lib/conversation";
+import { liveQA, retrieve } from "@/lib/rag";
+import { queryWords } from "@/lib/category-router";
+import { answerSnippet } from "@/lib/passages";
+import { RetrievalBusyError } from "@/lib/retrieval-pool";
+import { matchFAQ } from "@/lib/faq-match";
+import { correctQuery, Correction } from "@/lib/spell";
+import { DEFAULT_RELATED, expandWithRelated, getRelatedQAs, toRelatedQuestion } from "@/lib/related";
+import { counter, histogram, PROMPT_CHARS_BUCKETS, RequestTrace } from "@/lib/metrics";
+import { generateContent, geminiConfigured, MODEL_CHAIN } from "@/lib/gemini";
+import { logQuery, QueryLogEntry } from "@/lib/query-log";
 
-const genAI = new GoogleGenerativeAI(process.env.GEMINI_API_KEY || "");
+const modelAttempts = counter(
+  "chat_model_attempts_total",
+  "Gemini generateContent attempts by model and outcome"
+);
+const fallbacks = counter(
+  "chat_model_fallbacks_total",
+  "Requests that moved on to a fallback model, by the model that failed"
+);
+const chatErrors = counter("chat_errors_total", "Failed chat requests by error class");
+const promptChars = histogram(
+  "chat_prompt_chars",
+  "Size of the prompt sent to the model, in characters",
+  PROMPT_CHARS_BUCKETS
+);
+const faqFastPath = counter(
+  "chat_faq_fastpath_total",
+  "Requests answered directly from the FAQ (hit), or passed on to the model (miss, or edited since the import)"
+);
+const faqScore = histogram(
+  "chat_faq_score",
+  "Best FAQ question similarity per request, for recalibrating the fast path",
+  [0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1]
+);
+const retrievedCount = histogram(
+  "chat_retrieved_qas",
+  "Number of QA records retrieved per request",
+  [0, 1, 2, 3, 4, 5, 10]
+);
 
-export async function POST(request: NextRequest) {
-  try {
-    const { message } = await request.json();
-
-    if (!message || typeof message !== "string") {
-      return NextResponse.json(
-        { error: "Invalid message" },
-        { status: 400 }
-      );
-    }
-
-    // Search for relevant QAs from the knowledge base
-    const relevantQAs = searchRelevantQAs(message);
+// Graph neighbors of the hits added to the prompt context
+const RELATED_CONTEXT = 2;
+// Matching answer passages in the prompt, not whole answers, unless CHAT_CONTEXT=answers
+const PASSAGE_CONTEXT = process.env.CHAT_CONTEXT !== "answers";
 
-    // Build context from relevant QAs
-    const context = relevantQAs
-      .map((qa) => `Q: ${qa.question}\nA: ${qa.answer}`)
-      .join("\n\n");
-
-    // Extract links from relevant QAs
-    const sources = relevantQAs
-      .flatMap((qa) => qa.links || [])
-      .filter((link, index, self) => self.indexOf(link) === index); // Remove duplicates
-
-    // Create the system prompt
-    const systemPrompt = `You are a helpful AI assistant for the UW DES166 course. Your role is to answer student questions based on the course's FAQ information.
+// The system prompt around the retrieved context, built once; see buildPrompt()
+const PROMPT_HEAD = `You are a helpful AI assistant for the UW DES166 course. Your role is to answer student questions based on the course's FAQ information.
 
 Based on the following QA records, answer the student's question:
 
-${context}
+`;
+const PROMPT_TAIL = `
 
 Guidelines:
 1. Be friendly, clear, and well-organized in your responses
@@ -45,47 +65,243 @@ Guidelines:
 
 Remember: You are an assistant to help students, but for important decisions they should always consult with their academic advisor.`;
 
+/** The full model prompt: only the context, history and question vary per request */
+const buildPrompt = (context: string, history: string, message: string) =>
+  PROMPT_HEAD +
+  context +
+  PROMPT_TAIL +
+  (history ? `\n\nConversation so far:\n${history}` : "") +
+  `\n\nUser question: ${message}`;
+
+const isOverloaded = (error: any) =>
+  error?.message?.includes("503") || error?.message?.includes("overloaded");
+
+const isTimeout = (error: any) =>
+  error?.name === "AbortError" || /timed? ?out|aborted/i.test(error?.message || "");
+
+/**
+ * Map an upstream error to a coarse class used for metrics and the user message
+ */
+function classifyError(error: any): "overloaded" | "timeout" | "auth" | "rate_limit" | "other" {
+  if (isOverloaded(error)) return "overloaded";
+  if (isTimeout(error)) return "timeout";
+  if (error?.message?.includes("API key") || error?.message?.includes("authentication")) return "auth";
+  if (error?.message?.includes("quota") || error?.message?.includes("rate limit")) return "rate_limit";
+  return "other";
+}
+
+/**
+ * Response built from FAQ retrieval alone, for requests the model can't take
+ */
+function degradedResponse(relevantQAs: QAItem[], reason: ShedReason, corrections: Correction[]) {
+  const [top, ...rest] = relevantQAs;
+  const related = rest.map(toRelatedQuestion);
+  return {
+    message: `The assistant is busy right now, so here is the closest answer from the FAQ.\n\nQ: ${top.question}\nA: ${top.answer}`,
+    sources: top.links && top.links.length > 0 ? top.links : undefined,
+    related: related.length > 0 ? related : undefined,
+    corrections: corrections.length > 0 ? corrections : undefined,
+    degraded: reason,
+  };
+}
+
+export async function POST(request: NextRequest) {
+  const trace = new RequestTrace("chat");
+  // Filled in as the request progresses; queued for the query log by respond()
+  const logged: Partial<QueryLogEntry> = {};
+  const respond = (body: unknown, status: number = 200, headers?: Record<string, string>) => {
+    const timings = trace.finish(status);
+    if (logged.message) {
+      logQuery({
+        message: logged.message,
+        query: logged.query,
+        path: String(trace.attrs.path || (status < 400 ? "model" : "error")),
+        status,
+        retrieved: logged.retrieved || [],
+        faq: logged.faq,
+        routing: logged.routing,
+        model: trace.attrs.model as string | undefined,
+        degraded: trace.attrs.shed as string | undefined,
+        ...timings,
+      });
+    }
+    return NextResponse.json(body, { status, headers });
+  };
+  let relevantQAs: QAItem[] = [];
+  let corrections: Correction[] = [];
+  let release: (() => void) | null = null;
+  // Answered turns are remembered for follow-ups in the same conversation
+  let remember = (answer: string) => {};
+  const shedTo = (reason: ShedReason, retryAfter: number) => {
+    trace.attrs.path = "shed";
+    trace.attrs.shed = reason;
+    if (relevantQAs.length > 0) {
+      const degraded = degradedResponse(relevantQAs, reason, corrections);
+      remember(degraded.message);
+      return respond(degraded);
+    }
+    return respond(
+      { error: "The assistant is busy right now. Please try again in a moment.", degraded: reason },
+      503,
+      { "Retry-After": String(Math.max(1, retryAfter)) }
+    );
+  };
+
+  try {
+    const endParse = trace.start("parse");
+    const { message, conversationId } = await request.json();
+    endParse();
+
+    if (!message || typeof message !== "string") {
+      return respond({ error: "Invalid message" }, 400);
+    }
+
+    logged.message = message;
+
+    const conversation = getConversation(conversationId);
+    trace.attrs.turns = conversation ? conversation.summary.length + conversation.recent.length : 0;
+    remember = (answer) => recordTurn(conversationId, message, answer);
+
+    // Near-verbatim FAQ questions get the stored answer without a model call
+    const faq = trace.time("faq_match", () => matchFAQ(message));
+    faqScore.observe(faq.score);
+    if (faq.qa) logged.faq = { id: faq.qa.id, score: faq.score, runnerUp: faq.runnerUp };
+    // The match index is the imported corpus; an entry edited or deleted since goes through retrieval
+    const faqEdited = faq.direct && faq.qa !== null && liveQA(faq.qa.id) !== faq.qa;
+    if (faq.direct && faq.qa && !faqEdited) {
+      faqFastPath.inc({ outcome: "hit" });
+      trace.attrs.path = "faq";
+      trace.attrs.faqScore = Number(faq.score.toFixed(3));
+      const faqRelated = getRelatedQAs(faq.qa, DEFAULT_RELATED, liveQA).map(toRelatedQuestion);
+      remember(faq.qa.answer);
+      return respond({
+        message: faq.qa.answer,
+        sources: faq.qa.links && faq.qa.links.length > 0 ? faq.qa.links : undefined,
+        related: faqRelated.length > 0 ? faqRelated : undefined,
+        faq: { id: faq.qa.id, question: faq.qa.question, score: faq.score },
+      });
+    }
+    faqFastPath.inc({ outcome: faqEdited ? "edited" : "miss" });
+
+    // Follow-ups like "what about for IxD?" borrow terms from the previous question
+    const rewritten = rewriteQuery(message, conversation);
+    trace.attrs.rewritten = rewritten !== message;
+
+    // Misspelled course terms ("portfollio") would otherwise match nothing
+    const spelled = trace.time("spell", () => correctQuery(rewritten));
+    const query = spelled.query;
+    corrections = spelled.corrections;
+    trace.attrs.corrections = corrections.length;
+    if (query !== message) logged.query = query;
+
+    // Search for relevant QAs from the knowledge base
+    const endRetrieve = trace.start("retrieve");
+    let retrieval: Awaited<ReturnType<typeof retrieve>>;
+    try {
+      retrieval = await retrieve(query);
+    } catch (error) {
+      // Too many searches already queued for the retrieval workers
+      if (!(error instanceof RetrievalBusyError)) throw error;
+      recordShed("retrieval_busy");
+      return shedTo("retrieval_busy", 1);
+    } finally {
+      endRetrieve();
+    }
+    const { hits: scored, routing } = retrieval;
+    relevantQAs = scored.map((item) => item.qa);
+    logged.retrieved = scored.map((item) => ({ id: item.qa.id, score: item.score }));
+    retrievedCount.observe(relevantQAs.length);
+    trace.attrs.retrieved = relevantQAs.length;
+    // Which categories were scored, and why, for tuning the router
+    logged.routing = { searched: routing.searched, widened: routing.widened, candidates: routing.candidates };
+    trace.attrs.routedTo = routing.searched.join(",");
+    trace.attrs.candidates = routing.candidates;
+    trace.attrs.pooled = retrieval.pooled;
+
+    const endPromptBuild = trace.start("prompt_build");
+
+    // Widen context with precomputed neighbors instead of a second search
+    const contextQAs = expandWithRelated(relevantQAs, RELATED_CONTEXT, liveQA);
+    trace.attrs.relatedContext = contextQAs.length - relevantQAs.length;
+
+    // Follow-up questions for the UI, from the best hit's neighbors
+    const related = relevantQAs.length > 0 ? getRelatedQAs(relevantQAs[0], DEFAULT_RELATED, liveQA).map(toRelatedQuestion) : [];
+
+    // Build context from relevant QAs: each question with the passages of its answer that match
+    const words = queryWords(query);
+    const context = contextQAs
+      .map((qa) => `Q: ${qa.question}\nA: ${PASSAGE_CONTEXT ? answerSnippet(qa, words) : qa.answer}`)
+      .join("\n\n");
+    trace.attrs.contextChars = context.length;
+
+    // Extract links from relevant QAs, whole, whichever passages made the prompt
+    const sources = contextQAs
+      .flatMap((qa) => qa.links || [])
+      .filter((link, index, self) => self.indexOf(link) === index); // Remove duplicates
+
+    // Summary plus recent turns, bounded by MAX_HISTORY_CHARS however long the conversation
+    const history = historyBlock(conversation);
+    trace.attrs.historyChars = history.length;
+
+    const prompt = buildPrompt(context, history, message);
+    endPromptBuild();
+    promptChars.observe(prompt.length);
+    trace.attrs.promptChars = prompt.length;
+
     // Check if API key is set
-    if (!process.env.GEMINI_API_KEY || process.env.GEMINI_API_KEY === "your-gemini-api-key-here") {
-      return NextResponse.json(
+    if (!geminiConfigured()) {
+      chatErrors.inc({ class: "config" });
+      return respond(
         { error: "Gemini API key is not configured. Please set GEMINI_API_KEY in .env.local" },
-        { status: 500 }
+        500
       );
     }
 
-    const prompt = `${systemPrompt}\n\nUser question: ${message}`;
+    // Rate limits and the upstream queue; refused requests get FAQ results
+    const endAdmit = trace.start("admission");
+    const admission = await admitUpstream(clientKey(request.headers));
+    endAdmit();
+    if (!admission.admitted) {
+      return shedTo(admission.reason, admission.retryAfter);
+    }
+    release = admission.release;
     
     // Try multiple models with fallback - prioritize gemini-2.5-flash
-    const models = ["gemini-2.5-flash", "gemini-1.5-flash", "gemini-1.5-pro"];
     let lastError: any = null;
     
-    for (const modelName of models) {
+    for (const modelName of MODEL_CHAIN) {
+      const endAttempt = trace.start("model_attempt", { model: modelName });
       try {
-        const model = genAI.getGenerativeModel({ 
-          model: modelName,
-          generationConfig: {
-      temperature: 0.7,
-            maxOutputTokens: 500,
-          },
-    });
+        // Shared per-process handle on a kept-alive connection (lib/gemini.ts)
+        const result = await generateContent(modelName, prompt);
+        endAttempt();
+        modelAttempts.inc({ model: modelName, outcome: "success" });
+        trace.attrs.model = modelName;
 
-        const result = await model.generateContent(prompt);
+        const endPostProcess = trace.start("post_process");
         const response = result.response;
         let responseMessage = response.text() || 
       "I'm sorry, I couldn't generate a response. Please try again.";
         
         // Remove Markdown formatting (bold markers **)
         responseMessage = responseMessage.replace(/\*\*(.*?)\*\*/g, '$1');
+        endPostProcess();
+        remember(responseMessage);
 
-    return NextResponse.json({
+    return respond({
       message: responseMessage,
       sources: sources.length > 0 ? sources : undefined,
+      related: related.length > 0 ? related : undefined,
+      corrections: corrections.length > 0 ? corrections : undefined,
     });
       } catch (error: any) {
+        endAttempt();
         lastError = error;
+        modelAttempts.inc({ model: modelName, outcome: classifyError(error) });
         // If it's a 503 or overload error, try next model
-        if (error?.message?.includes("503") || error?.message?.includes("overloaded")) {
+        if (isOverloaded(error)) {
           console.warn(`Model ${modelName} is overloaded, trying next model...`);
+          fallbacks.inc({ from: modelName });
           continue;
         }
         // For other errors, throw immediately
@@ -102,24 +318,43 @@ Remember: You are an assistant to help students, but for important decisions the
     // Provide user-friendly error messages
     let errorMessage = "Sorry, I'm having trouble connecting to the AI service right now.";
     let statusCode = 500;
+    const errorClass = classifyError(error);
+    chatErrors.inc({ class: errorClass });
+
+    // Capacity problems upstream degrade to FAQ results like local shedding
+    const upstreamShed: Partial<Record<typeof errorClass, ShedReason>> = {
+      overloaded: "upstream_overloaded",
+      rate_limit: "upstream_rate_limit",
+      timeout: "upstream_timeout",
+    };
+    const shedReason = upstreamShed[errorClass];
+    if (shedReason && relevantQAs.length > 0) {
+      recordShed(shedReason);
+      return shedTo(shedReason, 1);
+    }
     
-    if (error?.message?.includes("503") || error?.message?.includes("overloaded")) {
+    if (errorClass === "overloaded") {
       errorMessage = "The AI service is currently overloaded. Please try again in a few moments.";
       statusCode = 503;
-    } else if (error?.message?.includes("API key") || error?.message?.includes("authentication")) {
+    } else if (errorClass === "auth") {
       errorMessage = "API authentication failed. Please check your API key configuration.";
       statusCode = 401;
-    } else if (error?.message?.includes("quota") || error?.message?.includes("rate limit")) {
+    } else if (errorClass === "rate_limit") {
       errorMessage = "API rate limit exceeded. Please try again later.";
       statusCode = 429;
+    } else if (errorClass === "timeout") {
+      errorMessage = "The AI service took too long to respond. Please try again.";
+      statusCode = 504;
     }
     
-    return NextResponse.json(
+    return respond(
       { 
         error: errorMessage,
         details: process.env.NODE_ENV === "development" ? error?.message : undefined
       },
-      { status: statusCode }
+      statusCode
     );
+  } finally {
+    release?.();
   }
 }
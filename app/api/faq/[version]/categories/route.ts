@@ -0,0 +1,11 @@
+import { qaData } from "@/data/qa-data";
+import { categoryListing, staticJSON, versionParams } from "@/lib/faq-static";
+
+// Prerendered at build time for the current FAQ version only
+export const dynamic = "force-static";
+export const dynamicParams = false;
+export const generateStaticParams = versionParams;
+
+export function GET() {
+  return staticJSON({ total: qaData.length, categories: categoryListing() });
+}
@@ -0,0 +1,18 @@
+import { categories } from "@/data/qa-data";
+import { categoryListing, categoryQAs, staticJSON, versionParams, withRelatedQuestions } from "@/lib/faq-static";
+
+// Prerendered at build time for the current FAQ version and every category
+export const dynamic = "force-static";
+export const dynamicParams = false;
+
+export function generateStaticParams() {
+  return versionParams().flatMap(({ version }) => categories.map((cat) => ({ version, id: cat.id })));
+}
+
+export function GET(_request: Request, { params }: { params: { version: string; id: string } }) {
+  return staticJSON({
+    category: params.id,
+    data: withRelatedQuestions(categoryQAs(params.id)),
+    categories: categoryListing(),
+  });
+}
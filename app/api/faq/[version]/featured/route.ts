@@ -0,0 +1,12 @@
+import { qaData } from "@/data/qa-data";
+import { FEATURED_COUNT, staticJSON, versionParams } from "@/lib/faq-static";
+
+// Prerendered at build time for the current FAQ version only
+export const dynamic = "force-static";
+export const dynamicParams = false;
+export const generateStaticParams = versionParams;
+
+/** Questions offered on the empty chat screen */
+export function GET() {
+  return staticJSON({ data: qaData.slice(0, FEATURED_COUNT) });
+}
@@ -0,0 +1,11 @@
+import { categoryListing, firstPerCategory, staticJSON, versionParams, withRelatedQuestions } from "@/lib/faq-static";
+
+// Prerendered at build time for the current FAQ version only
+export const dynamic = "force-static";
+export const dynamicParams = false;
+export const generateStaticParams = versionParams;
+
+/** One question per category, for the FAQ browser's default view */
+export function GET() {
+  return staticJSON({ data: withRelatedQuestions(firstPerCategory()), categories: categoryListing() });
+}
@@ -0,0 +1,34 @@
+import { NextRequest, NextResponse } from "next/server";
+import { hasBearerToken } from "@/lib/bearer";
+import { renderMetrics } from "@/lib/metrics";
+
+/**
+ * Prometheus metrics for this process
+ *
+ * Requires `Authorization: Bearer $METRICS_TOKEN`, or the admin token
+ * (QA_ADMIN_TOKEN) when METRICS_TOKEN is unset; with neither the route is
+ * disabled.
+ */
+
+// Metrics are per-process state, never prerender this route
+export const dynamic = "force-dynamic";
+
+export async function GET(request: NextRequest) {
+  if (!hasBearerToken(request.headers, process.env.METRICS_TOKEN || process.env.QA_ADMIN_TOKEN)) {
+    return NextResponse.json({ error: "Forbidden" }, { status: 403 });
+  }
+  try {
+    return new NextResponse(renderMetrics(), {
+      headers: {
+        "Content-Type": "text/plain; version=0.0.4; charset=utf-8",
+        "Cache-Control": "no-store",
+      },
+    });
+  } catch (error: any) {
+    console.error("Metrics API Error:", error);
+    return NextResponse.json(
+      { error: "Failed to render metrics" },
+      { status: 500 }
+    );
+  }
+}
@@ -1,5 +1,18 @@
 import { NextRequest, NextResponse } from "next/server";
-import { qaData, categories } from "@/data/qa-data";
+import { qaData } from "@/data/qa-data";
+import { categoryListing, categoryQAs, firstPerCategory, withRelatedQuestions } from "@/lib/faq-static";
+import { searchQAs } from "@/lib/qa-search";
+
+/**
+ * Dynamic FAQ queries. The app itself reads the prerendered
+ * /api/faq/<version>/ endpoints; this route serves ad-hoc filters and
+ * full-text search.
+ *
+ * ?q= returns the entries matching every word of q (see lib/qa-search.ts),
+ * optionally within ?category=, one ?page= (from 1) of ?limit= at a time.
+ * Each entry carries `highlights`: [start, end) offsets of the matches in
+ * its question and answer.
+ */
 
 export async function GET(request: NextRequest) {
   try {
@@ -7,24 +20,40 @@ export async function GET(request: NextRequest) {
     const category = searchParams.get("category");
     const limit = searchParams.get("limit");
     const onePerCategory = searchParams.get("onePerCategory") === "true";
+    const withRelated = searchParams.get("related") === "true";
+    const q = searchParams.get("q");
+
+    if (q) {
+      const start = performance.now();
+      const { hits, total, page, pageSize } = searchQAs(q, {
+        category,
+        page: parseInt(searchParams.get("page") || "", 10) || 1,
+        pageSize: parseInt(limit || "", 10) || undefined,
+      });
+      const elapsed = performance.now() - start;
+      const matched = hits.map(({ qa, highlights }) => ({ ...qa, highlights }));
+
+      return NextResponse.json(
+        {
+          data: withRelated ? withRelatedQuestions(matched) : matched,
+          total: qaData.length,
+          filtered: total,
+          page,
+          pages: Math.ceil(total / pageSize),
+          categories: categoryListing(),
+        },
+        { headers: { "Server-Timing": `search;dur=${elapsed.toFixed(3)}` } }
+      );
+    }
 
     let filteredData = qaData;
 
     // Filter by category if provided
     if (category) {
-      filteredData = qaData.filter((qa) => qa.category === category);
+      filteredData = categoryQAs(category);
     } else if (onePerCategory) {
       // Return one question from each category
-      const onePerCategoryList: typeof qaData = [];
-      const seenCategories = new Set<string>();
-
-      for (const qa of qaData) {
-        if (!seenCategories.has(qa.category)) {
-          seenCategories.add(qa.category);
-          onePerCategoryList.push(qa);
-        }
-      }
-      filteredData = onePerCategoryList;
+      filteredData = firstPerCategory();
     }
 
     // Apply limit if provided
@@ -33,14 +62,14 @@ export async function GET(request: NextRequest) {
       filteredData = filteredData.slice(0, limitNum);
     }
 
+    // Attach related questions from the precomputed graph
+    const data = withRelated ? withRelatedQuestions(filteredData) : filteredData;
+
     return NextResponse.json({
-      data: filteredData,
+      data,
       total: qaData.length,
       filtered: filteredData.length,
-      categories: categories.map((cat) => ({
-        ...cat,
-        count: qaData.filter((qa) => qa.category === cat.id).length,
-      })),
+      categories: categoryListing(),
     });
   } catch (error: any) {
     console.error("QA API Error:", error);
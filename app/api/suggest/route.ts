@@ -0,0 +1,31 @@
+import { NextRequest, NextResponse } from "next/server";
+import { suggestQuestions, DEFAULT_SUGGESTIONS } from "@/lib/suggest";
+
+export async function GET(request: NextRequest) {
+  try {
+    const { searchParams } = new URL(request.url);
+    const query = searchParams.get("q") || "";
+    const limit = parseInt(searchParams.get("limit") || "", 10) || DEFAULT_SUGGESTIONS;
+
+    const start = performance.now();
+    const suggestions = suggestQuestions(query, limit);
+    const elapsed = performance.now() - start;
+
+    return NextResponse.json(
+      { q: query, suggestions },
+      {
+        headers: {
+          // Suggestions only change when qa-data.ts is regenerated
+          "Cache-Control": "public, max-age=300",
+          "Server-Timing": `suggest;dur=${elapsed.toFixed(3)}`,
+        },
+      }
+    );
+  } catch (error: any) {
+    console.error("Suggest API Error:", error);
+    return NextResponse.json(
+      { error: "Failed to fetch suggestions" },
+      { status: 500 }
+    );
+  }
+}
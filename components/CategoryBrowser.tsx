@@ -1,6 +1,13 @@
 "use client";
 
-import { useState, useEffect } from "react";
+import { useState, useEffect, ReactNode } from "react";
+import { faqUrl } from "@/lib/faq-version";
+
+type RelatedQuestion = {
+  id: number;
+  question: string;
+  category: string;
+};
 
 type QAItem = {
   id: number;
@@ -8,6 +15,9 @@ type QAItem = {
   question: string;
   answer: string;
   links?: string[];
+  relatedQuestions?: RelatedQuestion[];
+  // Search matches: [start, end) offsets into question and answer
+  highlights?: { question: [number, number][]; answer: [number, number][] };
 };
 
 type Category = {
@@ -18,19 +28,45 @@ type Category = {
   count?: number;
 };
 
+const SEARCH_PAGE_SIZE = 20;
+const SEARCH_DEBOUNCE_MS = 200;
+
+/** text with the given ranges wrapped in <mark> */
+function highlight(text: string, ranges?: [number, number][]): ReactNode {
+  if (!ranges || ranges.length === 0) return text;
+  const parts: ReactNode[] = [];
+  let at = 0;
+  ranges.forEach(([start, end], i) => {
+    if (start > at) parts.push(text.slice(at, start));
+    parts.push(
+      <mark key={i} className="bg-[#fff3a3] text-inherit rounded-[2px]">
+        {text.slice(start, end)}
+      </mark>
+    );
+    at = end;
+  });
+  if (at < text.length) parts.push(text.slice(at));
+  return parts;
+}
+
 export default function CategoryBrowser() {
   const [selectedCategory, setSelectedCategory] = useState<string | null>(null);
   const [expandedQuestion, setExpandedQuestion] = useState<number | null>(null);
   const [filteredQAs, setFilteredQAs] = useState<QAItem[]>([]);
   const [categories, setCategories] = useState<Category[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [query, setQuery] = useState("");
+  const [searchResults, setSearchResults] = useState<QAItem[]>([]);
+  const [searchPage, setSearchPage] = useState(1);
+  const [requestedPage, setRequestedPage] = useState(1);
+  const [searchPages, setSearchPages] = useState(0);
+  const [searchTotal, setSearchTotal] = useState(0);
+  const isSearching = query.trim().length > 0;
 
-  // Load QAs from API
+  // Load QAs from the static FAQ endpoints (cached until the corpus changes)
   useEffect(() => {
     setIsLoading(true);
-    const url = selectedCategory
-      ? `/api/qa?category=${selectedCategory}`
-      : "/api/qa?onePerCategory=true";
+    const url = selectedCategory ? faqUrl("category", selectedCategory) : faqUrl("overview");
 
     fetch(url)
       .then((res) => res.json())
@@ -46,6 +82,42 @@ export default function CategoryBrowser() {
       .finally(() => setIsLoading(false));
   }, [selectedCategory]);
 
+  // Full-text search through /api/qa; a new query or category starts again at page 1 (debounced)
+  useEffect(() => {
+    if (!isSearching) return;
+    const controller = new AbortController();
+    const params = new URLSearchParams({
+      q: query,
+      page: String(requestedPage),
+      limit: String(SEARCH_PAGE_SIZE),
+      related: "true",
+    });
+    if (selectedCategory) params.set("category", selectedCategory);
+
+    const timer = setTimeout(
+      () =>
+        fetch(`/api/qa?${params}`, { signal: controller.signal })
+          .then((res) => res.json())
+          .then((data) => {
+            if (!data.data) return;
+            setSearchResults((previous) => (requestedPage === 1 ? data.data : [...previous, ...data.data]));
+            setSearchPage(data.page);
+            setSearchPages(data.pages);
+            setSearchTotal(data.filtered);
+          })
+          .catch((err) => {
+            if (err.name !== "AbortError") console.error("Failed to search QAs:", err);
+          }),
+      requestedPage === 1 ? SEARCH_DEBOUNCE_MS : 0
+    );
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [query, selectedCategory, requestedPage, isSearching]);
+
+  const visibleQAs = isSearching ? searchResults : filteredQAs;
+
   return (
     <div className="overflow-clip relative w-full min-h-screen flex flex-col">
       {/* Category Pills */}
@@ -58,6 +130,7 @@ export default function CategoryBrowser() {
               onClick={() => {
                 setSelectedCategory(isSelected ? null : category.id);
                 setExpandedQuestion(null);
+                setRequestedPage(1);
               }}
               className={`flex items-center gap-[4px] h-[34px] px-[14px] py-[6px] rounded-[17px] border border-neutral-200 transition-all ${
                 isSelected
@@ -77,36 +150,66 @@ export default function CategoryBrowser() {
         })}
       </div>
 
+      {/* Search */}
+      <div className="px-8 md:px-[120px] pb-4">
+        <input
+          type="search"
+          value={query}
+          onChange={(e) => {
+            setQuery(e.target.value);
+            setExpandedQuestion(null);
+            setRequestedPage(1);
+          }}
+          placeholder="Search questions and answers"
+          className="w-full h-[40px] px-[14px] rounded-[8px] border border-neutral-200 bg-white text-[#160211] text-[14px] outline-none focus:border-[#160211]"
+          style={{ fontFamily: 'var(--font-dm-sans), sans-serif' }}
+        />
+        {isSearching && (
+          <p
+            className="mt-2 text-xs text-[#56637e]"
+            style={{ fontFamily: 'var(--font-manrope), sans-serif' }}
+          >
+            {searchTotal === 1 ? "1 match" : `${searchTotal} matches`}
+          </p>
+        )}
+      </div>
+
       {/* Questions List */}
       <div className="flex flex-col gap-[14px] px-8 md:px-[120px] pb-[60px]">
-        {isLoading ? (
+        {isLoading && !isSearching ? (
           <div className="text-center py-8 text-[#56637e]">載入中...</div>
         ) : (
-          filteredQAs.map((qa, index) => {
+          visibleQAs.map((qa, index) => {
           const isExpanded = expandedQuestion === qa.id;
           return (
-            <button
+            <div
               key={qa.id}
-              onClick={() => setExpandedQuestion(isExpanded ? null : qa.id)}
               className={`w-full p-[10px] rounded-[8px] border border-white text-left transition-colors ${
                 isExpanded
                   ? "bg-[rgba(233,233,233,0.5)]"
                   : "bg-[rgba(233,233,233,0.5)] hover:bg-[rgba(233,233,233,0.7)]"
               }`}
             >
-              <p 
-                className="font-normal text-[#160211] text-[14px]"
-                style={{ fontFamily: 'var(--font-dm-sans), sans-serif', fontWeight: 400 }}
+              {/* Only the question toggles, so the links below aren't nested in a button */}
+              <button
+                onClick={() => setExpandedQuestion(isExpanded ? null : qa.id)}
+                aria-expanded={isExpanded}
+                className="w-full text-left"
               >
-                {qa.question}
-              </p>
+                <p 
+                  className="font-normal text-[#160211] text-[14px]"
+                  style={{ fontFamily: 'var(--font-dm-sans), sans-serif', fontWeight: 400 }}
+                >
+                  {highlight(qa.question, qa.highlights?.question)}
+                </p>
+              </button>
               {isExpanded && (
                 <div className="mt-3 pt-3 border-t border-[rgba(22,2,17,0.09)]">
                   <p 
                     className="text-[#160211] text-[14px] whitespace-pre-wrap mb-3"
                     style={{ fontFamily: 'var(--font-dm-sans), sans-serif', fontWeight: 400 }}
                   >
-                    {qa.answer}
+                    {highlight(qa.answer, qa.highlights?.answer)}
                   </p>
                   {qa.links && qa.links.length > 0 && (
                     <div className="mt-3 pt-3 border-t border-[rgba(22,2,17,0.09)]">
@@ -130,11 +233,44 @@ export default function CategoryBrowser() {
                       ))}
                     </div>
                   )}
+                  {qa.relatedQuestions && qa.relatedQuestions.length > 0 && (
+                    <div className="mt-3 pt-3 border-t border-[rgba(22,2,17,0.09)]">
+                      <p 
+                        className="text-xs font-medium text-[#56637e] mb-2"
+                        style={{ fontFamily: 'var(--font-manrope), sans-serif', fontWeight: 500 }}
+                      >
+                        Related Questions:
+                      </p>
+                      {qa.relatedQuestions.map((related) => (
+                        <button
+                          key={related.id}
+                          onClick={() => {
+                            setQuery("");
+                            setSelectedCategory(related.category);
+                            setExpandedQuestion(related.id);
+                          }}
+                          className="block text-left text-xs text-[#008fb4] hover:underline mb-1"
+                          style={{ fontFamily: 'var(--font-manrope), sans-serif' }}
+                        >
+                          {related.question}
+                        </button>
+                      ))}
+                    </div>
+                  )}
                 </div>
               )}
-            </button>
+            </div>
           );
         }))}
+        {isSearching && searchPage < searchPages && (
+          <button
+            onClick={() => setRequestedPage(searchPage + 1)}
+            className="self-center h-[34px] px-[14px] rounded-[17px] border border-neutral-200 bg-white text-[#160211] hover:bg-gray-50"
+            style={{ fontFamily: 'var(--font-manrope), sans-serif', fontSize: '14px' }}
+          >
+            Show more
+          </button>
+        )}
       </div>
 
       {/* Footer - Fixed at bottom */}
@@ -2,11 +2,15 @@
 
 import { useState, useRef, useEffect, useMemo } from "react";
 import { Send, Loader2 } from "lucide-react";
+import { faqUrl } from "@/lib/faq-version";
 
 type Message = {
   role: "user" | "assistant";
   content: string;
   sources?: string[];
+  related?: Suggestion[];
+  faq?: { id: number; question: string; score: number };
+  corrections?: { from: string; to: string }[];
 };
 
 type QAItem = {
@@ -17,16 +21,38 @@ type QAItem = {
   links?: string[];
 };
 
+type Suggestion = {
+  id: number;
+  question: string;
+  category: string;
+};
+
+/**
+ * A random v4 UUID; crypto.randomUUID only exists in secure contexts, so
+ * plain-http hosts (a LAN address, a dev box) build one from getRandomValues
+ */
+function newConversationId(): string {
+  if (typeof crypto.randomUUID === "function") return crypto.randomUUID();
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  bytes[6] = (bytes[6] & 0x0f) | 0x40;
+  bytes[8] = (bytes[8] & 0x3f) | 0x80;
+  const hex = Array.from(bytes, (byte) => byte.toString(16).padStart(2, "0")).join("");
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+}
+
 export default function ChatInterface() {
   const [messages, setMessages] = useState<Message[]>([]);
   const [input, setInput] = useState("");
   const [isLoading, setIsLoading] = useState(false);
   const [featuredQuestions, setFeaturedQuestions] = useState<QAItem[]>([]);
+  const [suggestions, setSuggestions] = useState<Suggestion[]>([]);
   const messagesEndRef = useRef<HTMLDivElement>(null);
+  // Lets the server keep follow-up context for this page session
+  const conversationIdRef = useRef<string>("");
 
-  // Load featured questions from API
+  // Load featured questions (static, cached until the corpus changes)
   useEffect(() => {
-    fetch("/api/qa?limit=3")
+    fetch(faqUrl("featured"))
       .then((res) => res.json())
       .then((data) => {
         if (data.data) {
@@ -36,6 +62,24 @@ export default function ChatInterface() {
       .catch((err) => console.error("Failed to load featured questions:", err));
   }, []);
 
+  // Fetch typeahead suggestions on every keystroke, cancelling the previous request
+  useEffect(() => {
+    const query = input.trim();
+    if (!query || isLoading) {
+      setSuggestions([]);
+      return;
+    }
+
+    const controller = new AbortController();
+    fetch(`/api/suggest?q=${encodeURIComponent(query)}&limit=5`, { signal: controller.signal })
+      .then((res) => res.json())
+      .then((data) => setSuggestions(data.suggestions || []))
+      .catch((err) => {
+        if (err.name !== "AbortError") console.error("Failed to load suggestions:", err);
+      });
+    return () => controller.abort();
+  }, [input, isLoading]);
+
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
   };
@@ -44,20 +88,20 @@ export default function ChatInterface() {
     scrollToBottom();
   }, [messages]);
 
-  const handleSubmit = async (e: React.FormEvent) => {
-    e.preventDefault();
-    if (!input.trim() || isLoading) return;
-
-    const userMessage = input.trim();
+  const sendMessage = async (userMessage: string) => {
     setInput("");
+    setSuggestions([]);
     setMessages((prev) => [...prev, { role: "user", content: userMessage }]);
     setIsLoading(true);
+    if (!conversationIdRef.current) {
+      conversationIdRef.current = newConversationId();
+    }
 
     try {
       const response = await fetch("/api/chat", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ message: userMessage }),
+        body: JSON.stringify({ message: userMessage, conversationId: conversationIdRef.current }),
       });
 
       const data = await response.json();
@@ -69,6 +113,9 @@ export default function ChatInterface() {
             role: "assistant",
             content: data.message,
             sources: data.sources,
+            related: data.related,
+            faq: data.faq,
+            corrections: data.corrections,
           },
         ]);
       } else {
@@ -95,6 +142,12 @@ export default function ChatInterface() {
     }
   };
 
+  const handleSubmit = (e: React.FormEvent) => {
+    e.preventDefault();
+    if (!input.trim() || isLoading) return;
+    sendMessage(input.trim());
+  };
+
   const handleKeyPress = (e: React.KeyboardEvent) => {
     if (e.key === "Enter" && !e.shiftKey) {
       e.preventDefault();
@@ -155,6 +208,22 @@ export default function ChatInterface() {
                   >
                     {message.content}
                   </p>
+                  {message.faq && (
+                    <p 
+                      className="mt-1 text-[10px] sm:text-xs opacity-60"
+                      style={{ fontFamily: 'var(--font-manrope), sans-serif', fontWeight: 400 }}
+                    >
+                      Answered directly from the FAQ
+                    </p>
+                  )}
+                  {message.corrections && message.corrections.length > 0 && (
+                    <p 
+                      className="mt-1 text-[10px] sm:text-xs opacity-60"
+                      style={{ fontFamily: 'var(--font-manrope), sans-serif', fontWeight: 400 }}
+                    >
+                      Searched for: {message.corrections.map((c) => `${c.from} → ${c.to}`).join(", ")}
+                    </p>
+                  )}
                   {message.sources && message.sources.length > 0 && (
                     <div className="mt-2 pt-2 border-t border-[rgba(22,2,17,0.09)]">
                       <p 
@@ -177,6 +246,28 @@ export default function ChatInterface() {
                       ))}
                     </div>
                   )}
+                  {message.related && message.related.length > 0 && (
+                    <div className="mt-2 pt-2 border-t border-[rgba(22,2,17,0.09)]">
+                      <p 
+                        className="text-[10px] sm:text-xs opacity-75 mb-1"
+                        style={{ fontFamily: 'var(--font-manrope), sans-serif', fontWeight: 400 }}
+                      >
+                        Related questions:
+                      </p>
+                      {message.related.map((related) => (
+                        <button
+                          key={related.id}
+                          type="button"
+                          onClick={() => sendMessage(related.question)}
+                          disabled={isLoading}
+                          className="text-[10px] sm:text-xs text-left block opacity-75 hover:opacity-100 text-[#008fb4] disabled:cursor-not-allowed"
+                          style={{ fontFamily: 'var(--font-manrope), sans-serif', fontWeight: 400 }}
+                        >
+                          {related.question}
+                        </button>
+                      ))}
+                    </div>
+                  )}
                 </div>
               </div>
             ))}
@@ -235,6 +326,23 @@ export default function ChatInterface() {
             </div>
           </form>
 
+          {/* Typeahead suggestions */}
+          {suggestions.length > 0 && (
+            <div className="flex flex-col bg-white border border-[rgba(22,2,17,0.09)] rounded-[8px] overflow-hidden -mt-[16px] sm:-mt-[24px]">
+              {suggestions.map((suggestion) => (
+                <button
+                  key={suggestion.id}
+                  type="button"
+                  onClick={() => sendMessage(suggestion.question)}
+                  className="text-left px-[16px] sm:px-[24px] py-[8px] text-[#160211] text-[13px] sm:text-[14px] hover:bg-[rgba(22,2,17,0.04)] transition-colors"
+                  style={{ fontFamily: 'var(--font-dm-sans), sans-serif', fontWeight: 400 }}
+                >
+                  {suggestion.question}
+                </button>
+              ))}
+            </div>
+          )}
+
           {/* Frequently Asked Questions Section - Only visible when no messages */}
           {!hasMessages && (
             <div className="flex flex-col gap-[12px] sm:gap-[14px]">
@@ -250,53 +358,7 @@ export default function ChatInterface() {
                   return (
                     <button
                       key={qa.id}
-                      onClick={async () => {
-                        const question = qa.question;
-                        setInput("");
-                        setMessages((prev) => [...prev, { role: "user", content: question }]);
-                        setIsLoading(true);
-
-                        try {
-                          const response = await fetch("/api/chat", {
-                            method: "POST",
-                            headers: { "Content-Type": "application/json" },
-                            body: JSON.stringify({ message: question }),
-                          });
-
-                          const data = await response.json();
-
-                          if (response.ok) {
-                            setMessages((prev) => [
-                              ...prev,
-                              {
-                                role: "assistant",
-                                content: data.message,
-                                sources: data.sources,
-                              },
-                            ]);
-                          } else {
-                            const errorMsg = data.error || "Sorry, I encountered an error. Please try again.";
-                            setMessages((prev) => [
-                              ...prev,
-                              {
-                                role: "assistant",
-                                content: `Error: ${errorMsg}${data.details ? `\n\nDetails: ${data.details}` : ""}`,
-                              },
-                            ]);
-                          }
-                        } catch (error) {
-                          console.error("Error:", error);
-                          setMessages((prev) => [
-                            ...prev,
-                            {
-                              role: "assistant",
-                              content: "Sorry, I couldn't connect to the server. Please try again.",
-                            },
-                          ]);
-                        } finally {
-                          setIsLoading(false);
-                        }
-                      }}
+                      onClick={() => sendMessage(qa.question)}
                       className="bg-[rgba(255,255,255,0.5)] border border-white flex items-center justify-center p-[10px] rounded-[8px] hover:bg-[rgba(255,255,255,0.8)] transition-colors w-full sm:w-auto sm:flex-shrink-0"
                       style={{ 
                         width: `100%`,
@@ -6,6 +6,7 @@ export type QAItem = {
   links?: string[];
   date?: string;
   keywords?: string[];
+  related?: number[];
 };
 
 export type Category = {
@@ -0,0 +1,14 @@
+/**
+ * Next.js server startup hook
+ *
+ * Sets up the kept-alive Gemini connection pool before the first chat
+ * request, and with GEMINI_WARM_UP=on opens the first upstream connection,
+ * which that request would otherwise pay for.
+ */
+export async function register() {
+  // Not in the edge runtime, and not while `next build` collects pages
+  if (process.env.NEXT_RUNTIME !== "nodejs" || process.env.NEXT_PHASE === "phase-production-build") return;
+  const { warmUpGemini } = await import("@/lib/gemini");
+  // Don't hold up startup on a slow or unreachable upstream
+  void warmUpGemini();
+}
@@ -0,0 +1,249 @@
+import { envNumber } from "@/lib/env";
+import { counter, gauge, histogram } from "@/lib/metrics";
+
+/**
+ * Admission control for upstream model calls
+ *
+ * Three layers, checked in order before a request may call Gemini:
+ *   1. a token bucket per client (IP), so one runaway client can't drain
+ *      the quota for everyone
+ *   2. a global token bucket sized to the Gemini quota
+ *   3. a bounded concurrency queue: at most UPSTREAM_CONCURRENCY calls in
+ *      flight, at most UPSTREAM_QUEUE_SIZE waiting, and none waiting longer
+ *      than UPSTREAM_QUEUE_TIMEOUT_MS
+ *
+ * A request refused by any layer is shed: the route answers from FAQ
+ * retrieval instead of failing. State is per process and kept on
+ * globalThis so dev-mode hot reloads don't reset it.
+ */
+
+export const CLIENT_RATE_PER_MINUTE = envNumber("CHAT_CLIENT_RATE_PER_MINUTE", 10);
+export const CLIENT_BURST = envNumber("CHAT_CLIENT_BURST", 5);
+export const GLOBAL_RATE_PER_MINUTE = envNumber("CHAT_GLOBAL_RATE_PER_MINUTE", 60);
+export const GLOBAL_BURST = envNumber("CHAT_GLOBAL_BURST", 15);
+export const UPSTREAM_CONCURRENCY = envNumber("CHAT_UPSTREAM_CONCURRENCY", 4);
+export const UPSTREAM_QUEUE_SIZE = envNumber("CHAT_UPSTREAM_QUEUE_SIZE", 16);
+export const UPSTREAM_QUEUE_TIMEOUT_MS = envNumber("CHAT_UPSTREAM_QUEUE_TIMEOUT_MS", 5000);
+/**
+ * Reverse proxies in front of the app that append to X-Forwarded-For. The
+ * client is the address the outermost one saw, this many hops from the
+ * right; anything further left was sent by the client and can be forged.
+ * 0 means no proxy: the headers are ignored and all clients share a bucket.
+ */
+export const TRUSTED_PROXY_HOPS = (() => {
+  const hops = Number(process.env.TRUSTED_PROXY_HOPS || 1);
+  return Number.isInteger(hops) && hops >= 0 ? hops : 1;
+})();
+
+// Idle client buckets are dropped beyond this many, oldest first
+const MAX_CLIENT_BUCKETS = 10000;
+
+export type ShedReason =
+  | "client_rate"
+  | "global_rate"
+  | "queue_full"
+  | "queue_timeout"
+  // Admitted, but the model call itself failed for capacity reasons
+  | "upstream_overloaded"
+  | "upstream_rate_limit"
+  | "upstream_timeout"
+  // Retrieval itself was refused (lib/retrieval-pool.ts queue full)
+  | "retrieval_busy";
+
+const shedCount = counter(
+  "chat_shed_total",
+  "Requests answered from FAQ retrieval instead of the model, by reason"
+);
+const queueDepth = gauge("chat_upstream_queue_depth", "Requests waiting for an upstream slot");
+const inFlight = gauge("chat_upstream_in_flight", "Upstream model calls in progress");
+const queueWait = histogram(
+  "chat_upstream_queue_wait_seconds",
+  "Time spent waiting for an upstream slot"
+);
+
+export class TokenBucket {
+  private tokens: number;
+  private updated: number;
+
+  constructor(readonly capacity: number, readonly perSecond: number, now: number = Date.now()) {
+    this.tokens = capacity;
+    this.updated = now;
+  }
+
+  private refill(now: number) {
+    const elapsed = Math.max(0, now - this.updated) / 1000;
+    this.tokens = Math.min(this.capacity, this.tokens + elapsed * this.perSecond);
+    this.updated = now;
+  }
+
+  /** Take one token if available */
+  take(now: number = Date.now()): boolean {
+    this.refill(now);
+    if (this.tokens < 1) return false;
+    this.tokens -= 1;
+    return true;
+  }
+
+  /** Put back a token taken for a request that never used it */
+  refund() {
+    this.tokens = Math.min(this.capacity, this.tokens + 1);
+  }
+
+  /** Seconds until the next token is available */
+  retryAfter(now: number = Date.now()): number {
+    this.refill(now);
+    return this.tokens >= 1 ? 0 : Math.ceil((1 - this.tokens) / this.perSecond);
+  }
+
+  /** True once the bucket has refilled, i.e. forgetting it changes nothing */
+  isIdle(now: number = Date.now()): boolean {
+    this.refill(now);
+    return this.tokens >= this.capacity;
+  }
+}
+
+type Waiter = { grant: (granted: boolean) => void; enqueued: number; timer: ReturnType<typeof setTimeout> };
+
+/**
+ * Counting semaphore with a bounded FIFO queue and a per-waiter deadline
+ */
+export class ConcurrencyQueue {
+  private active = 0;
+  private readonly waiters: Waiter[] = [];
+
+  constructor(readonly limit: number, readonly maxQueue: number, readonly timeoutMs: number) {}
+
+  /**
+   * Wait for a slot. Resolves to a release function, or to the reason the
+   * request was refused.
+   */
+  acquire(): Promise<(() => void) | ShedReason> {
+    if (this.active < this.limit) {
+      this.active++;
+      this.report();
+      queueWait.observe(0);
+      return Promise.resolve(this.releaser());
+    }
+    if (this.waiters.length >= this.maxQueue) {
+      return Promise.resolve("queue_full");
+    }
+
+    return new Promise((resolve) => {
+      const waiter: Waiter = {
+        enqueued: performance.now(),
+        grant: (granted) => {
+          clearTimeout(waiter.timer);
+          queueWait.observe((performance.now() - waiter.enqueued) / 1000);
+          resolve(granted ? this.releaser() : "queue_timeout");
+        },
+        timer: setTimeout(() => {
+          const index = this.waiters.indexOf(waiter);
+          if (index !== -1) this.waiters.splice(index, 1);
+          this.report();
+          waiter.grant(false);
+        }, this.timeoutMs),
+      };
+      this.waiters.push(waiter);
+      this.report();
+    });
+  }
+
+  private releaser(): () => void {
+    let released = false;
+    return () => {
+      if (released) return;
+      released = true;
+      const next = this.waiters.shift();
+      // The slot passes straight to the next waiter, if any
+      if (next) next.grant(true);
+      else this.active--;
+      this.report();
+    };
+  }
+
+  private report() {
+    queueDepth.set({}, this.waiters.length);
+    inFlight.set({}, this.active);
+  }
+}
+
+type AdmissionState = {
+  clients: Map<string, TokenBucket>;
+  global: TokenBucket;
+  upstream: ConcurrencyQueue;
+};
+
+const globalForAdmission = globalThis as unknown as { __des166Admission?: AdmissionState };
+const state = (globalForAdmission.__des166Admission ??= {
+  clients: new Map(),
+  global: new TokenBucket(GLOBAL_BURST, GLOBAL_RATE_PER_MINUTE / 60),
+  upstream: new ConcurrencyQueue(UPSTREAM_CONCURRENCY, UPSTREAM_QUEUE_SIZE, UPSTREAM_QUEUE_TIMEOUT_MS),
+});
+
+/**
+ * Client identity for the per-client bucket: the X-Forwarded-For hop
+ * appended by the outermost trusted proxy, else that proxy's real IP header
+ */
+export function clientKey(headers: Headers): string {
+  if (TRUSTED_PROXY_HOPS === 0) return "anonymous";
+  const hops = (headers.get("x-forwarded-for") || "")
+    .split(",")
+    .map((hop) => hop.trim())
+    .filter(Boolean);
+  if (hops.length >= TRUSTED_PROXY_HOPS) return hops[hops.length - TRUSTED_PROXY_HOPS];
+  return headers.get("x-real-ip") || "anonymous";
+}
+
+function clientBucket(key: string, now: number): TokenBucket {
+  let bucket = state.clients.get(key);
+  if (bucket) {
+    // Re-insert so Map order stays least-recently-used first
+    state.clients.delete(key);
+  } else {
+    bucket = new TokenBucket(CLIENT_BURST, CLIENT_RATE_PER_MINUTE / 60, now);
+    if (state.clients.size >= MAX_CLIENT_BUCKETS) {
+      for (const [oldKey, oldBucket] of state.clients) {
+        if (state.clients.size < MAX_CLIENT_BUCKETS && !oldBucket.isIdle(now)) break;
+        state.clients.delete(oldKey);
+      }
+    }
+  }
+  state.clients.set(key, bucket);
+  return bucket;
+}
+
+export type Admission =
+  | { admitted: true; release: () => void }
+  | { admitted: false; reason: ShedReason; retryAfter: number };
+
+/**
+ * Decide whether a request may call the model
+ * On success the caller must call release() once the upstream call is done.
+ */
+export async function admitUpstream(client: string): Promise<Admission> {
+  const now = Date.now();
+  const bucket = clientBucket(client, now);
+  if (!bucket.take(now)) {
+    return shed("client_rate", bucket.retryAfter(now));
+  }
+  if (!state.global.take(now)) {
+    bucket.refund();
+    return shed("global_rate", state.global.retryAfter(now));
+  }
+
+  const slot = await state.upstream.acquire();
+  if (typeof slot === "string") {
+    // Tokens stay spent: a full queue is itself a sign of overload
+    return shed(slot, 1);
+  }
+  return { admitted: true, release: slot };
+}
+
+export function recordShed(reason: ShedReason) {
+  shedCount.inc({ reason });
+}
+
+function shed(reason: ShedReason, retryAfter: number): Admission {
+  recordShed(reason);
+  return { admitted: false, reason, retryAfter };
+}
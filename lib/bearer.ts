@@ -0,0 +1,17 @@
+import { createHash, timingSafeEqual } from "crypto";
+
+/**
+ * Bearer-token checks for the operator routes
+ *
+ * Both sides are hashed before comparing, so timingSafeEqual always sees
+ * equal-length buffers and the time taken reveals neither the token's
+ * characters nor its length.
+ */
+
+const digest = (value: string) => createHash("sha256").update(value).digest();
+
+/** True when the request carries `Authorization: Bearer <token>`; always false without a token */
+export function hasBearerToken(headers: Headers, token: string | undefined): boolean {
+  if (!token) return false;
+  return timingSafeEqual(digest(headers.get("authorization") || ""), digest(`Bearer ${token}`));
+}
@@ -0,0 +1,117 @@
+import rules from "@/data/category-rules.json";
+import { qaData } from "@/data/qa-data";
+import { envNumber } from "@/lib/env";
+import { SHORT_FORMS, synonymForms } from "@/lib/synonyms";
+
+/**
+ * Query-side category routing for retrieval
+ *
+ * Predicts which FAQ categories a query belongs to, so lib/rag.ts can
+ * score those first. Two signals, both from what categorized the corpus:
+ *  - the keyword rules of scripts/qa_tools/categorize.py, compiled to
+ *    data/category-rules.json and matched against the query (plus its
+ *    synonym forms) the same way categorize_question() matches them;
+ *  - a naive Bayes word model over qaData, which categorize_question()
+ *    labeled, so words the rules don't list still count.
+ * Their sum per category goes through a softmax into a distribution.
+ *
+ * The model is built once per process (a few ms), from the imported
+ * corpus; live edits from the admin API don't retrain it.
+ */
+
+export type CategoryScore = { category: string; probability: number };
+
+export type CategoryRoute = {
+  // Every known category, most likely first
+  ranked: CategoryScore[];
+  // The shortest prefix of ranked holding ROUTE_MASS of the probability
+  routed: string[];
+};
+
+/** Probability mass the first searched categories must cover */
+export const ROUTE_MASS = Math.min(envNumber("RETRIEVAL_ROUTE_MASS", 0.95), 1);
+// Logit per rule keyword found in the query
+const RULE_WEIGHT = 1.5;
+// Additive smoothing for the word model; small, so a word one category never uses counts against it
+const ALPHA = 0.1;
+
+type Rule = { category: string; keywords: string[] };
+const RULES: Rule[] = rules.rules;
+
+/** Retrieval's query words: lowercased, trimmed, short ones only if acronyms */
+export function queryWords(query: string): string[] {
+  return query
+    .toLowerCase()
+    .split(/\s+/)
+    .map((word) => word.replace(/^\W+|\W+$/g, ""))
+    .filter((word) => word.length > 2 || SHORT_FORMS.has(word));
+}
+
+type WordModel = {
+  categories: string[];
+  logPrior: number[];
+  // word -> documents containing it, per category
+  docFreq: Map<string, number[]>;
+  docs: number[];
+};
+
+function buildModel(): WordModel {
+  const categories = Array.from(new Set([...RULES.map((rule) => rule.category), rules.default]));
+  const position = new Map(categories.map((category, i) => [category, i]));
+  const docs = categories.map(() => 0);
+  const docFreq = new Map<string, number[]>();
+  for (const qa of qaData) {
+    const c = position.get(qa.category);
+    if (c === undefined) continue;
+    docs[c]++;
+    const text = `${qa.question} ${(qa.keywords || []).join(" ")} ${synonymForms(qa.question).join(" ")}`;
+    for (const word of new Set(queryWords(text))) {
+      let counts = docFreq.get(word);
+      if (!counts) docFreq.set(word, (counts = categories.map(() => 0)));
+      counts[c]++;
+    }
+  }
+  const total = docs.reduce((a, b) => a + b, 0);
+  const logPrior = docs.map((n) => Math.log((n + 1) / (total + categories.length)));
+  return { categories, logPrior, docFreq, docs };
+}
+
+const MODEL = buildModel();
+
+/** Category distribution for a query, and the categories to search first */
+export function routeQuery(query: string): CategoryRoute {
+  const { categories, logPrior, docFreq, docs } = MODEL;
+  const logits = logPrior.slice();
+
+  for (const word of new Set(queryWords(query))) {
+    const counts = docFreq.get(word);
+    // Words the corpus never uses say nothing about its categories
+    if (!counts) continue;
+    counts.forEach((n, c) => {
+      logits[c] += Math.log((n + ALPHA) / (docs[c] + 2 * ALPHA));
+    });
+  }
+
+  // Same text categorize_question() matches its rules against
+  const text = `${query.toLowerCase()} ${synonymForms(query).join(" | ")}`;
+  for (const rule of RULES) {
+    const hits = rule.keywords.filter((keyword) => text.includes(keyword)).length;
+    logits[categories.indexOf(rule.category)] += RULE_WEIGHT * hits;
+  }
+
+  const max = Math.max(...logits);
+  const weights = logits.map((logit) => Math.exp(logit - max));
+  const sum = weights.reduce((a, b) => a + b, 0);
+  const ranked = categories
+    .map((category, c) => ({ category, probability: weights[c] / sum }))
+    .sort((a, b) => b.probability - a.probability);
+
+  const routed: string[] = [];
+  let mass = 0;
+  for (const entry of ranked) {
+    routed.push(entry.category);
+    mass += entry.probability;
+    if (mass >= ROUTE_MASS) break;
+  }
+  return { ranked, routed };
+}
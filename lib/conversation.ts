@@ -0,0 +1,130 @@
+/**
+ * Bounded multi-turn conversation memory for /api/chat
+ *
+ * Each conversation keeps its last RECENT_TURNS exchanges verbatim (each
+ * message clipped to TURN_CHARS) and folds older ones into a rolling
+ * summary capped at SUMMARY_CHARS. Summary lines are extractive (the
+ * question and the first sentence of the answer) and are computed once,
+ * when a turn ages out of the recent window. Summarizing never costs a model
+ * call, and the history block added to the prompt never exceeds
+ * MAX_HISTORY_CHARS, however long the conversation runs.
+ *
+ * Conversations live in process memory, keyed by a client-generated id,
+ * and are kept on globalThis so dev-mode hot reloads don't reset them.
+ */
+
+export const RECENT_TURNS = 3;
+export const TURN_CHARS = 600;
+export const SUMMARY_CHARS = 800;
+// Section headings and "Student:"/"Assistant:" labels
+const HISTORY_LABEL_CHARS = 60 + RECENT_TURNS * 24;
+export const MAX_HISTORY_CHARS = SUMMARY_CHARS + RECENT_TURNS * 2 * TURN_CHARS + HISTORY_LABEL_CHARS;
+
+const MAX_CONVERSATIONS = 5000;
+const CONVERSATION_TTL_MS = 2 * 60 * 60 * 1000;
+const CONVERSATION_ID_RE = /^[\w-]{8,64}$/;
+
+// Follow-ups shorter than this, or with one of these markers, borrow terms
+const FOLLOW_UP_MAX_WORDS = 8;
+const FOLLOW_UP_RE = /^(and|but|also|so|what about|how about|what if)\b|\b(it|that|this|those|these|they|them|there|same)\b/i;
+const CARRIED_TERMS = 6;
+const STOPWORDS = new Set(
+  "the and for are but not you your can could would should what when where which who why how does did have has about with from that this there they them then than into just also will was were been being any some more most very its our out".split(" ")
+);
+
+type Turn = { user: string; assistant: string };
+
+type Conversation = {
+  summary: string[];
+  recent: Turn[];
+  updated: number;
+};
+
+const globalForConversations = globalThis as unknown as { __des166Conversations?: Map<string, Conversation> };
+const conversations = (globalForConversations.__des166Conversations ??= new Map<string, Conversation>());
+
+const clip = (text: string, max: number) =>
+  text.length > max ? `${text.slice(0, max - 1).trimEnd()}…` : text;
+
+const firstSentence = (text: string) => text.split(/(?<=[.!?])\s/)[0];
+
+/** Existing conversation for an id, or null for a missing, malformed or expired id */
+export function getConversation(id: unknown): Conversation | null {
+  if (typeof id !== "string" || !CONVERSATION_ID_RE.test(id)) return null;
+  const conversation = conversations.get(id);
+  if (!conversation) return null;
+  if (Date.now() - conversation.updated > CONVERSATION_TTL_MS) {
+    conversations.delete(id);
+    return null;
+  }
+  return conversation;
+}
+
+/** Append an exchange, aging the oldest recent turn into the summary */
+export function recordTurn(id: unknown, user: string, assistant: string) {
+  if (typeof id !== "string" || !CONVERSATION_ID_RE.test(id)) return;
+
+  let conversation = getConversation(id);
+  if (conversation) {
+    // Re-insert so Map order stays least-recently-used first
+    conversations.delete(id);
+  } else {
+    conversation = { summary: [], recent: [], updated: 0 };
+    if (conversations.size >= MAX_CONVERSATIONS) {
+      const oldest = conversations.keys().next().value;
+      if (oldest !== undefined) conversations.delete(oldest);
+    }
+  }
+
+  conversation.recent.push({ user: clip(user, TURN_CHARS), assistant: clip(assistant, TURN_CHARS) });
+  while (conversation.recent.length > RECENT_TURNS) {
+    const aged = conversation.recent.shift()!;
+    conversation.summary.push(`- Asked: ${clip(aged.user, 150)} / Answer: ${clip(firstSentence(aged.assistant), 200)}`);
+  }
+  // Rolling: the oldest summary lines fall off once over budget
+  while (conversation.summary.join("\n").length > SUMMARY_CHARS && conversation.summary.length > 1) {
+    conversation.summary.shift();
+  }
+  conversation.updated = Date.now();
+  conversations.set(id, conversation);
+}
+
+/** Prompt block with the summary and recent turns, at most MAX_HISTORY_CHARS long */
+export function historyBlock(conversation: Conversation | null): string {
+  if (!conversation || (conversation.recent.length === 0 && conversation.summary.length === 0)) {
+    return "";
+  }
+  const parts: string[] = [];
+  if (conversation.summary.length > 0) {
+    parts.push(`Earlier in this conversation:\n${clip(conversation.summary.join("\n"), SUMMARY_CHARS)}`);
+  }
+  if (conversation.recent.length > 0) {
+    parts.push(
+      "Most recent messages:\n" +
+        conversation.recent.map((turn) => `Student: ${turn.user}\nAssistant: ${turn.assistant}`).join("\n")
+    );
+  }
+  return parts.join("\n\n");
+}
+
+const contentWords = (text: string) =>
+  (text.toLowerCase().match(/[a-z0-9]+/g) || []).filter((word) => word.length > 2 && !STOPWORDS.has(word));
+
+/**
+ * Retrieval query for a follow-up: the message plus topic words from the
+ * previous question that it doesn't already contain.
+ * "what about for IxD?" after a portfolio question retrieves portfolio QAs.
+ */
+export function rewriteQuery(message: string, conversation: Conversation | null): string {
+  const previous = conversation?.recent[conversation.recent.length - 1];
+  if (!previous) return message;
+
+  const words = message.trim().split(/\s+/);
+  if (words.length > FOLLOW_UP_MAX_WORDS && !FOLLOW_UP_RE.test(message)) return message;
+
+  const present = new Set(contentWords(message));
+  const carried = Array.from(new Set(contentWords(previous.user)))
+    .filter((word) => !present.has(word))
+    .slice(0, CARRIED_TERMS);
+  return carried.length > 0 ? `${message} ${carried.join(" ")}` : message;
+}
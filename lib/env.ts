@@ -0,0 +1,9 @@
+/**
+ * Numeric settings from the environment
+ */
+
+/** process.env[name] as a positive number, or fallback when unset or invalid */
+export const envNumber = (name: string, fallback: number) => {
+  const value = Number(process.env[name]);
+  return Number.isFinite(value) && value > 0 ? value : fallback;
+};
@@ -0,0 +1,159 @@
+import { qaData, QAItem } from "@/data/qa-data";
+import calibration from "@/data/faq-fastpath.json";
+import { synonymGroups } from "@/lib/synonyms";
+
+/**
+ * High-confidence FAQ matching for the chat fast path
+ *
+ * A message is scored against every FAQ question with the Dice coefficient
+ * of their character bigram multisets. When the best score clears
+ * FAQ_MIN_SCORE and beats the runner-up by FAQ_MARGIN, the stored answer is
+ * returned without calling the model, provided the two also agree on their
+ * discriminators: synonym groups (acronyms and the majors they name),
+ * negations, numbers and seasons. One such word barely moves the bigram
+ * score but changes the question ("IxD" for "VCD", an inserted "not").
+ * Both thresholds come from data/faq-fastpath.json, written by
+ * scripts/calibrate-faq-fastpath.py, whose qa_tools/fastpath.py must stay
+ * in step with the scoring here.
+ */
+
+export const FAQ_MIN_SCORE: number = calibration.minScore;
+export const FAQ_MARGIN: number = calibration.margin;
+
+export type FAQMatch = {
+  qa: QAItem | null;
+  score: number;
+  runnerUp: number;
+  direct: boolean;
+};
+
+type FAQIndex = {
+  items: QAItem[];
+  sizes: Int32Array;
+  // Per bigram: the entries containing it and how often
+  postings: Map<number, { entries: Int32Array; counts: Int32Array }>;
+  exact: Map<string, QAItem>;
+  signatures: string[];
+};
+
+// Same as normalize_text in scripts/qa_tools/records.py (\w is Unicode there)
+const NON_WORD = new RegExp("[^\\p{L}\\p{N}_\\s]", "gu");
+
+export function normalizeQuestion(text: string): string {
+  return text.toLowerCase().trim().replace(/\s+/g, " ").replace(NON_WORD, "");
+}
+
+// Same lists as scripts/qa_tools/fastpath.py
+const NEGATIONS = new Set(
+  "not no never cannot cant dont doesnt didnt isnt arent wasnt werent wont wouldnt shouldnt couldnt havent hasnt without".split(
+    " "
+  )
+);
+const SEASONS = new Set(["spring", "summer", "autumn", "fall", "winter"]);
+
+/**
+ * What a fuzzy match must agree on, as discriminators() builds it in
+ * Python: synonym groups of the raw text ("ID" is case-sensitive), then
+ * the negation count, numbers and season words of the normalized text
+ */
+function discriminators(text: string): string {
+  const key = normalizeQuestion(text);
+  const words = key.split(" ");
+  return [
+    synonymGroups(text).join(","),
+    String(words.filter((word) => NEGATIONS.has(word)).length),
+    (key.match(/[0-9]+/g) || []).sort().join(","),
+    Array.from(new Set(words.filter((word) => SEASONS.has(word)))).sort().join(","),
+  ].join("|");
+}
+
+/** Bigram counts keyed by the two char codes packed into one number */
+function bigrams(key: string): Map<number, number> {
+  const counts = new Map<number, number>();
+  for (let i = 0; i < key.length - 1; i++) {
+    const gram = key.charCodeAt(i) * 65536 + key.charCodeAt(i + 1);
+    counts.set(gram, (counts.get(gram) || 0) + 1);
+  }
+  return counts;
+}
+
+function buildFAQIndex(qas: QAItem[]): FAQIndex {
+  const items: QAItem[] = [];
+  const sizes: number[] = [];
+  const signatures: string[] = [];
+  const exact = new Map<string, QAItem>();
+  const lists = new Map<number, { entries: number[]; counts: number[] }>();
+
+  for (const qa of qas) {
+    const key = normalizeQuestion(qa.question);
+    if (!key || exact.has(key)) continue;
+    exact.set(key, qa);
+    bigrams(key).forEach((count, gram) => {
+      let list = lists.get(gram);
+      if (!list) {
+        list = { entries: [], counts: [] };
+        lists.set(gram, list);
+      }
+      list.entries.push(items.length);
+      list.counts.push(count);
+    });
+    items.push(qa);
+    sizes.push(Math.max(0, key.length - 1));
+    signatures.push(discriminators(qa.question));
+  }
+
+  const postings: FAQIndex["postings"] = new Map();
+  lists.forEach((list, gram) => {
+    postings.set(gram, { entries: Int32Array.from(list.entries), counts: Int32Array.from(list.counts) });
+  });
+  return { items, sizes: Int32Array.from(sizes), postings, exact, signatures };
+}
+
+const FAQ_INDEX = buildFAQIndex(qaData);
+
+/**
+ * Best FAQ question for a message, with the runner-up score and whether
+ * the match is confident enough to answer without the model
+ */
+export function matchFAQ(message: string): FAQMatch {
+  const key = normalizeQuestion(message);
+  if (!key) return { qa: null, score: 0, runnerUp: 0, direct: false };
+
+  const exact = FAQ_INDEX.exact.get(key);
+  if (exact) return { qa: exact, score: 1, runnerUp: 0, direct: true };
+
+  // Shared bigram count with every entry, accumulated from the postings
+  const index = FAQ_INDEX;
+  const shared = new Int32Array(index.items.length);
+  const size = Math.max(0, key.length - 1);
+  bigrams(key).forEach((count, gram) => {
+    const posting = index.postings.get(gram);
+    if (!posting) return;
+    for (let i = 0; i < posting.entries.length; i++) {
+      shared[posting.entries[i]] += Math.min(count, posting.counts[i]);
+    }
+  });
+
+  // Dice coefficient per entry, keeping the best two (first entry wins ties)
+  let best = -1;
+  let bestScore = 0;
+  let second = 0;
+  for (let i = 0; i < shared.length; i++) {
+    if (shared[i] === 0) continue;
+    const score = (2 * shared[i]) / (size + index.sizes[i]);
+    if (score > bestScore) {
+      second = bestScore;
+      best = i;
+      bestScore = score;
+    } else if (score > second) {
+      second = score;
+    }
+  }
+
+  if (best === -1) return { qa: null, score: 0, runnerUp: 0, direct: false };
+  const direct =
+    bestScore >= FAQ_MIN_SCORE &&
+    bestScore - second >= FAQ_MARGIN &&
+    discriminators(message) === index.signatures[best];
+  return { qa: index.items[best], score: bestScore, runnerUp: second, direct };
+}
@@ -0,0 +1,48 @@
+import { NextResponse } from "next/server";
+import { qaData, categories, QAItem } from "@/data/qa-data";
+import { FAQ_VERSION } from "@/lib/faq-version";
+import { getRelatedQAs, toRelatedQuestion } from "@/lib/related";
+
+/**
+ * Payloads for the static FAQ endpoints under /api/faq/<version>/
+ *
+ * Every payload is a pure function of qa-data.ts and this code. The route
+ * handlers are prerendered at build time for the current FAQ_VERSION only,
+ * so browsing the FAQ is served from static JSON without running any code.
+ * A new corpus or a change here gets new URLs, which is why the responses
+ * can be immutable.
+ */
+
+export const IMMUTABLE_CACHE = "public, max-age=31536000, immutable";
+export const FEATURED_COUNT = 3;
+
+const CATEGORY_COUNTS = qaData.reduce((counts, qa) => {
+  counts.set(qa.category, (counts.get(qa.category) || 0) + 1);
+  return counts;
+}, new Map<string, number>());
+
+/** Categories with their question counts */
+export const categoryListing = () =>
+  categories.map((cat) => ({ ...cat, count: CATEGORY_COUNTS.get(cat.id) || 0 }));
+
+export const withRelatedQuestions = (qas: QAItem[]) =>
+  qas.map((qa) => ({ ...qa, relatedQuestions: getRelatedQAs(qa).map(toRelatedQuestion) }));
+
+/** The first question of each category, in corpus order */
+export function firstPerCategory(): QAItem[] {
+  const seen = new Set<string>();
+  return qaData.filter((qa) => !seen.has(qa.category) && seen.add(qa.category));
+}
+
+export const categoryQAs = (category: string) => qaData.filter((qa) => qa.category === category);
+
+/** generateStaticParams for a route under /api/faq/[version]/ */
+export const versionParams = () => [{ version: FAQ_VERSION }];
+
+/** JSON response tagged with the FAQ version and cached forever */
+export function staticJSON(body: Record<string, unknown>) {
+  return NextResponse.json(
+    { version: FAQ_VERSION, ...body },
+    { headers: { "Cache-Control": IMMUTABLE_CACHE } }
+  );
+}
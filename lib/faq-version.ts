@@ -0,0 +1,18 @@
+/**
+ * Version of the FAQ corpus and payloads the app was built with
+ *
+ * next.config.js hashes data/qa-data.ts at build time and inlines the hash
+ * as CORPUS_VERSION. FAQ_VERSION also covers the code that builds the
+ * static FAQ payloads (lib/faq-static.ts, lib/related.ts and the routes).
+ * Those endpoints live under /api/faq/<FAQ_VERSION>/, so their URLs change
+ * whenever a response could, whether the import pipeline publishes a new
+ * corpus or the payload code changes, and every response can be cached as
+ * immutable. This module holds no data, so client components can import it.
+ */
+
+export const CORPUS_VERSION = process.env.CORPUS_VERSION || "dev";
+export const FAQ_VERSION = process.env.FAQ_VERSION || "dev";
+
+/** URL of a static FAQ endpoint for the current version */
+export const faqUrl = (...path: string[]) =>
+  `/api/faq/${FAQ_VERSION}/${path.map(encodeURIComponent).join("/")}`;
@@ -0,0 +1,151 @@
+import http from "http";
+import https from "https";
+import { envNumber } from "@/lib/env";
+import { counter } from "@/lib/metrics";
+
+/**
+ * Gemini generateContent over process-wide kept-alive connections
+ *
+ * Calls go straight to the REST API on one HTTP agent per process, which
+ * keeps idle connections open for GEMINI_KEEP_ALIVE_MS. The SDK can't do
+ * this: it calls the global fetch, whose pool closes a connection after
+ * about 4 s idle and takes no agent per call, so a chat request after a
+ * short pause paid DNS, TCP and TLS setup again. The agent is used only
+ * here; other server-side requests and Next.js's own fetches keep the
+ * defaults. It lives on globalThis, so instrumentation.ts (a separate
+ * bundle) and the chat route share its connections.
+ *
+ * No requests are made to hold connections open. GEMINI_WARM_UP=on sends
+ * a single models.get (metadata only, no tokens) at server start, so the
+ * first chat request finds a connection already open.
+ */
+
+/** Models to try in order; later ones are fallbacks when one is overloaded */
+export const MODEL_CHAIN = ["gemini-2.5-flash", "gemini-1.5-flash", "gemini-1.5-pro"];
+
+// Upper bound on one generateContent call, so overload can't stretch the tail
+const MODEL_TIMEOUT_MS = envNumber("CHAT_MODEL_TIMEOUT_MS", 15000);
+// Another Gemini-compatible endpoint, e.g. scripts/fake-gemini-server.py for load tests
+const GEMINI_BASE_URL = process.env.GEMINI_BASE_URL || undefined;
+// Where requests go; the public endpoint when GEMINI_BASE_URL is unset
+const API_ROOT = `${GEMINI_BASE_URL || "https://generativelanguage.googleapis.com"}/v1beta`;
+// How long an idle upstream connection stays open for the next request
+const KEEP_ALIVE_MS = envNumber("GEMINI_KEEP_ALIVE_MS", 5 * 60 * 1000);
+// Open the first connection at server start with one metadata request
+const WARM_UP = process.env.GEMINI_WARM_UP === "on";
+const WARM_UP_TIMEOUT_MS = 5000;
+
+const warmUpRequests = counter(
+  "gemini_warm_up_requests_total",
+  "Metadata requests sent at server start to open the Gemini connection, by outcome"
+);
+
+const GENERATION_CONFIG = { temperature: 0.7, maxOutputTokens: 500 };
+
+/** The part of the SDK's GenerateContentResult the chat route reads */
+export type GenerateContentResult = { response: { text(): string } };
+
+const globalForGemini = globalThis as unknown as { __des166GeminiAgent?: http.Agent };
+
+function agent(): http.Agent {
+  const Agent = API_ROOT.startsWith("https:") ? https.Agent : http.Agent;
+  // An idle socket is closed once it has been quiet for the timeout
+  return (globalForGemini.__des166GeminiAgent ??= new Agent({ keepAlive: true, timeout: KEEP_ALIVE_MS }));
+}
+
+export const geminiConfigured = () =>
+  Boolean(process.env.GEMINI_API_KEY) && process.env.GEMINI_API_KEY !== "your-gemini-api-key-here";
+
+/**
+ * One request on the shared agent; resolves with the status and body
+ * whatever the status, rejects on network errors and timeouts
+ */
+function request(
+  method: string,
+  path: string,
+  body: unknown,
+  timeoutMs: number
+): Promise<{ status: number; statusText: string; text: string }> {
+  const url = `${API_ROOT}${path}`;
+  const client = url.startsWith("https:") ? https : http;
+  const payload = body === undefined ? undefined : JSON.stringify(body);
+  return new Promise((resolve, reject) => {
+    const req = client.request(
+      url,
+      {
+        method,
+        agent: agent(),
+        headers: {
+          "x-goog-api-key": process.env.GEMINI_API_KEY || "",
+          ...(payload === undefined
+            ? {}
+            : { "content-type": "application/json", "content-length": Buffer.byteLength(payload) }),
+        },
+        signal: AbortSignal.timeout(timeoutMs),
+      },
+      (res) => {
+        const chunks: Buffer[] = [];
+        res.on("data", (chunk: Buffer) => chunks.push(chunk));
+        // Reading to the end hands the connection back to the agent
+        res.on("end", () =>
+          resolve({
+            status: res.statusCode || 0,
+            statusText: res.statusMessage || "",
+            text: Buffer.concat(chunks).toString("utf8"),
+          })
+        );
+        res.on("error", reject);
+      }
+    );
+    req.on("error", reject);
+    req.end(payload);
+  });
+}
+
+/**
+ * generateContent for one model, as the SDK would call it
+ * Failures reject with the SDK's message format (status code and upstream
+ * message), which is what the chat route classifies errors by.
+ */
+export async function generateContent(modelName: string, prompt: string): Promise<GenerateContentResult> {
+  const path = `/models/${modelName}:generateContent`;
+  const { status, statusText, text } = await request(
+    "POST",
+    path,
+    { contents: [{ role: "user", parts: [{ text: prompt }] }], generationConfig: GENERATION_CONFIG },
+    MODEL_TIMEOUT_MS
+  );
+  let json: any = null;
+  try {
+    json = JSON.parse(text);
+  } catch {
+    // Reported below with the status
+  }
+  if (status < 200 || status >= 300) {
+    const error: Error & { status?: number } = new Error(
+      `[GoogleGenerativeAI Error]: Error fetching from ${API_ROOT}${path}: [${status} ${statusText}] ${
+        json?.error?.message || text.slice(0, 200)
+      }`
+    );
+    error.status = status;
+    throw error;
+  }
+  const parts: { text?: string }[] = json?.candidates?.[0]?.content?.parts || [];
+  return { response: { text: () => parts.map((part) => part.text || "").join("") } };
+}
+
+/**
+ * Set up the upstream agent; called once at server start from
+ * instrumentation.ts. With GEMINI_WARM_UP=on, also opens the first
+ * connection with one models.get; resolves either way.
+ */
+export async function warmUpGemini() {
+  agent();
+  if (!WARM_UP || !geminiConfigured()) return;
+  try {
+    const { status } = await request("GET", `/models/${MODEL_CHAIN[0]}`, undefined, WARM_UP_TIMEOUT_MS);
+    warmUpRequests.inc({ outcome: status >= 200 && status < 300 ? "ok" : `http_${status}` });
+  } catch {
+    warmUpRequests.inc({ outcome: "error" });
+  }
+}
@@ -0,0 +1,219 @@
+/**
+ * In-process metrics for the API routes
+ *
+ * Counters and histograms live in a per-process registry and are rendered
+ * in Prometheus text exposition format by /api/metrics. The registry is
+ * kept on globalThis so dev-mode hot reloads don't reset it.
+ */
+
+import { monitorEventLoopDelay } from "perf_hooks";
+
+type Labels = Record<string, string>;
+
+export const LATENCY_BUCKETS = [
+  0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+];
+
+export const PROMPT_CHARS_BUCKETS = [500, 1000, 2000, 4000, 8000, 16000, 32000];
+
+const labelKey = (labels: Labels) =>
+  Object.keys(labels)
+    .sort()
+    .map((k) => `${k}="${String(labels[k]).replace(/\\/g, "\\\\").replace(/"/g, '\\"').replace(/\n/g, "\\n")}"`)
+    .join(",");
+
+const withLabels = (name: string, key: string, extra?: string) => {
+  const parts = [key, extra].filter(Boolean).join(",");
+  return parts ? `${name}{${parts}}` : name;
+};
+
+class Counter {
+  private values = new Map<string, number>();
+
+  constructor(readonly name: string, readonly help: string, readonly type = "counter") {}
+
+  inc(labels: Labels = {}, value: number = 1) {
+    const key = labelKey(labels);
+    this.values.set(key, (this.values.get(key) || 0) + value);
+  }
+
+  set(labels: Labels, value: number) {
+    this.values.set(labelKey(labels), value);
+  }
+
+  render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} ${this.type}`];
+    this.values.forEach((value, key) => lines.push(`${withLabels(this.name, key)} ${value}`));
+    return lines;
+  }
+}
+
+type HistogramSeries = { counts: number[]; sum: number; count: number };
+
+class Histogram {
+  private series = new Map<string, HistogramSeries>();
+
+  constructor(readonly name: string, readonly help: string, readonly buckets: number[]) {}
+
+  observe(value: number, labels: Labels = {}) {
+    const key = labelKey(labels);
+    let series = this.series.get(key);
+    if (!series) {
+      series = { counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+      this.series.set(key, series);
+    }
+    for (let i = 0; i < this.buckets.length; i++) {
+      if (value <= this.buckets[i]) series.counts[i]++;
+    }
+    series.sum += value;
+    series.count++;
+  }
+
+  render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+    this.series.forEach((series, key) => {
+      this.buckets.forEach((bound, i) => {
+        lines.push(`${withLabels(`${this.name}_bucket`, key, `le="${bound}"`)} ${series.counts[i]}`);
+      });
+      lines.push(`${withLabels(`${this.name}_bucket`, key, 'le="+Inf"')} ${series.count}`);
+      lines.push(`${withLabels(`${this.name}_sum`, key)} ${series.sum}`);
+      lines.push(`${withLabels(`${this.name}_count`, key)} ${series.count}`);
+    });
+    return lines;
+  }
+}
+
+type Metric = Counter | Histogram;
+
+const globalForMetrics = globalThis as unknown as { __des166Metrics?: Map<string, Metric> };
+const registry = (globalForMetrics.__des166Metrics ??= new Map<string, Metric>());
+
+export function counter(name: string, help: string): Counter {
+  let metric = registry.get(name);
+  if (!metric) {
+    metric = new Counter(name, help);
+    registry.set(name, metric);
+  }
+  return metric as Counter;
+}
+
+export function gauge(name: string, help: string): Counter {
+  let metric = registry.get(name);
+  if (!metric) {
+    metric = new Counter(name, help, "gauge");
+    registry.set(name, metric);
+  }
+  return metric as Counter;
+}
+
+export function histogram(name: string, help: string, buckets: number[] = LATENCY_BUCKETS): Histogram {
+  let metric = registry.get(name);
+  if (!metric) {
+    metric = new Histogram(name, help, buckets);
+    registry.set(name, metric);
+  }
+  return metric as Histogram;
+}
+
+/**
+ * Render every registered metric in Prometheus text format
+ */
+export function renderMetrics(): string {
+  const lines: string[] = [];
+  registry.forEach((metric) => lines.push(...metric.render()));
+  return lines.join("\n") + "\n";
+}
+
+type Span = { name: string; ms: number; labels?: Labels };
+
+/**
+ * Per-request timing spans
+ *
+ * Each span is observed into `<prefix>_stage_duration_seconds{stage=...}`
+ * and kept on the trace so the whole request can be logged as one
+ * structured line when it finishes.
+ */
+export class RequestTrace {
+  private readonly started = performance.now();
+  private readonly spans: Span[] = [];
+  private readonly stageHistogram: Histogram;
+  private readonly requestHistogram: Histogram;
+  readonly attrs: Record<string, string | number | boolean> = {};
+
+  constructor(private readonly prefix: string) {
+    this.stageHistogram = histogram(
+      `${prefix}_stage_duration_seconds`,
+      `Time spent in each ${prefix} request stage`
+    );
+    this.requestHistogram = histogram(
+      `${prefix}_request_duration_seconds`,
+      `End-to-end ${prefix} request latency`
+    );
+  }
+
+  /** Start a span; call the returned function to end it */
+  start(name: string, labels: Labels = {}): () => number {
+    const begin = performance.now();
+    return () => {
+      const ms = performance.now() - begin;
+      this.spans.push({ name, ms, labels: Object.keys(labels).length ? labels : undefined });
+      this.stageHistogram.observe(ms / 1000, { stage: name, ...labels });
+      return ms;
+    };
+  }
+
+  /** Time a synchronous block as a span */
+  time<T>(name: string, fn: () => T): T {
+    const end = this.start(name);
+    try {
+      return fn();
+    } finally {
+      end();
+    }
+  }
+
+  /** Record the request outcome and emit one structured log line; returns the rounded timings */
+  finish(status: number): { totalMs: number; spans: Span[] } {
+    const totalMs = performance.now() - this.started;
+    this.requestHistogram.observe(totalMs / 1000, { status: String(status) });
+    counter(`${this.prefix}_requests_total`, `Total ${this.prefix} requests by HTTP status`).inc({
+      status: String(status),
+    });
+    const timings = {
+      totalMs: Math.round(totalMs * 10) / 10,
+      spans: this.spans.map((s) => ({ ...s, ms: Math.round(s.ms * 10) / 10 })),
+    };
+    console.info(
+      JSON.stringify({
+        event: `${this.prefix}_request`,
+        status,
+        ...timings,
+        ...this.attrs,
+      })
+    );
+    return timings;
+  }
+}
+
+// Window over which the event-loop lag quantiles are measured
+const LAG_WINDOW_MS = 5000;
+
+const globalForLag = globalThis as unknown as { __des166EventLoopLag?: boolean };
+
+/**
+ * Event-loop delay of this process, as quantiles over the last window
+ * Anything that blocks the request thread (say, inline retrieval on a
+ * large corpus) shows up here before it shows up in request latency.
+ */
+if (!globalForLag.__des166EventLoopLag) {
+  globalForLag.__des166EventLoopLag = true;
+  const delay = monitorEventLoopDelay({ resolution: 10 });
+  delay.enable();
+  const lag = gauge("process_event_loop_lag_seconds", "Event-loop delay over the last few seconds, by quantile");
+  setInterval(() => {
+    lag.set({ quantile: "0.5" }, delay.percentile(50) / 1e9);
+    lag.set({ quantile: "0.99" }, delay.percentile(99) / 1e9);
+    lag.set({ quantile: "1" }, delay.max / 1e9);
+    delay.reset();
+  }, LAG_WINDOW_MS).unref();
+}
@@ -0,0 +1,112 @@
+import table from "@/data/passages.json";
+import { qaData, QAItem } from "@/data/qa-data";
+import { queryWords } from "@/lib/category-router";
+import { envNumber } from "@/lib/env";
+import { synonymForms } from "@/lib/synonyms";
+
+/**
+ * Passage-level context for the chat prompt
+ *
+ * scripts/qa_tools/passages.py splits long answers into sentence passages,
+ * published as data/passages.json and keyed by QA id. Retrieval still ranks
+ * whole QAs; for each one the prompt then gets the question and only the
+ * passages of its answer that match the query.
+ *
+ * A passage matches a query word the way an answer does in lib/rag.ts:
+ * it contains the word, or, for short acronyms, mentions that synonym
+ * form. Each match is weighted by how rare the word is among all passages,
+ * so "portfolio" outweighs "design".
+ *
+ * An answer with no entry, or one edited since the import so that its
+ * passages no longer match it, counts as a single passage.
+ */
+
+type Passage = {
+  text: string;
+  // Lowercased text plus its synonym forms
+  match: string;
+  forms: Set<string>;
+};
+
+/** Passages of one answer kept in the prompt, at most */
+export const PASSAGES_PER_QA = envNumber("CHAT_PASSAGES_PER_QA", 2);
+
+const SPLITS: Record<string, string[]> = table.passages;
+
+// Keyed by object, so a QA replaced by a live edit is split again
+const passageCache = new WeakMap<QAItem, Passage[]>();
+
+function toPassage(text: string): Passage {
+  const forms = synonymForms(text);
+  return { text, match: `${text.toLowerCase()} ${forms.join(" ")}`, forms: new Set(forms) };
+}
+
+/** The passages of a QA's answer, in order */
+export function passagesOf(qa: QAItem): Passage[] {
+  const cached = passageCache.get(qa);
+  if (cached) return cached;
+  const split = SPLITS[String(qa.id)];
+  // Each passage must still appear in the answer, in order
+  let from = 0;
+  const current =
+    split !== undefined &&
+    split.every((text) => {
+      const at = qa.answer.indexOf(text, from);
+      from = at + text.length;
+      return at >= 0;
+    });
+  const passages = (current ? split : [qa.answer]).map(toPassage);
+  passageCache.set(qa, passages);
+  return passages;
+}
+
+// Inverse passage frequency of each word, over the imported corpus
+let wordWeights: { docFreq: Map<string, number>; total: number } | null = null;
+
+function weight(word: string): number {
+  if (!wordWeights) {
+    const docFreq = new Map<string, number>();
+    let total = 0;
+    for (const qa of qaData) {
+      for (const passage of passagesOf(qa)) {
+        total++;
+        for (const w of new Set(queryWords(passage.match))) docFreq.set(w, (docFreq.get(w) || 0) + 1);
+      }
+    }
+    wordWeights = { docFreq, total };
+  }
+  return Math.log(1 + wordWeights.total / (1 + (wordWeights.docFreq.get(word) || 0)));
+}
+
+const matches = (passage: Passage, word: string) =>
+  word.length <= 2 ? passage.forms.has(word) : passage.match.includes(word);
+
+/**
+ * The answer cut down to its best matching passages, in their original
+ * order, with "..." where passages were left out. Without a match (the
+ * QA was found by its question or keywords) the opening passage stands
+ * in, since that is where answers get to the point.
+ */
+export function answerSnippet(qa: QAItem, words: string[], limit: number = PASSAGES_PER_QA): string {
+  const passages = passagesOf(qa);
+  if (passages.length <= limit) return qa.answer;
+
+  const kept = passages
+    .map((passage, i) => ({
+      i,
+      score: words.reduce((sum, word) => sum + (matches(passage, word) ? weight(word) : 0), 0),
+    }))
+    .filter((entry) => entry.score > 0)
+    .sort((a, b) => b.score - a.score || a.i - b.i)
+    .slice(0, limit)
+    .map((entry) => entry.i)
+    .sort((a, b) => a - b);
+  if (kept.length === 0) kept.push(0);
+
+  let snippet = kept[0] > 0 ? "..." : "";
+  kept.forEach((i, n) => {
+    const gap = n > 0 && i > kept[n - 1] + 1;
+    snippet += `${snippet ? (gap ? " ... " : " ") : ""}${passages[i].text}`;
+  });
+  return kept[kept.length - 1] < passages.length - 1 ? `${snippet} ...` : snippet;
+}
@@ -0,0 +1,238 @@
+import { qaData, QAItem } from "@/data/qa-data";
+
+/**
+ * Full-text search over FAQ questions and answers, for /api/qa?q=
+ *
+ * Questions and answers are read as lowercase ASCII words. Every word
+ * contributes its character trigrams, plus one trigram for its first two
+ * letters after a word boundary ("^ux"). The trigram -> documents postings
+ * are built once when this module is imported, into flat typed arrays
+ * indexed by trigram code, so a lookup is a handful of array slices.
+ *
+ * A query word of three or more letters matches anywhere, even inside a
+ * longer word ("folio" finds "portfolio"). A two-letter word matches the
+ * start of a word: "ux" finds "UX" and "UXD" but not "linux". Every query
+ * word must match, in the question or the answer. The postings of all the
+ * query's trigrams are intersected, shortest first. A word of two or
+ * three letters is a single trigram, so its postings are exact; for longer
+ * words only the documents left are checked against the strings, since
+ * having all of a word's trigrams doesn't guarantee the word. A second
+ * table over the questions alone tells question matches, which rank
+ * first, from answer matches; each group is in corpus order.
+ */
+
+export const DEFAULT_PAGE_SIZE = 20;
+export const MAX_PAGE_SIZE = 100;
+
+/** [start, end) offsets into the original string */
+export type Highlight = [number, number];
+
+export type SearchHit = {
+  qa: QAItem;
+  highlights: { question: Highlight[]; answer: Highlight[] };
+};
+
+// a-z are 1-26, 0-9 are 27-36; 0 is the word boundary
+const SYMBOLS = 37;
+const TRIGRAMS = SYMBOLS * SYMBOLS * SYMBOLS;
+
+// Trigram t's documents are postings[offsets[t]] .. postings[offsets[t + 1] - 1], ascending
+type Postings = { offsets: Int32Array; postings: Int32Array };
+
+type SearchIndex = {
+  items: QAItem[];
+  // Lowercased copies, the same length as the originals so offsets carry over
+  questions: string[];
+  answers: string[];
+  // Trigrams of the questions alone, and of questions and answers together
+  questionPostings: Postings;
+  allPostings: Postings;
+};
+
+/** ASCII lowercase only, which never changes a string's length */
+const fold = (text: string) => text.replace(/[A-Z]+/g, (letters) => letters.toLowerCase());
+
+function symbol(code: number): number {
+  if (code >= 97 && code <= 122) return code - 96;
+  if (code >= 48 && code <= 57) return code - 21;
+  return -1;
+}
+
+/** Every trigram of every word of a folded text, repeats included */
+function forEachTrigram(text: string, visit: (trigram: number) => void) {
+  // The two symbols before the current one; -1 when the word is shorter
+  let a = -1;
+  let b = -1;
+  for (let i = 0; i < text.length; i++) {
+    const c = symbol(text.charCodeAt(i));
+    if (c < 0) {
+      a = b = -1;
+      continue;
+    }
+    if (b < 0) {
+      // Start of a word: the boundary counts as the symbol before it
+      a = 0;
+      b = c;
+      continue;
+    }
+    visit((a * SYMBOLS + b) * SYMBOLS + c);
+    a = b;
+    b = c;
+  }
+}
+
+/** Postings over documents made of several folded texts each */
+function buildPostings(docs: string[][]): Postings {
+  // Last document each trigram was seen in, so a document counts once per trigram
+  const seen = new Int32Array(TRIGRAMS);
+  const eachDocTrigram = (doc: number, visit: (trigram: number) => void) => {
+    const once = (trigram: number) => {
+      if (seen[trigram] === doc) return;
+      seen[trigram] = doc;
+      visit(trigram);
+    };
+    for (const text of docs[doc]) forEachTrigram(text, once);
+  };
+
+  const offsets = new Int32Array(TRIGRAMS + 1);
+  seen.fill(-1);
+  for (let doc = 0; doc < docs.length; doc++) eachDocTrigram(doc, (trigram) => offsets[trigram + 1]++);
+  for (let t = 0; t < TRIGRAMS; t++) offsets[t + 1] += offsets[t];
+
+  const postings = new Int32Array(offsets[TRIGRAMS]);
+  const next = offsets.slice(0, TRIGRAMS);
+  seen.fill(-1);
+  // Documents are visited in order, so each list comes out sorted
+  for (let doc = 0; doc < docs.length; doc++) eachDocTrigram(doc, (trigram) => (postings[next[trigram]++] = doc));
+  return { offsets, postings };
+}
+
+function buildSearchIndex(items: QAItem[]): SearchIndex {
+  const questions = items.map((qa) => fold(qa.question));
+  const answers = items.map((qa) => fold(qa.answer));
+  return {
+    items,
+    questions,
+    answers,
+    questionPostings: buildPostings(questions.map((question) => [question])),
+    allPostings: buildPostings(questions.map((question, doc) => [question, answers[doc]])),
+  };
+}
+
+const SEARCH_INDEX = buildSearchIndex(qaData);
+
+/** Trigrams a document must have to contain a query word */
+function wordTrigrams(word: string): number[] {
+  const trigrams: number[] = [];
+  forEachTrigram(word, (trigram) => trigrams.push(trigram));
+  // A two-letter word must start a word; longer ones may sit anywhere in one, so skip their "^ab"
+  return word.length === 2 ? trigrams : trigrams.slice(1);
+}
+
+/** Documents in every list, ascending */
+function intersect(lists: Int32Array[]): Int32Array {
+  lists.sort((a, b) => a.length - b.length);
+  let result = lists[0];
+  for (let l = 1; l < lists.length && result.length > 0; l++) {
+    const list = lists[l];
+    const kept = new Int32Array(result.length);
+    let count = 0;
+    let lo = 0;
+    for (let i = 0; i < result.length && lo < list.length; i++) {
+      const doc = result[i];
+      // Gallop ahead from the last position, then binary search the last step
+      let step = 1;
+      let hi = lo;
+      while (hi < list.length && list[hi] < doc) {
+        lo = hi + 1;
+        hi += step;
+        step *= 2;
+      }
+      hi = Math.min(hi, list.length);
+      while (lo < hi) {
+        const mid = (lo + hi) >>> 1;
+        if (list[mid] < doc) lo = mid + 1;
+        else hi = mid;
+      }
+      if (list[lo] === doc) kept[count++] = doc;
+    }
+    result = kept.subarray(0, count);
+  }
+  return result;
+}
+
+const isWordChar = (code: number) => symbol(code) >= 0;
+
+/** Start of each match of a query word in a folded text */
+function matchesOf(text: string, word: string): number[] {
+  const starts: number[] = [];
+  for (let at = text.indexOf(word); at >= 0; at = text.indexOf(word, at + 1)) {
+    if (word.length > 2 || at === 0 || !isWordChar(text.charCodeAt(at - 1))) starts.push(at);
+  }
+  return starts;
+}
+
+/** Every match of every word, with overlapping ones merged */
+function highlightsIn(text: string, words: string[]): Highlight[] {
+  const ranges: Highlight[] = words
+    .flatMap((word) => matchesOf(text, word).map((at): Highlight => [at, at + word.length]))
+    .sort((a, b) => a[0] - b[0]);
+  const merged: Highlight[] = [];
+  for (const range of ranges) {
+    const last = merged[merged.length - 1];
+    if (last && range[0] <= last[1]) last[1] = Math.max(last[1], range[1]);
+    else merged.push(range);
+  }
+  return merged;
+}
+
+/** Lowercase query words the index can look up: letters and digits, two or more */
+export function searchWords(query: string): string[] {
+  return Array.from(new Set(fold(query).match(/[a-z0-9]+/g) || [])).filter((word) => word.length >= 2);
+}
+
+/**
+ * One page of the FAQ entries matching every word of query, optionally
+ * within one category, with the matches in each question and answer
+ */
+export function searchQAs(
+  query: string,
+  options: { category?: string | null; page?: number; pageSize?: number } = {}
+): { hits: SearchHit[]; total: number; page: number; pageSize: number } {
+  const pageSize = Math.min(Math.max(1, options.pageSize || DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE);
+  const page = Math.max(1, options.page || 1);
+  const words = searchWords(query);
+  if (words.length === 0) return { hits: [], total: 0, page, pageSize };
+
+  const index = SEARCH_INDEX;
+  const trigrams = Array.from(new Set(words.flatMap(wordTrigrams)));
+  const lookup = ({ offsets, postings }: Postings) =>
+    intersect(trigrams.map((trigram) => postings.subarray(offsets[trigram], offsets[trigram + 1])));
+  const candidates = lookup(index.allPostings);
+  // A subset of candidates: all the trigrams are in the question
+  const questionCandidates = lookup(index.questionPostings);
+  // Words of up to three letters are one trigram, whose postings are exact; longer ones need checking
+  const unsure = words.filter((word) => word.length > 3);
+
+  const inQuestion: number[] = [];
+  const inAnswer: number[] = [];
+  let q = 0;
+  for (let i = 0; i < candidates.length; i++) {
+    const doc = candidates[i];
+    while (q < questionCandidates.length && questionCandidates[q] < doc) q++;
+    if (options.category && index.items[doc].category !== options.category) continue;
+    const question = index.questions[doc];
+    if (questionCandidates[q] === doc && unsure.every((word) => question.includes(word))) inQuestion.push(doc);
+    else if (unsure.every((word) => question.includes(word) || index.answers[doc].includes(word))) inAnswer.push(doc);
+  }
+
+  const matched = inQuestion.concat(inAnswer);
+  const hits = matched.slice((page - 1) * pageSize, page * pageSize).map((doc) => ({
+    qa: index.items[doc],
+    highlights: {
+      question: highlightsIn(index.questions[doc], words),
+      answer: highlightsIn(index.answers[doc], words),
+    },
+  }));
+  return { hits, total: matched.length, page, pageSize };
+}
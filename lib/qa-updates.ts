@@ -0,0 +1,51 @@
+import { readFileSync, promises as fs } from "fs";
+import path from "path";
+import { QAItem } from "@/data/qa-data";
+import { CORPUS_VERSION } from "@/lib/faq-version";
+
+/**
+ * Journal of FAQ edits made since the last import
+ *
+ * /api/admin/qa applies an edit to the live search index and appends it
+ * here as one JSON line, tagged with the CORPUS_VERSION it was made
+ * against. The index replays the lines for the running corpus when it is
+ * built, so edits survive restarts. Ids are positions in one particular
+ * qa-data.ts, so lines from any other corpus are skipped: once an import
+ * publishes a new one, earlier edits no longer apply. The import moves them
+ * aside and lists them, to be carried into the Markdown source
+ * (scripts/qa_tools/updates.py).
+ */
+
+export const QA_UPDATES_PATH = process.env.QA_UPDATES_PATH || path.join(process.cwd(), "data", "qa-updates.jsonl");
+
+export type QAUpdate = { op: "upsert"; qa: QAItem } | { op: "delete"; id: number };
+
+/** Every journaled update for the running corpus, oldest first; a missing journal is empty */
+export function readUpdates(): QAUpdate[] {
+  let text: string;
+  try {
+    text = readFileSync(QA_UPDATES_PATH, "utf8");
+  } catch {
+    return [];
+  }
+  const updates: QAUpdate[] = [];
+  let stale = 0;
+  for (const line of text.split("\n")) {
+    if (!line.trim()) continue;
+    try {
+      const { ts, corpus, ...update } = JSON.parse(line);
+      if (corpus === CORPUS_VERSION) updates.push(update);
+      else stale++;
+    } catch {
+      // A torn last line from a crash mid-append
+      console.warn("Skipping malformed line in", QA_UPDATES_PATH);
+    }
+  }
+  if (stale > 0) console.warn(`Skipping ${stale} edits in ${QA_UPDATES_PATH} made against another corpus version`);
+  return updates;
+}
+
+export async function appendUpdate(update: QAUpdate) {
+  await fs.mkdir(path.dirname(QA_UPDATES_PATH), { recursive: true });
+  await fs.appendFile(QA_UPDATES_PATH, JSON.stringify({ ts: new Date().toISOString(), corpus: CORPUS_VERSION, ...update }) + "\n", "utf8");
+}
@@ -0,0 +1,131 @@
+import { promises as fs } from "fs";
+import path from "path";
+import { envNumber } from "@/lib/env";
+import { counter, histogram } from "@/lib/metrics";
+
+/**
+ * Append-only JSON Lines log of chat queries, for offline analytics
+ *
+ * logQuery() only pushes the entry onto an in-memory buffer. A timer
+ * (or a full batch) drains the buffer with one appendFile per
+ * QUERY_LOG_BATCH_SIZE entries, off the request path, and only one flush
+ * runs at a time. When the current
+ * file would grow past QUERY_LOG_MAX_BYTES it is renamed to
+ * query-log-<timestamp>.jsonl and a new one is started. If the disk falls
+ * behind, entries beyond QUERY_LOG_MAX_PENDING are dropped and counted
+ * rather than held in memory.
+ *
+ * scripts/analyze-query-logs.py reads the current and rotated files.
+ * Set QUERY_LOG_DIR to "off" to disable logging.
+ */
+
+export const QUERY_LOG_DIR = process.env.QUERY_LOG_DIR || path.join(process.cwd(), "logs");
+export const QUERY_LOG_FILE = "query-log.jsonl";
+const MAX_BYTES = envNumber("QUERY_LOG_MAX_BYTES", 10 * 1024 * 1024);
+const FLUSH_INTERVAL_MS = envNumber("QUERY_LOG_FLUSH_MS", 1000);
+const BATCH_SIZE = envNumber("QUERY_LOG_BATCH_SIZE", 200);
+const MAX_PENDING = envNumber("QUERY_LOG_MAX_PENDING", 10000);
+
+const entriesLogged = counter("query_log_entries_total", "Query log entries by outcome (written, dropped, error)");
+const flushDuration = histogram("query_log_flush_seconds", "Time to append one batch to the query log");
+
+export type QueryLogEntry = {
+  message: string;
+  // The retrieval query, when it differs from the message (follow-ups)
+  query?: string;
+  // faq | model | shed | error
+  path: string;
+  status: number;
+  retrieved: { id: number; score: number }[];
+  faq?: { id: number; score: number; runnerUp: number };
+  // Categories retrieval scored (see lib/rag.ts routedSearch)
+  routing?: { searched: string[]; widened: number; candidates: number };
+  model?: string;
+  degraded?: string;
+  totalMs: number;
+  spans: { name: string; ms: number; labels?: Record<string, string> }[];
+};
+
+type QueryLogState = {
+  pending: string[];
+  timer: ReturnType<typeof setTimeout> | null;
+  flushing: Promise<void> | null;
+  // Size of the current file; null until first read from disk
+  bytes: number | null;
+};
+
+const globalForQueryLog = globalThis as unknown as { __des166QueryLog?: QueryLogState };
+const state = (globalForQueryLog.__des166QueryLog ??= { pending: [], timer: null, flushing: null, bytes: null });
+
+const enabled = QUERY_LOG_DIR !== "off";
+
+/** Queue an entry; never blocks and never throws */
+export function logQuery(entry: QueryLogEntry) {
+  if (!enabled) return;
+  if (state.pending.length >= MAX_PENDING) {
+    entriesLogged.inc({ outcome: "dropped" });
+    return;
+  }
+  state.pending.push(JSON.stringify({ ts: new Date().toISOString(), ...entry }));
+
+  if (state.pending.length >= BATCH_SIZE) {
+    scheduleFlush(0);
+  } else if (!state.timer) {
+    scheduleFlush(FLUSH_INTERVAL_MS);
+  }
+}
+
+function scheduleFlush(delay: number) {
+  if (state.timer) clearTimeout(state.timer);
+  state.timer = setTimeout(() => {
+    state.timer = null;
+    void flushQueryLog();
+  }, delay);
+  // Don't keep the process alive just to flush logs
+  state.timer.unref?.();
+}
+
+/** Write everything queued so far; resolves once it is on disk */
+export async function flushQueryLog(): Promise<void> {
+  // Chain onto a running flush so batches are appended in order
+  while (state.flushing) await state.flushing;
+  if (state.pending.length === 0) return;
+
+  // One append per batch, so rotation is checked between batches
+  state.flushing = (async () => {
+    while (state.pending.length > 0) {
+      await appendBatch(state.pending.splice(0, BATCH_SIZE));
+    }
+  })().finally(() => {
+    state.flushing = null;
+  });
+  await state.flushing;
+}
+
+async function appendBatch(batch: string[]) {
+  const started = performance.now();
+  const data = batch.join("\n") + "\n";
+  const file = path.join(QUERY_LOG_DIR, QUERY_LOG_FILE);
+  try {
+    if (state.bytes === null) {
+      await fs.mkdir(QUERY_LOG_DIR, { recursive: true });
+      state.bytes = await fs.stat(file).then((stat) => stat.size, () => 0);
+    }
+    const size = Buffer.byteLength(data);
+    if (state.bytes > 0 && state.bytes + size > MAX_BYTES) {
+      const stamp = new Date().toISOString().replace(/[:.]/g, "-");
+      await fs.rename(file, path.join(QUERY_LOG_DIR, `query-log-${stamp}.jsonl`));
+      state.bytes = 0;
+    }
+    await fs.appendFile(file, data, "utf8");
+    state.bytes += size;
+    entriesLogged.inc({ outcome: "written" }, batch.length);
+  } catch (error) {
+    // Forget the cached size; the next batch re-reads it from disk
+    state.bytes = null;
+    entriesLogged.inc({ outcome: "error" }, batch.length);
+    console.warn("Query log write failed:", error);
+  } finally {
+    flushDuration.observe((performance.now() - started) / 1000);
+  }
+}
@@ -1,49 +1,257 @@
 import { qaData, QAItem } from "@/data/qa-data";
+import { CategoryScore, queryWords, routeQuery } from "@/lib/category-router";
+import { envNumber } from "@/lib/env";
+import { counter, histogram } from "@/lib/metrics";
+import { appendUpdate, QAUpdate, readUpdates } from "@/lib/qa-updates";
+import { buildSnapshot, RetrievalBusyError, RetrievalPool } from "@/lib/retrieval-pool";
+import { IndexedQA, mergeHits, ScoredDoc, SegmentIndex } from "@/lib/segment-index";
+
+export type ScoredQA = { qa: QAItem; score: number };
+
+/** How one search was routed, for traces, the query log and the admin API */
+export type RetrievalRouting = {
+  ranked: CategoryScore[];
+  // Categories scored, in the order they were searched
+  searched: string[];
+  // Categories searched after the routed ones because the hits were weak
+  widened: number;
+  // Documents scored
+  candidates: number;
+};
+
+// Routing is opt-in (RETRIEVAL_ROUTING=on): it loses about a quarter of the
+// full scan's top-5 on whole questions, and the top-5 is the prompt context
+const ROUTING = process.env.RETRIEVAL_ROUTING === "on";
+/**
+ * Hits are strong when the topK-th best reaches this share of the highest
+ * score the query's words could get (6 per word, 2 per short acronym)
+ */
+const STRONG_FRACTION = envNumber("RETRIEVAL_STRONG_FRACTION", 0.3);
+// Weak hits only widen to categories at least this likely
+const WIDEN_PROBABILITY = envNumber("RETRIEVAL_WIDEN_PROBABILITY", 0.0001);
+// Smaller indexes are scored inline: a worker round trip would cost more than the scan
+const POOL_MIN_DOCS = envNumber("RETRIEVAL_POOL_MIN_DOCS", 5000);
+// After live edits, workers get a new snapshot at most this often
+const SNAPSHOT_REFRESH_MS = envNumber("RETRIEVAL_SNAPSHOT_REFRESH_MS", 1000);
+
+const candidatesScored = histogram(
+  "search_candidates_scored",
+  "Documents scored per retrieval query",
+  [0, 10, 25, 50, 100, 200, 500, 1000, 5000]
+);
+const routingOutcomes = counter(
+  "search_routing_total",
+  "Retrieval queries by routing outcome (routed, widened, full, empty)"
+);
+
+function applyUpdate(index: SegmentIndex, update: QAUpdate) {
+  if (update.op === "upsert") index.upsert(update.qa);
+  else index.remove(update.id);
+}
+
+// qa-data.ts as the base segment, plus edits journaled since the last import
+const SEARCH_INDEX = (() => {
+  const index = new SegmentIndex(qaData);
+  for (const update of readUpdates()) applyUpdate(index, update);
+  index.merge();
+  return index;
+})();
+
+/**
+ * Apply one FAQ edit to the live index, then journal it
+ * Inline searches see the edit as soon as this returns its promise;
+ * pooled ones within SNAPSHOT_REFRESH_MS.
+ */
+export function updateSearchIndex(update: QAUpdate): Promise<void> {
+  applyUpdate(SEARCH_INDEX, update);
+  return appendUpdate(update);
+}
+
+export const searchIndexStats = () => SEARCH_INDEX.stats();
+
+/** The QA with this id as retrieval currently sees it, live edits included; null once deleted */
+export const liveQA = (id: number): QAItem | null => SEARCH_INDEX.get(id);
+
+type PoolState = { pool: RetrievalPool; index: SegmentIndex | null; built: number };
+
+// One pool per process; hot reloads keep the workers but rebuild the index
+const globalForRetrieval = globalThis as unknown as { __des166RetrievalPool?: PoolState };
+
+/** The worker pool, with a current enough snapshot, or null to score inline */
+function retrievalPool(): RetrievalPool | null {
+  if (SEARCH_INDEX.size() < POOL_MIN_DOCS) return null;
+  const state = (globalForRetrieval.__des166RetrievalPool ??= { pool: new RetrievalPool(), index: null, built: 0 });
+  if (state.pool.failed()) return null;
+  const generation = SEARCH_INDEX.generation();
+  const stale = state.index !== SEARCH_INDEX || state.pool.generation() !== generation;
+  if (stale && (state.index !== SEARCH_INDEX || Date.now() - state.built >= SNAPSHOT_REFRESH_MS)) {
+    state.pool.publish(buildSnapshot(SEARCH_INDEX.liveDocs(), generation));
+    state.index = SEARCH_INDEX;
+    state.built = Date.now();
+  }
+  return state.pool;
+}
 
 /**
  * Simple keyword-based search for relevant QAs
  * TODO: Upgrade to vector similarity search using embeddings
  */
 export function searchRelevantQAs(query: string, topK: number = 5): QAItem[] {
-  const queryLower = query.toLowerCase();
-  const queryWords = queryLower
-    .split(/\s+/)
-    .filter((word) => word.length > 2); // Filter out short words
+  return scoreRelevantQAs(query, topK).map((item) => item.qa);
+}
+
+/**
+ * searchRelevantQAs() with the keyword score of each hit, best first
+ */
+export function scoreRelevantQAs(query: string, topK: number = 5): ScoredQA[] {
+  return routedSearch(query, topK).hits;
+}
+
+type SearchPlan = {
+  words: string[];
+  ranked: CategoryScore[];
+  // Every category in search order, and how likely each is
+  order: string[];
+  probabilities: number[];
+  // How many of order to search before deciding whether to widen
+  routed: number;
+};
+
+/** Query words and category order, shared by the inline and pooled searches */
+function planSearch(query: string): SearchPlan {
+  // Filter out short words, except acronyms like "ID" and "TA"
+  const words = queryWords(query);
+  const route = routeQuery(query);
+  // Categories added by live edits that the router has never seen go last, always eligible
+  const known = new Set(route.ranked.map((entry) => entry.category));
+  const extra = SEARCH_INDEX.categories().filter((category) => !known.has(category));
+  const order = [...route.ranked.map((entry) => entry.category), ...extra];
+  return {
+    words,
+    ranked: route.ranked,
+    order,
+    probabilities: [...route.ranked.map((entry) => entry.probability), ...extra.map(() => 1)],
+    routed: ROUTING ? route.routed.length : order.length,
+  };
+}
+
+function recordRouting(plan: SearchPlan, searched: number, candidates: number): RetrievalRouting {
+  const outcome =
+    plan.words.length === 0 ? "empty" : searched === plan.order.length ? "full" : searched > plan.routed ? "widened" : "routed";
+  candidatesScored.observe(candidates);
+  routingOutcomes.inc({ outcome });
+  return {
+    ranked: plan.ranked,
+    searched: plan.order.slice(0, plan.words.length === 0 ? 0 : searched),
+    widened: Math.max(0, searched - plan.routed),
+    candidates,
+  };
+}
+
+/**
+ * Keyword search that scores the query's likely categories first
+ *
+ * lib/category-router.ts predicts a category distribution, and the
+ * categories holding ROUTE_MASS of it are searched first. The rest follow
+ * one at a time, most likely first, while there are fewer than topK hits,
+ * or while the topK-th is below STRONG_FRACTION of the query's best
+ * possible score and the next category is at least WIDEN_PROBABILITY
+ * likely. A confident query scores a fraction of the corpus; a vague one
+ * ends up scoring all of it, as before.
+ */
+export function routedSearch(query: string, topK: number = 5): { hits: ScoredQA[]; routing: RetrievalRouting } {
+  const plan = planSearch(query);
+  const { words } = plan;
+  const ceiling = words.reduce((sum, word) => sum + (word.length <= 2 ? 2 : 6), 0);
 
   // Score each QA based on keyword matches
-  const scoredQAs = qaData.map((qa) => {
+  let candidates = 0;
+  const score = (doc: IndexedQA) => {
     let score = 0;
+    candidates++;
 
-    const questionLower = qa.question.toLowerCase();
-    const answerLower = qa.answer.toLowerCase();
-    const keywordsLower = (qa.keywords || []).map((k) => k.toLowerCase());
-
-    queryWords.forEach((word) => {
+    words.forEach((word) => {
+      // Acronyms this short only count as whole synonym forms
+      if (word.length <= 2) {
+        if (doc.forms.has(word)) score += 2;
+        return;
+      }
       // Question match - highest weight
-      if (questionLower.includes(word)) {
+      if (doc.question.includes(word)) {
         score += 3;
       }
-      // Keyword match - medium weight
-      if (keywordsLower.some((k) => k.includes(word))) {
+      // Keyword match - medium weight (includes synonym forms)
+      if (doc.keywords.some((k) => k.includes(word))) {
         score += 2;
       }
       // Answer match - lower weight
-      if (answerLower.includes(word)) {
+      if (doc.answer.includes(word)) {
         score += 1;
       }
     });
 
-    return { qa, score };
-  });
+    return score;
+  };
+
+  let hits: ScoredDoc[] = [];
+  let searched = plan.routed;
+  // Nothing can score above zero without words
+  if (words.length > 0) {
+    hits = SEARCH_INDEX.search(score, topK, plan.order.slice(0, searched));
+    while (
+      searched < plan.order.length &&
+      (hits.length < topK ||
+        (hits[topK - 1].score < STRONG_FRACTION * ceiling && plan.probabilities[searched] >= WIDEN_PROBABILITY))
+    ) {
+      hits = mergeHits([hits, SEARCH_INDEX.search(score, topK, [plan.order[searched]])], topK);
+      searched++;
+    }
+  }
 
-  // Filter and sort by score
-  const relevantQAs = scoredQAs
-    .filter((item) => item.score > 0)
-    .sort((a, b) => b.score - a.score)
-    .slice(0, topK)
-    .map((item) => item.qa);
+  return {
+    hits: hits.map((hit) => ({ qa: hit.doc.qa, score: hit.score })),
+    routing: recordRouting(plan, searched, candidates),
+  };
+}
 
-  return relevantQAs;
+/**
+ * routedSearch() without blocking the event loop on large corpora
+ *
+ * Indexes of POOL_MIN_DOCS or more are scored by the worker pool in
+ * lib/retrieval-pool.ts, with the same routing and the same results;
+ * smaller ones inline, as are queries the pool lost to a dying or failed
+ * worker. Rejects with RetrievalBusyError when the pool's queue is full.
+ */
+export async function retrieve(
+  query: string,
+  topK: number = 5
+): Promise<{ hits: ScoredQA[]; routing: RetrievalRouting; pooled: boolean }> {
+  const pool = retrievalPool();
+  if (!pool) return { ...routedSearch(query, topK), pooled: false };
+
+  const plan = planSearch(query);
+  if (plan.words.length === 0) return { hits: [], routing: recordRouting(plan, 0, 0), pooled: false };
+  let pooled;
+  try {
+    pooled = await pool.search({
+      words: plan.words,
+      topK,
+      order: plan.order,
+      probabilities: plan.probabilities,
+      routed: plan.routed,
+      strongFraction: STRONG_FRACTION,
+      widenProbability: WIDEN_PROBABILITY,
+    });
+  } catch (error) {
+    if (error instanceof RetrievalBusyError) throw error;
+    return { ...routedSearch(query, topK), pooled: false };
+  }
+  const { snapshot, result } = pooled;
+  return {
+    hits: result.hits.map(([d, score]) => ({ qa: snapshot.docs[d].qa, score })),
+    routing: recordRouting(plan, result.searched, result.candidates),
+    pooled: true,
+  };
 }
 
 /**
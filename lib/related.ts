@@ -0,0 +1,63 @@
+import { qaData, QAItem } from "@/data/qa-data";
+
+/**
+ * Related questions from the precomputed neighbor graph
+ *
+ * scripts/import-all-questions.py stores each item's nearest neighbors
+ * (TF-IDF cosine over the whole corpus) as `related` ids, so a lookup here
+ * is a map access instead of another search.
+ *
+ * The graph is the imported one, so an entry edited through /api/admin/qa
+ * keeps its neighbors. Callers serving live content pass a `resolve` that
+ * returns the current version of an id, or null for a deleted one, which
+ * is then skipped.
+ */
+
+export const DEFAULT_RELATED = 3;
+
+export type RelatedQuestion = {
+  id: number;
+  question: string;
+  category: string;
+};
+
+export type ResolveQA = (id: number) => QAItem | null | undefined;
+
+const QA_BY_ID = new Map(qaData.map((qa) => [qa.id, qa] as const));
+
+const importedQA: ResolveQA = (id) => QA_BY_ID.get(id);
+
+export function getRelatedQAs(qa: QAItem, limit: number = DEFAULT_RELATED, resolve: ResolveQA = importedQA): QAItem[] {
+  const related: QAItem[] = [];
+  for (const id of QA_BY_ID.get(qa.id)?.related || qa.related || []) {
+    if (related.length >= limit) break;
+    const item = resolve(id);
+    if (item) related.push(item);
+  }
+  return related;
+}
+
+export const toRelatedQuestion = (qa: QAItem): RelatedQuestion => ({
+  id: qa.id,
+  question: qa.question,
+  category: qa.category,
+});
+
+/**
+ * Widen retrieved context with graph neighbors of the hits, best hit first,
+ * adding at most `extra` items that were not already retrieved
+ */
+export function expandWithRelated(qas: QAItem[], extra: number, resolve: ResolveQA = importedQA): QAItem[] {
+  const seen = new Set(qas.map((qa) => qa.id));
+  const expanded = [...qas];
+  for (const qa of qas) {
+    for (const neighbor of getRelatedQAs(qa, Infinity, resolve)) {
+      if (expanded.length >= qas.length + extra) return expanded;
+      if (!seen.has(neighbor.id)) {
+        seen.add(neighbor.id);
+        expanded.push(neighbor);
+      }
+    }
+  }
+  return expanded;
+}
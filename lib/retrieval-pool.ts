@@ -0,0 +1,404 @@
+import os from "os";
+import { Worker } from "worker_threads";
+import { envNumber } from "@/lib/env";
+import { counter, gauge, histogram } from "@/lib/metrics";
+import { IndexedQA } from "@/lib/segment-index";
+
+/**
+ * Retrieval off the request thread, for large corpora
+ *
+ * A snapshot packs every live document of the search index into
+ * SharedArrayBuffers: the lowercased fields as UTF-8 (question, keywords,
+ * answer, synonym forms, each followed by a newline), an Int32 table of
+ * where each field starts, and each document's sequence number, with
+ * documents grouped by category. Worker threads attach to the same memory,
+ * so a snapshot is built once and never copied, however many workers
+ * there are.
+ *
+ * Scoring runs each query word once over a category's bytes with
+ * Buffer.indexOf and credits the documents it lands in, rather than
+ * asking every document about every word. The score and the category
+ * routing are the same as routedSearch() in lib/rag.ts, and ties still go
+ * to the lower sequence number, so both paths return the same hits.
+ *
+ * Queries wait in a queue of at most RETRIEVAL_QUEUE_SIZE; a free worker
+ * takes up to RETRIEVAL_BATCH_SIZE of them in one message. A full queue
+ * refuses new queries with RetrievalBusyError instead of growing. A worker
+ * that dies fails its batch and is replaced after a backoff that doubles
+ * with each recent exit. More than RETRIEVAL_RESPAWN_LIMIT exits within
+ * RETRIEVAL_RESPAWN_WINDOW_MS (say, a worker source that no longer loads)
+ * fail the pool: its queries reject with RetrievalPoolFailedError and
+ * lib/rag.ts scores inline from then on.
+ */
+
+export const POOL_WORKERS = envNumber("RETRIEVAL_WORKERS", Math.max(1, Math.min(4, os.cpus().length - 1)));
+export const QUEUE_SIZE = envNumber("RETRIEVAL_QUEUE_SIZE", 256);
+export const BATCH_SIZE = envNumber("RETRIEVAL_BATCH_SIZE", 16);
+export const RESPAWN_LIMIT = envNumber("RETRIEVAL_RESPAWN_LIMIT", 5);
+export const RESPAWN_WINDOW_MS = envNumber("RETRIEVAL_RESPAWN_WINDOW_MS", 60_000);
+const RESPAWN_BASE_MS = 100;
+const RESPAWN_MAX_MS = 10_000;
+
+const queueDepth = gauge("retrieval_pool_queue_depth", "Retrieval queries waiting for a worker");
+const batchSize = histogram("retrieval_pool_batch_size", "Queries per batch sent to a retrieval worker", [
+  1, 2, 4, 8, 16, 32, 64,
+]);
+const queueWait = histogram("retrieval_pool_queue_wait_seconds", "Time a retrieval query waited for a worker");
+const rejected = counter("retrieval_pool_rejected_total", "Retrieval queries refused because the queue was full");
+const workerExits = counter("retrieval_pool_worker_exits_total", "Retrieval workers that died");
+const poolFailed = gauge("retrieval_pool_failed", "1 once the retrieval pool gave up respawning workers");
+
+export class RetrievalBusyError extends Error {
+  constructor() {
+    super("Retrieval queue is full");
+    this.name = "RetrievalBusyError";
+  }
+}
+
+export class RetrievalPoolFailedError extends Error {
+  constructor() {
+    super("Retrieval workers keep exiting; the pool is disabled");
+    this.name = "RetrievalPoolFailedError";
+  }
+}
+
+/** The shared part of a snapshot; what workers receive */
+export type SnapshotBuffers = {
+  text: SharedArrayBuffer;
+  // Int32: 4 field starts per document, then the end of the text
+  offsets: SharedArrayBuffer;
+  // Int32 sequence number per document
+  seqs: SharedArrayBuffer;
+  // Documents [first, last) of each category
+  categories: { name: string; first: number; last: number }[];
+};
+
+export type Snapshot = SnapshotBuffers & {
+  // Position in these arrays is the document number workers return
+  docs: IndexedQA[];
+  generation: number;
+};
+
+/** One query, with the routing lib/rag.ts decided on */
+export type SnapshotQuery = {
+  words: string[];
+  topK: number;
+  // Categories in search order, and the probability of each
+  order: string[];
+  probabilities: number[];
+  // How many of order to search before deciding whether to widen
+  routed: number;
+  strongFraction: number;
+  widenProbability: number;
+};
+
+export type SnapshotResult = {
+  // [document number, score], best first
+  hits: [number, number][];
+  // How many of order were searched
+  searched: number;
+  candidates: number;
+};
+
+/** Pack live documents (any order) into shared buffers, grouped by category */
+export function buildSnapshot(docs: IndexedQA[], generation: number): Snapshot {
+  const byCategory = new Map<string, IndexedQA[]>();
+  for (const doc of docs) {
+    const list = byCategory.get(doc.qa.category);
+    if (list) list.push(doc);
+    else byCategory.set(doc.qa.category, [doc]);
+  }
+
+  const ordered: IndexedQA[] = [];
+  const categories: SnapshotBuffers["categories"] = [];
+  byCategory.forEach((list, name) => {
+    categories.push({ name, first: ordered.length, last: ordered.length + list.length });
+    ordered.push(...list);
+  });
+
+  const encoder = new TextEncoder();
+  const fields = ordered.map((doc) =>
+    [
+      doc.question,
+      doc.keywords.join("\n"),
+      doc.answer,
+      // Leading newline so a short word matches as "\nword\n", i.e. a whole form
+      "\n" + Array.from(doc.forms).join("\n"),
+    ].map((field) => encoder.encode(field + "\n"))
+  );
+  const length = fields.reduce((sum, parts) => sum + parts.reduce((n, part) => n + part.length, 0), 0);
+
+  const text = new SharedArrayBuffer(length);
+  const offsets = new SharedArrayBuffer(4 * (4 * ordered.length + 1));
+  const seqs = new SharedArrayBuffer(4 * ordered.length);
+  const bytes = new Uint8Array(text);
+  const starts = new Int32Array(offsets);
+  const seqArray = new Int32Array(seqs);
+  let at = 0;
+  fields.forEach((parts, d) => {
+    parts.forEach((part, f) => {
+      starts[4 * d + f] = at;
+      bytes.set(part, at);
+      at += part.length;
+    });
+    seqArray[d] = ordered[d].seq;
+  });
+  starts[4 * ordered.length] = at;
+
+  return { text, offsets, seqs, categories, docs: ordered, generation };
+}
+
+/**
+ * Score one query against a snapshot
+ *
+ * Runs in workers from its source text (see WORKER_SOURCE), so it must not
+ * use anything from outside its own body but globals (Buffer, TextEncoder).
+ */
+export function scoreSnapshot(snapshot: SnapshotBuffers, query: SnapshotQuery): SnapshotResult {
+  const text = Buffer.from(snapshot.text);
+  const starts = new Int32Array(snapshot.offsets);
+  const seqs = new Int32Array(snapshot.seqs);
+  const encoder = new TextEncoder();
+  const words = query.words;
+  const topK = query.topK;
+  // Points per field: question, keywords, answer; forms only count for short words
+  const points = [3, 2, 1];
+  const patterns = words.map((word) => encoder.encode(word.length <= 2 ? "\n" + word + "\n" : word));
+  const ceiling = words.reduce((sum, word) => sum + (word.length <= 2 ? 2 : 6), 0);
+  let candidates = 0;
+
+  const better = (a: [number, number], b: [number, number]) =>
+    a[1] > b[1] || (a[1] === b[1] && seqs[a[0]] < seqs[b[0]]);
+  const top = (hits: [number, number][]) =>
+    hits.sort((a, b) => (better(a, b) ? -1 : better(b, a) ? 1 : 0)).slice(0, topK);
+
+  const searchCategory = (name: string): [number, number][] => {
+    const range = snapshot.categories.find((category) => category.name === name);
+    if (!range || range.first === range.last) return [];
+    candidates += range.last - range.first;
+    const base = starts[4 * range.first];
+    const view = text.subarray(base, starts[4 * range.last]);
+    const scores = new Map<number, number>();
+    const credit = (d: number, value: number) => scores.set(d, (scores.get(d) || 0) + value);
+
+    patterns.forEach((pattern, w) => {
+      const short = words[w].length <= 2;
+      let d = range.first;
+      let pos = view.indexOf(pattern);
+      while (pos !== -1) {
+        const at = base + pos;
+        while (starts[4 * (d + 1)] <= at) d++;
+        const field = at >= starts[4 * d + 3] ? 3 : at >= starts[4 * d + 2] ? 2 : at >= starts[4 * d + 1] ? 1 : 0;
+        let next: number;
+        if (short) {
+          // Only a whole synonym form counts; keep looking within this document
+          if (field === 3 && at + pattern.length <= starts[4 * (d + 1)]) {
+            credit(d, 2);
+            next = starts[4 * (d + 1)];
+          } else {
+            next = at + 1;
+          }
+        } else if (field === 3) {
+          next = starts[4 * (d + 1)];
+        } else {
+          // Each field counts once per word; go on from the next field
+          credit(d, points[field]);
+          next = starts[4 * d + field + 1];
+        }
+        pos = view.indexOf(pattern, next - base);
+      }
+    });
+
+    const hits: [number, number][] = [];
+    scores.forEach((score, d) => hits.push([d, score]));
+    return top(hits);
+  };
+
+  let searched = Math.min(query.routed, query.order.length);
+  let hits = top(query.order.slice(0, searched).flatMap(searchCategory));
+  // Same widening rule as routedSearch()
+  while (
+    searched < query.order.length &&
+    (hits.length < topK ||
+      (hits[topK - 1][1] < query.strongFraction * ceiling &&
+        query.probabilities[searched] >= query.widenProbability))
+  ) {
+    hits = top(hits.concat(searchCategory(query.order[searched])));
+    searched++;
+  }
+  return { hits, searched, candidates };
+}
+
+/** Worker thread main loop; also run from source text, so self-contained */
+function workerMain(port: any, score: typeof scoreSnapshot) {
+  let snapshot: SnapshotBuffers | null = null;
+  port.on("message", (message: any) => {
+    if (message.type === "snapshot") {
+      snapshot = message.snapshot;
+      return;
+    }
+    const results = message.queries.map((query: SnapshotQuery) => (snapshot ? score(snapshot, query) : null));
+    port.postMessage({ batch: message.batch, results });
+  });
+}
+
+// Built from the compiled functions, so the bundler never needs a separate worker file
+const WORKER_SOURCE = `
+const { parentPort } = require("worker_threads");
+const scoreSnapshot = ${scoreSnapshot.toString()};
+(${workerMain.toString()})(parentPort, scoreSnapshot);
+`;
+
+type Pending = {
+  query: SnapshotQuery;
+  queued: number;
+  resolve: (result: { snapshot: Snapshot; result: SnapshotResult }) => void;
+  reject: (error: Error) => void;
+};
+
+type Slot = {
+  // Null while waiting to be respawned
+  worker: Worker | null;
+  // The batch in flight, and the snapshot it was scored against
+  batch: Pending[] | null;
+  snapshot: Snapshot | null;
+};
+
+export class RetrievalPool {
+  private slots: Slot[] = [];
+  private queue: Pending[] = [];
+  private snapshot: Snapshot | null = null;
+  private batches = 0;
+  // When recent workers exited, oldest first
+  private exits: number[] = [];
+  private timers = new Set<NodeJS.Timeout>();
+  private dead = false;
+
+  constructor(private readonly size: number = POOL_WORKERS) {
+    for (let i = 0; i < size; i++) {
+      const slot: Slot = { worker: null, batch: null, snapshot: null };
+      this.slots.push(slot);
+      this.spawn(slot);
+    }
+  }
+
+  /** True once workers exited too often; the pool refuses all queries after that */
+  failed(): boolean {
+    return this.dead;
+  }
+
+  generation(): number | null {
+    return this.snapshot ? this.snapshot.generation : null;
+  }
+
+  /** Use this snapshot for every query dispatched from now on */
+  publish(snapshot: Snapshot) {
+    this.snapshot = snapshot;
+    for (const slot of this.slots) this.send(slot);
+  }
+
+  /** Score a query on a worker; rejects with RetrievalBusyError when the queue is full */
+  search(query: SnapshotQuery): Promise<{ snapshot: Snapshot; result: SnapshotResult }> {
+    if (this.dead) return Promise.reject(new RetrievalPoolFailedError());
+    if (this.queue.length >= QUEUE_SIZE) {
+      rejected.inc();
+      return Promise.reject(new RetrievalBusyError());
+    }
+    return new Promise((resolve, reject) => {
+      this.queue.push({ query, queued: performance.now(), resolve, reject });
+      queueDepth.set({}, this.queue.length);
+      this.dispatch();
+    });
+  }
+
+  private spawn(slot: Slot) {
+    const worker = new Worker(WORKER_SOURCE, { eval: true });
+    slot.worker = worker;
+    slot.snapshot = null;
+    worker.on("message", (message: { results: (SnapshotResult | null)[] }) => this.finish(slot, message.results));
+    worker.on("error", (error) => console.error("Retrieval worker error:", error));
+    worker.on("exit", () => this.replace(slot));
+    // Idle workers must not keep the process alive; after the listeners,
+    // since adding a message listener refs the worker again
+    worker.unref();
+    this.send(slot);
+    this.dispatch();
+  }
+
+  private send(slot: Slot) {
+    if (slot.worker && this.snapshot && slot.snapshot !== this.snapshot) {
+      const { text, offsets, seqs, categories } = this.snapshot;
+      slot.worker.postMessage({ type: "snapshot", snapshot: { text, offsets, seqs, categories } });
+      slot.snapshot = this.snapshot;
+    }
+  }
+
+  private dispatch() {
+    for (const slot of this.slots) {
+      if (this.queue.length === 0) break;
+      if (!slot.worker || slot.batch) continue;
+      const batch = this.queue.splice(0, BATCH_SIZE);
+      const now = performance.now();
+      for (const pending of batch) queueWait.observe((now - pending.queued) / 1000);
+      batchSize.observe(batch.length);
+      slot.batch = batch;
+      slot.worker.ref();
+      slot.worker.postMessage({ type: "batch", batch: ++this.batches, queries: batch.map((p) => p.query) });
+    }
+    queueDepth.set({}, this.queue.length);
+  }
+
+  private finish(slot: Slot, results: (SnapshotResult | null)[]) {
+    const batch = slot.batch || [];
+    // Messages are ordered, so the worker scored this batch against slot.snapshot
+    const snapshot = slot.snapshot;
+    slot.batch = null;
+    slot.worker?.unref();
+    batch.forEach((pending, i) => {
+      const result = results[i];
+      if (result && snapshot) pending.resolve({ snapshot, result });
+      else pending.reject(new Error("Retrieval worker had no snapshot"));
+    });
+    this.dispatch();
+  }
+
+  private replace(slot: Slot) {
+    workerExits.inc();
+    const batch = slot.batch || [];
+    slot.worker = null;
+    slot.batch = null;
+    if (this.dead) return;
+    for (const pending of batch) pending.reject(new Error("Retrieval worker exited"));
+
+    const now = Date.now();
+    this.exits = this.exits.filter((at) => now - at < RESPAWN_WINDOW_MS);
+    this.exits.push(now);
+    if (this.exits.length > RESPAWN_LIMIT) return this.fail();
+    const delay = Math.min(RESPAWN_MAX_MS, RESPAWN_BASE_MS * 2 ** (this.exits.length - 1));
+    const timer = setTimeout(() => {
+      this.timers.delete(timer);
+      if (!this.dead) this.spawn(slot);
+    }, delay);
+    timer.unref();
+    this.timers.add(timer);
+  }
+
+  private fail() {
+    console.error(
+      `Retrieval workers exited ${this.exits.length} times in ${RESPAWN_WINDOW_MS} ms; scoring inline from now on`
+    );
+    this.dead = true;
+    poolFailed.set({}, 1);
+    for (const timer of this.timers) clearTimeout(timer);
+    this.timers.clear();
+    const error = new RetrievalPoolFailedError();
+    for (const pending of this.queue) pending.reject(error);
+    this.queue = [];
+    queueDepth.set({}, 0);
+    for (const slot of this.slots) {
+      for (const pending of slot.batch || []) pending.reject(error);
+      slot.batch = null;
+      void slot.worker?.terminate();
+    }
+  }
+}
@@ -0,0 +1,284 @@
+import { QAItem } from "@/data/qa-data";
+import { gauge, histogram } from "@/lib/metrics";
+import { synonymForms } from "@/lib/synonyms";
+
+/**
+ * Incrementally updatable retrieval index
+ *
+ * Documents live in immutable segments plus one small mutable delta
+ * segment. Adding or editing a QA indexes just that document into the
+ * delta (well under a millisecond) and records a tombstone for its id:
+ * every older version, in whatever segment, is dead from then on. Deleting
+ * records a tombstone alone.
+ *
+ * Once the delta holds DELTA_MAX_DOCS it is sealed into a segment, and a
+ * merge is scheduled off the request path. The merge combines the smallest
+ * segments while there are more than MAX_SEGMENTS, rewrites any segment
+ * that is more than MAX_DEAD_RATIO dead, and forgets tombstones that no
+ * longer hide anything. A merge builds new segments and then swaps them in
+ * with one assignment, so a search always sees a consistent set.
+ *
+ * A search scores every segment, keeps each one's top k, and merges those.
+ * Ties go to the lower sequence number, i.e. to corpus order, which keeps
+ * the base corpus ranking identical to one flat scan. Each segment also
+ * lists its documents by category, so a search limited to some categories
+ * (see lib/category-router.ts) only scores those.
+ */
+
+export const DELTA_MAX_DOCS = 32;
+export const MAX_SEGMENTS = 8;
+export const MAX_DEAD_RATIO = 0.25;
+
+export type IndexedQA = {
+  qa: QAItem;
+  // Insertion order; later versions of an id get higher numbers
+  seq: number;
+  question: string;
+  answer: string;
+  // Stored keywords plus every synonym/acronym form the QA mentions
+  keywords: string[];
+  forms: Set<string>;
+};
+
+export type ScoredDoc = { doc: IndexedQA; score: number };
+
+type Segment = {
+  readonly docs: readonly IndexedQA[];
+  readonly byCategory: ReadonlyMap<string, readonly IndexedQA[]>;
+};
+
+const segmentCount = gauge("search_index_segments", "Immutable segments in the retrieval index");
+const deltaSize = gauge("search_index_delta_docs", "Documents in the mutable delta segment");
+const tombstoneCount = gauge("search_index_tombstones", "Ids with superseded or deleted versions");
+const updateDuration = histogram("search_index_update_seconds", "Time to apply one index update");
+const mergeDuration = histogram("search_index_merge_seconds", "Time spent in one background merge");
+
+/** Lowercased fields and synonym forms for one QA, computed once */
+function indexQA(qa: QAItem, seq: number): IndexedQA {
+  const forms = synonymForms(`${qa.question} ${qa.answer} ${(qa.keywords || []).join(" ")}`);
+  return {
+    qa,
+    seq,
+    question: qa.question.toLowerCase(),
+    answer: qa.answer.toLowerCase(),
+    keywords: [...(qa.keywords || []).map((k) => k.toLowerCase()), ...forms],
+    forms: new Set(forms),
+  };
+}
+
+/** A segment over docs (in sequence order), with its per-category lists */
+function makeSegment(docs: IndexedQA[]): Segment {
+  const byCategory = new Map<string, IndexedQA[]>();
+  for (const doc of docs) {
+    const list = byCategory.get(doc.qa.category);
+    if (list) list.push(doc);
+    else byCategory.set(doc.qa.category, [doc]);
+  }
+  return { docs, byCategory };
+}
+
+const better = (a: ScoredDoc, b: ScoredDoc) => a.score > b.score || (a.score === b.score && a.doc.seq < b.doc.seq);
+
+/** Best k of several hit lists, in search order */
+export function mergeHits(lists: readonly ScoredDoc[][], k: number): ScoredDoc[] {
+  return lists
+    .flat()
+    .sort((a, b) => (better(a, b) ? -1 : better(b, a) ? 1 : 0))
+    .slice(0, k);
+}
+
+export class SegmentIndex {
+  private segments: Segment[] = [];
+  private delta: IndexedQA[] = [];
+  // id -> first live sequence number; versions below it are dead
+  private tombstones = new Map<number, number>();
+  // id -> its live version
+  private byId = new Map<number, IndexedQA>();
+  private nextSeq = 0;
+  // Bumped by every upsert and remove, so copies of the index know they are stale
+  private edits = 0;
+  private mergeTimer: ReturnType<typeof setTimeout> | null = null;
+
+  constructor(qas: QAItem[]) {
+    this.segments = [makeSegment(qas.map((qa) => indexQA(qa, this.nextSeq++)))];
+    for (const doc of this.segments[0].docs) this.byId.set(doc.qa.id, doc);
+    this.report();
+  }
+
+  private isLive(doc: IndexedQA): boolean {
+    return doc.seq >= (this.tombstones.get(doc.qa.id) ?? 0);
+  }
+
+  /** Add a QA, or replace every earlier version with the same id */
+  upsert(qa: QAItem) {
+    const started = performance.now();
+    const doc = indexQA(qa, this.nextSeq++);
+    this.tombstones.set(qa.id, doc.seq);
+    this.byId.set(qa.id, doc);
+    this.delta.push(doc);
+    this.edits++;
+    this.afterUpdate(started);
+  }
+
+  /** Hide every version of an id */
+  remove(id: number) {
+    const started = performance.now();
+    this.tombstones.set(id, this.nextSeq++);
+    this.byId.delete(id);
+    this.edits++;
+    // Deletes never fill the delta, so compaction has to be asked for
+    this.scheduleMerge();
+    this.afterUpdate(started);
+  }
+
+  private afterUpdate(started: number) {
+    if (this.delta.length >= DELTA_MAX_DOCS) {
+      this.segments = [...this.segments, makeSegment(this.delta.filter((doc) => this.isLive(doc)))];
+      this.delta = [];
+      this.scheduleMerge();
+    }
+    updateDuration.observe((performance.now() - started) / 1000);
+    this.report();
+  }
+
+  /**
+   * Best topK live documents by score (positive scores only), fanning out
+   * over every segment and the delta. With categories, only documents in
+   * those categories are scored.
+   */
+  search(score: (doc: IndexedQA) => number, topK: number, categories?: readonly string[]): ScoredDoc[] {
+    const sources: (readonly IndexedQA[])[] = [];
+    if (categories) {
+      for (const segment of this.segments) {
+        for (const category of categories) {
+          const docs = segment.byCategory.get(category);
+          if (docs) sources.push(docs);
+        }
+      }
+      // The delta is small; filter it instead of keeping lists for it
+      const wanted = new Set(categories);
+      sources.push(this.delta.filter((doc) => wanted.has(doc.qa.category)));
+    } else {
+      sources.push(...this.segments.map((s) => s.docs), this.delta);
+    }
+    const isLive = (doc: IndexedQA) => this.isLive(doc);
+    return mergeHits(sources.map((docs) => topOf(docs, score, topK, isLive)), topK);
+  }
+
+  /** The live version of an id, or null if it was deleted or never added */
+  get(id: number): QAItem | null {
+    return this.byId.get(id)?.qa ?? null;
+  }
+
+  /** Number of upserts and removes so far */
+  generation(): number {
+    return this.edits;
+  }
+
+  /** Documents stored, live or not; cheap, for sizing decisions */
+  size(): number {
+    return this.segments.reduce((sum, s) => sum + s.docs.length, this.delta.length);
+  }
+
+  /** Every live document, in sequence order */
+  liveDocs(): IndexedQA[] {
+    return [...this.segments.flatMap((s) => s.docs), ...this.delta]
+      .filter((doc) => this.isLive(doc))
+      .sort((a, b) => a.seq - b.seq);
+  }
+
+  /** Every category with a stored document, including ones the router doesn't know */
+  categories(): string[] {
+    const seen = new Set<string>();
+    for (const segment of this.segments) segment.byCategory.forEach((_, category) => seen.add(category));
+    for (const doc of this.delta) seen.add(doc.qa.category);
+    return Array.from(seen);
+  }
+
+  private scheduleMerge() {
+    if (this.mergeTimer) return;
+    this.mergeTimer = setTimeout(() => {
+      this.mergeTimer = null;
+      this.merge();
+    }, 0);
+    this.mergeTimer.unref?.();
+  }
+
+  /** One merge pass; safe to run any time */
+  merge() {
+    const started = performance.now();
+    const live = (segment: Segment) => segment.docs.filter((doc) => this.isLive(doc));
+
+    // Compact segments that are mostly dead weight
+    let segments = this.segments
+      .map((segment) => {
+        const docs = live(segment);
+        return docs.length < segment.docs.length * (1 - MAX_DEAD_RATIO) ? makeSegment(docs) : segment;
+      })
+      .filter((segment) => segment.docs.length > 0);
+
+    // Tiered: fold the smallest segments together until few enough remain
+    while (segments.length > MAX_SEGMENTS) {
+      segments.sort((a, b) => a.docs.length - b.docs.length);
+      const [a, b, ...rest] = segments;
+      const docs = [...live(a), ...live(b)].sort((x, y) => x.seq - y.seq);
+      segments = [...rest, makeSegment(docs)];
+    }
+    segments.sort((a, b) => a.docs[0].seq - b.docs[0].seq);
+    this.segments = segments;
+
+    // A tombstone is only needed while a dead version is still stored
+    const stillHiding = new Set<number>();
+    for (const docs of [...segments.map((s) => s.docs), this.delta]) {
+      for (const doc of docs) {
+        if (!this.isLive(doc)) stillHiding.add(doc.qa.id);
+      }
+    }
+    this.tombstones.forEach((_, id) => {
+      if (!stillHiding.has(id)) this.tombstones.delete(id);
+    });
+
+    mergeDuration.observe((performance.now() - started) / 1000);
+    this.report();
+  }
+
+  stats() {
+    return {
+      segments: this.segments.map((s) => s.docs.length),
+      delta: this.delta.length,
+      tombstones: this.tombstones.size,
+    };
+  }
+
+  private report() {
+    segmentCount.set({}, this.segments.length);
+    deltaSize.set({}, this.delta.length);
+    tombstoneCount.set({}, this.tombstones.size);
+  }
+}
+
+/** Top k positive-scoring live docs of one segment, best first */
+function topOf(
+  docs: readonly IndexedQA[],
+  score: (doc: IndexedQA) => number,
+  k: number,
+  isLive: (doc: IndexedQA) => boolean
+): ScoredDoc[] {
+  const top: ScoredDoc[] = [];
+  if (k <= 0) return top;
+  for (const doc of docs) {
+    if (!isLive(doc)) continue;
+    const value = score(doc);
+    if (value <= 0) continue;
+    const hit = { doc, score: value };
+    if (top.length === k && !better(hit, top[k - 1])) continue;
+    // Insertion into a list of at most k entries
+    let i = Math.min(top.length, k - 1);
+    top[i] = hit;
+    while (i > 0 && better(top[i], top[i - 1])) {
+      [top[i], top[i - 1]] = [top[i - 1], top[i]];
+      i--;
+    }
+  }
+  return top;
+}
@@ -0,0 +1,191 @@
+import { qaData } from "@/data/qa-data";
+
+/**
+ * Typo correction for retrieval queries (symmetric delete, as in SymSpell)
+ *
+ * Every word in the questions, answers and keywords goes into a vocabulary
+ * with its corpus frequency. Each term's prefix (first PREFIX_LENGTH
+ * letters) is indexed under every string reachable from it by deleting up
+ * to MAX_EDIT_DISTANCE letters. Both are built once, when this module is
+ * imported. A misspelled query word generates its own deletes. Any term
+ * sharing one of them is a candidate, and the few candidates are checked
+ * with a bounded edit distance. The closest, most frequent term wins, so
+ * correcting a word never scans the vocabulary.
+ *
+ * The vocabulary is small, so plenty of real words are missing from it and
+ * sit one edit from a term that is ("coding" and "coming"). A candidate
+ * must therefore also look like a typo of the word: the same first letter,
+ * which typos rarely change; not just another inflection of it ("thanks",
+ * "thank"); and, for words short enough for one edit, a changed letter
+ * must be a neighbouring key.
+ */
+
+export const MAX_EDIT_DISTANCE = 2;
+const PREFIX_LENGTH = 7;
+// Shorter words are left alone: too many real words sit one edit apart
+const MIN_WORD_LENGTH = 5;
+// Words up to this long may be off by one edit, longer ones by two
+const ONE_EDIT_MAX_LENGTH = 7;
+
+// Endings that make another form of the same word rather than a typo of it
+const INFLECTIONS = ["s", "es", "ed", "d", "ing", "er", "ers", "ly"];
+const KEYBOARD_ROWS = ["qwertyuiop", "asdfghjkl", "zxcvbnm"];
+// How far each row is shifted right of the one above, in keys
+const ROW_OFFSETS = [0, 0.25, 0.75];
+
+export type Correction = { from: string; to: string };
+
+type SpellIndex = {
+  terms: string[];
+  frequencies: Int32Array;
+  termIds: Map<string, number>;
+  deletes: Map<string, number[]>;
+};
+
+const words = (text: string) => text.toLowerCase().match(/[a-z]+/g) || [];
+
+/** Every string left after deleting up to `distance` letters from `word` */
+function deletesOf(word: string, distance: number, out: Set<string> = new Set([word])): Set<string> {
+  if (distance === 0 || word.length <= 1) return out;
+  for (let i = 0; i < word.length; i++) {
+    const shorter = word.slice(0, i) + word.slice(i + 1);
+    if (!out.has(shorter)) {
+      out.add(shorter);
+      deletesOf(shorter, distance - 1, out);
+    }
+  }
+  return out;
+}
+
+function buildSpellIndex(): SpellIndex {
+  const counts = new Map<string, number>();
+  for (const qa of qaData) {
+    const text = `${qa.question} ${qa.answer} ${(qa.keywords || []).join(" ")}`;
+    for (const word of words(text)) {
+      counts.set(word, (counts.get(word) || 0) + 1);
+    }
+  }
+
+  const terms = Array.from(counts.keys());
+  const frequencies = Int32Array.from(terms, (term) => counts.get(term)!);
+  const termIds = new Map(terms.map((term, id) => [term, id] as const));
+  const deletes = new Map<string, number[]>();
+  terms.forEach((term, id) => {
+    if (term.length < MIN_WORD_LENGTH - MAX_EDIT_DISTANCE) return;
+    deletesOf(term.slice(0, PREFIX_LENGTH), MAX_EDIT_DISTANCE).forEach((key) => {
+      const ids = deletes.get(key);
+      if (ids) ids.push(id);
+      else deletes.set(key, [id]);
+    });
+  });
+  return { terms, frequencies, termIds, deletes };
+}
+
+const SPELL_INDEX = buildSpellIndex();
+
+/**
+ * Optimal string alignment distance (adjacent swaps count as one edit),
+ * or max + 1 as soon as the distance must exceed max
+ */
+function editDistance(a: string, b: string, max: number): number {
+  if (Math.abs(a.length - b.length) > max) return max + 1;
+  let prevPrev = new Array<number>(b.length + 1).fill(0);
+  let prev = Array.from({ length: b.length + 1 }, (_, j) => j);
+  let row = new Array<number>(b.length + 1).fill(0);
+  for (let i = 1; i <= a.length; i++) {
+    row[0] = i;
+    let rowMin = i;
+    for (let j = 1; j <= b.length; j++) {
+      const cost = a[i - 1] === b[j - 1] ? 0 : 1;
+      let value = Math.min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost);
+      if (i > 1 && j > 1 && a[i - 1] === b[j - 2] && a[i - 2] === b[j - 1]) {
+        value = Math.min(value, prevPrev[j - 2] + 1);
+      }
+      row[j] = value;
+      if (value < rowMin) rowMin = value;
+    }
+    if (rowMin > max) return max + 1;
+    [prevPrev, prev, row] = [prev, row, prevPrev];
+  }
+  return prev[b.length];
+}
+
+const KEY_POSITIONS = new Map(
+  KEYBOARD_ROWS.flatMap((row, r) => Array.from(row, (key, c) => [key, [r, c + ROW_OFFSETS[r]]] as const))
+);
+
+function neighbouringKeys(a: string, b: string): boolean {
+  const [ra, xa] = KEY_POSITIONS.get(a) || [-9, -9];
+  const [rb, xb] = KEY_POSITIONS.get(b) || [9, 9];
+  return ra === rb ? Math.abs(xa - xb) === 1 : Math.abs(ra - rb) === 1 && Math.abs(xa - xb) <= 0.75;
+}
+
+/** The word and the stems it could be an inflection of ("coding": "cod", "code") */
+function stemsOf(word: string): string[] {
+  const stems = [word];
+  for (const ending of INFLECTIONS) {
+    if (word.length > ending.length + 2 && word.endsWith(ending)) {
+      const stem = word.slice(0, -ending.length);
+      stems.push(stem, `${stem}e`);
+    }
+  }
+  return stems;
+}
+
+/** True if both words are forms of one stem ("thanks" and "thank", "uploaded" and "uploads") */
+function isInflection(a: string, b: string): boolean {
+  const stems = new Set(stemsOf(a));
+  return stemsOf(b).some((stem) => stems.has(stem));
+}
+
+/** Whether a candidate within max edits of word is believable as what was meant */
+function plausibleTypo(word: string, term: string, max: number): boolean {
+  if (word[0] !== term[0] || isInflection(word, term)) return false;
+  if (max > 1 || word.length !== term.length) return true;
+  // One edit between words of the same length: a swap of neighbours, or a substituted key
+  const at = Array.from(word).findIndex((letter, i) => letter !== term[i]);
+  return word[at + 1] !== term[at + 1] || neighbouringKeys(word[at], term[at]);
+}
+
+/** Closest plausible vocabulary term for a word, or null if it is known or nothing is close */
+export function correctWord(word: string): string | null {
+  const index = SPELL_INDEX;
+  if (word.length < MIN_WORD_LENGTH || index.termIds.has(word)) return null;
+  const max = word.length <= ONE_EDIT_MAX_LENGTH ? 1 : MAX_EDIT_DISTANCE;
+
+  let best = -1;
+  let bestDistance = max + 1;
+  const seen = new Set<number>();
+  deletesOf(word.slice(0, PREFIX_LENGTH), max).forEach((key) => {
+    for (const id of index.deletes.get(key) || []) {
+      if (seen.has(id)) continue;
+      seen.add(id);
+      if (!plausibleTypo(word, index.terms[id], max)) continue;
+      const distance = editDistance(word, index.terms[id], bestDistance);
+      if (
+        distance < bestDistance ||
+        (distance === bestDistance && best !== -1 && index.frequencies[id] > index.frequencies[best])
+      ) {
+        best = id;
+        bestDistance = distance;
+      }
+    }
+  });
+  return best === -1 || bestDistance > max ? null : index.terms[best];
+}
+
+/**
+ * Query with misspelled words replaced by vocabulary terms, and the
+ * corrections made. Punctuation, case of untouched words and word order
+ * are kept.
+ */
+export function correctQuery(query: string): { query: string; corrections: Correction[] } {
+  const corrections: Correction[] = [];
+  const corrected = query.replace(/[a-z]+/gi, (match) => {
+    const to = correctWord(match.toLowerCase());
+    if (!to) return match;
+    corrections.push({ from: match, to });
+    return to;
+  });
+  return { query: corrected, corrections };
+}
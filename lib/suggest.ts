@@ -0,0 +1,242 @@
+import { qaData, QAItem } from "@/data/qa-data";
+
+/**
+ * Typeahead question suggestions
+ *
+ * Every word of every question (and of its keywords) goes into one sorted
+ * term array, built once when this module is imported. All terms sharing a
+ * prefix are contiguous in that array, so each prefix is a trie node, and
+ * every node caches its top suggestions. A one-word query is a single map
+ * lookup. A multi-word query scans the postings of its most selective word
+ * and keeps the questions that also contain the other words, using a binary
+ * search per document.
+ */
+
+export const DEFAULT_SUGGESTIONS = 5;
+export const MAX_SUGGESTIONS = 10;
+
+const QUESTION_WEIGHT = 2;
+const KEYWORD_WEIGHT = 1;
+// The first word of a question ranks above the same word further in
+const LEADING_WEIGHT = 3;
+
+export type Suggestion = {
+  id: number;
+  question: string;
+  category: string;
+};
+
+type SuggestIndex = {
+  items: QAItem[];
+  terms: string[];
+  // Term i's documents are postings[offsets[i]] .. postings[offsets[i + 1] - 1]
+  offsets: Int32Array;
+  postings: Int32Array;
+  // Per document: its term ids in sorted order, and the weight of each
+  docTerms: Int32Array[];
+  docWeights: Uint8Array[];
+  // Tie-break rank per document: shorter questions first
+  order: Int32Array;
+  topK: Map<string, Int32Array>;
+};
+
+export function tokenizeQuery(text: string): string[] {
+  return (
+    text
+      .toLowerCase()
+      .normalize("NFKD")
+      .replace(/[\u0300-\u036f]/g, "")
+      .match(/[a-z0-9]+/g) || []
+  );
+}
+
+function lowerBound(terms: string[], target: string): number {
+  let lo = 0;
+  let hi = terms.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (terms[mid] < target) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
+
+/** Range [lo, hi) of terms starting with prefix */
+function prefixRange(terms: string[], prefix: string): [number, number] {
+  return [lowerBound(terms, prefix), lowerBound(terms, prefix + "\uffff")];
+}
+
+function buildSuggestIndex(items: QAItem[]): SuggestIndex {
+  const weightsByTerm = new Map<string, Map<number, number>>();
+  const add = (term: string, doc: number, weight: number) => {
+    let docs = weightsByTerm.get(term);
+    if (!docs) {
+      docs = new Map();
+      weightsByTerm.set(term, docs);
+    }
+    docs.set(doc, Math.max(docs.get(doc) || 0, weight));
+  };
+
+  items.forEach((qa, doc) => {
+    tokenizeQuery(qa.question).forEach((term, i) =>
+      add(term, doc, i === 0 ? LEADING_WEIGHT : QUESTION_WEIGHT)
+    );
+    (qa.keywords || []).forEach((keyword) =>
+      tokenizeQuery(keyword).forEach((term) => add(term, doc, KEYWORD_WEIGHT))
+    );
+  });
+
+  const terms = Array.from(weightsByTerm.keys()).sort();
+  const offsets = new Int32Array(terms.length + 1);
+  terms.forEach((term, i) => {
+    offsets[i + 1] = offsets[i] + weightsByTerm.get(term)!.size;
+  });
+
+  const postings = new Int32Array(offsets[terms.length]);
+  const perDoc: { terms: number[]; weights: number[] }[] = items.map(() => ({
+    terms: [],
+    weights: [],
+  }));
+  terms.forEach((term, i) => {
+    let p = offsets[i];
+    weightsByTerm.get(term)!.forEach((weight, doc) => {
+      postings[p++] = doc;
+      // Term ids are visited in sorted order, so each list stays sorted
+      perDoc[doc].terms.push(i);
+      perDoc[doc].weights.push(weight);
+    });
+  });
+
+  const order = new Int32Array(items.length);
+  items
+    .map((qa, doc) => doc)
+    .sort((a, b) => items[a].question.length - items[b].question.length || a - b)
+    .forEach((doc, rank) => {
+      order[doc] = rank;
+    });
+
+  // Top suggestions for every prefix of every term (one entry per trie node)
+  const best = new Map<string, Map<number, number>>();
+  terms.forEach((term, i) => {
+    const docs = weightsByTerm.get(term)!;
+    for (let end = 1; end <= term.length; end++) {
+      const prefix = term.slice(0, end);
+      let node = best.get(prefix);
+      if (!node) {
+        node = new Map();
+        best.set(prefix, node);
+      }
+      docs.forEach((weight, doc) => {
+        if ((node!.get(doc) || 0) < weight) node!.set(doc, weight);
+      });
+    }
+  });
+
+  const topK = new Map<string, Int32Array>();
+  best.forEach((node, prefix) => {
+    const ranked = Array.from(node.keys())
+      .sort((a, b) => node.get(b)! - node.get(a)! || order[a] - order[b])
+      .slice(0, MAX_SUGGESTIONS);
+    topK.set(prefix, Int32Array.from(ranked));
+  });
+
+  return {
+    items,
+    terms,
+    offsets,
+    postings,
+    docTerms: perDoc.map((d) => Int32Array.from(d.terms)),
+    docWeights: perDoc.map((d) => Uint8Array.from(d.weights)),
+    order,
+    topK,
+  };
+}
+
+const SUGGEST_INDEX = buildSuggestIndex(qaData);
+
+/** Best weight of any term in doc starting with prefix, or 0 */
+function prefixWeight(index: SuggestIndex, doc: number, prefix: string): number {
+  const ids = index.docTerms[doc];
+  const weights = index.docWeights[doc];
+  const [first] = prefixRange(index.terms, prefix);
+
+  let lo = 0;
+  let hi = ids.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (ids[mid] < first) lo = mid + 1;
+    else hi = mid;
+  }
+
+  let weight = 0;
+  for (let i = lo; i < ids.length && index.terms[ids[i]].startsWith(prefix); i++) {
+    weight = Math.max(weight, weights[i]);
+  }
+  return weight;
+}
+
+function rankMultiWord(index: SuggestIndex, tokens: string[], limit: number): number[] {
+  // Drive the scan from the word with the fewest postings
+  let driver: [number, number] | null = null;
+  let driverCount = Infinity;
+  for (const token of tokens) {
+    const [lo, hi] = prefixRange(index.terms, token);
+    const count = index.offsets[hi] - index.offsets[lo];
+    if (count === 0) return [];
+    if (count < driverCount) {
+      driver = [lo, hi];
+      driverCount = count;
+    }
+  }
+
+  const scores = new Map<number, number>();
+  const start = index.offsets[driver![0]];
+  const end = index.offsets[driver![1]];
+  for (let p = start; p < end; p++) {
+    const doc = index.postings[p];
+    if (scores.has(doc)) continue;
+
+    let score = 0;
+    for (const token of tokens) {
+      const weight = prefixWeight(index, doc, token);
+      if (weight === 0) {
+        score = 0;
+        break;
+      }
+      score += weight;
+    }
+    scores.set(doc, score);
+  }
+
+  return Array.from(scores.keys())
+    .filter((doc) => scores.get(doc)! > 0)
+    .sort((a, b) => scores.get(b)! - scores.get(a)! || index.order[a] - index.order[b])
+    .slice(0, limit);
+}
+
+/**
+ * Top FAQ questions for a partially typed query
+ * Every word must prefix-match a word of the question or its keywords
+ */
+export function suggestQuestions(
+  query: string,
+  limit: number = DEFAULT_SUGGESTIONS
+): Suggestion[] {
+  const tokens = tokenizeQuery(query);
+  if (tokens.length === 0) return [];
+  limit = Math.min(Math.max(1, limit), MAX_SUGGESTIONS);
+
+  const index = SUGGEST_INDEX;
+  let docs: ArrayLike<number>;
+  if (tokens.length === 1) {
+    const cached = index.topK.get(tokens[0]);
+    docs = cached ? cached.subarray(0, limit) : [];
+  } else {
+    docs = rankMultiWord(index, tokens, limit);
+  }
+
+  return Array.from(docs, (doc) => {
+    const qa = index.items[doc];
+    return { id: qa.id, question: qa.question, category: qa.category };
+  });
+}
@@ -0,0 +1,36 @@
+import table from "@/data/synonyms.json";
+
+/**
+ * Synonym and acronym expansion for the retrieval index
+ *
+ * data/synonyms.json is compiled by the import pipeline from
+ * scripts/qa_tools/synonyms.py, which categorization also uses. Both match
+ * patterns come from that file as written, so a document expands here
+ * exactly as it does in Python. Expansion happens once per document when
+ * the index is built. Queries are never expanded.
+ */
+
+const PATTERN = table.pattern ? new RegExp(table.pattern, "gi") : null;
+// Acronyms that collide with ordinary words only match as capitalized
+const CASE_PATTERN = table.casePattern ? new RegExp(table.casePattern, "g") : null;
+const INDEX: Record<string, number> = table.index;
+
+/** Forms of one or two letters, which retrieval would otherwise drop as noise */
+export const SHORT_FORMS = new Set(table.groups.flat().filter((form) => form.length <= 2));
+
+/** Numbers of the synonym groups mentioned in text, ascending */
+export function synonymGroups(text: string): number[] {
+  const groups = new Set<number>();
+  for (const match of (PATTERN && text.match(PATTERN)) || []) {
+    groups.add(INDEX[match.toLowerCase()]);
+  }
+  for (const match of (CASE_PATTERN && text.match(CASE_PATTERN)) || []) {
+    groups.add(INDEX[match]);
+  }
+  return Array.from(groups).sort((a, b) => a - b);
+}
+
+/** Every form (lowercased) of every synonym group mentioned in text */
+export function synonymForms(text: string): string[] {
+  return synonymGroups(text).flatMap((group) => table.groups[group]);
+}
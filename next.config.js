@@ -1,6 +1,51 @@
+const { createHash } = require("crypto");
+const { readdirSync, readFileSync } = require("fs");
+const path = require("path");
+
+/** Short content hash of files under the project root, names included */
+function hashFiles(files) {
+  const hash = createHash("sha256");
+  for (const file of files) hash.update(file).update("\0").update(readFileSync(path.join(__dirname, file)));
+  return hash.digest("hex").slice(0, 12);
+}
+
+/** Every file below dir, relative to the project root, sorted */
+const filesUnder = (dir) =>
+  readdirSync(path.join(__dirname, dir), { recursive: true, withFileTypes: true })
+    .filter((entry) => entry.isFile())
+    .map((entry) => path.relative(__dirname, path.join(entry.parentPath ?? entry.path, entry.name)))
+    .sort();
+
+// Content hash of the FAQ corpus alone
+const corpusVersion = hashFiles(["data/qa-data.ts"]);
+// The corpus plus the code that shapes the static /api/faq/<version>/ payloads; versions those URLs
+const faqVersion = hashFiles([
+  "data/qa-data.ts",
+  "lib/faq-static.ts",
+  "lib/related.ts",
+  ...filesUnder("app/api/faq"),
+]);
+
 /** @type {import('next').NextConfig} */
 const nextConfig = {
   reactStrictMode: true,
+  experimental: {
+    // instrumentation.ts: set up the Gemini connection pool at server start
+    instrumentationHook: true,
+  },
+  env: {
+    CORPUS_VERSION: corpusVersion,
+    FAQ_VERSION: faqVersion,
+  },
+  // Also applied when the prerendered FAQ JSON is served straight from the build output
+  async headers() {
+    return [
+      {
+        source: "/api/faq/:version/:path*",
+        headers: [{ key: "Cache-Control", value: "public, max-age=31536000, immutable" }],
+      },
+    ];
+  },
 }
 
 module.exports = nextConfig
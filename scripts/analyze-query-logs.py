@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Script to summarize the chat query logs written by lib/query-log.ts
+
+Streams every query-log*.jsonl file (current, rotated and gzipped) and reports:
+  - most-asked clusters: queries grouped by the FAQ record they resolved to
+  - zero-hit queries: messages that retrieved nothing (gaps in the FAQ)
+  - cache candidates: repeated messages that still went to the model,
+    i.e. phrasings worth adding to the FAQ so the fast path answers them
+  - search success rate and the share of fast-path, model and shed answers
+  - retrieval routing: how often searches widened past the predicted
+    categories, and how many documents they scored
+
+Files are aggregated independently (in parallel with --workers) and merged,
+so memory grows with distinct questions rather than with log size.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from qa_tools.parallel import default_workers, sharded_map
+from qa_tools.profiling import StageProfiler, add_profile_args
+from qa_tools.querylog import LOG_GLOB, QueryStats, aggregate_file
+from qa_tools.sources import DB_PATH, ROOT, iter_db_questions
+
+LOGS_DIR = ROOT / 'logs'
+
+def build_report(stats, questions, top, min_count):
+    """Plain-dict report from merged stats; questions maps FAQ id to question text"""
+    clusters = []
+    for faq_id, count in stats.clusters.most_common(top):
+        clusters.append({
+            'id': faq_id,
+            'question': questions.get(faq_id),
+            'count': count,
+            'phrasings': len(stats.cluster_phrasings.get(faq_id, ())),
+        })
+
+    zero_hits = [
+        {'message': stats.samples[key], 'count': count}
+        for key, count in stats.zero_hits.most_common(top)
+    ]
+
+    candidates = [
+        {'message': stats.samples[key], 'count': count,
+         'bestFaqScore': round(stats.best_faq_score.get(key, 0.0), 3)}
+        for key, count in stats.model_answers.most_common()
+        if count >= min_count
+    ][:top]
+
+    mean_ms = {
+        path: round(stats.total_ms[path] / count, 1)
+        for path, count in stats.paths.items() if count
+    }
+    return {
+        'entries': stats.entries,
+        'malformed': stats.malformed,
+        'distinctQuestions': len(stats.asked),
+        'from': stats.first_ts,
+        'to': stats.last_ts,
+        'paths': dict(stats.paths),
+        'meanMs': mean_ms,
+        'searchSuccessRate': round(stats.hit_rate, 4),
+        'routing': {
+            'searches': stats.routed,
+            'widenedRate': round(stats.widened / stats.routed, 4) if stats.routed else 0.0,
+            'meanCandidates': round(stats.candidates / stats.routed, 1) if stats.routed else 0.0,
+            'firstCategory': dict(stats.routed_to.most_common()),
+        },
+        'clusters': clusters,
+        'zeroHits': zero_hits,
+        'cacheCandidates': candidates,
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--logs', type=Path, default=LOGS_DIR, help='Directory with query-log*.jsonl files')
+    parser.add_argument('--db', type=Path, default=DB_PATH, help='qa-data.ts database file, for cluster names')
+    parser.add_argument('--since', default=None,
+                        help='Only count entries on or after this ISO date (e.g. 2026-09-01)')
+    parser.add_argument('--top', type=int, default=20, help='Rows per section')
+    parser.add_argument('--min-count', type=int, default=3,
+                        help='Times a message must reach the model to be a cache candidate')
+    parser.add_argument('--output', type=Path, default=None, help='Also write the report as JSON')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes, one log file at a time (0 = all CPUs)')
+    add_profile_args(parser)
+    return parser.parse_args()
+
+def run(args, profiler):
+    print("=" * 70)
+    print("Analyzing Chat Query Logs")
+    print("=" * 70)
+
+    print("\n1. Finding log files...")
+    files = sorted(args.logs.glob(LOG_GLOB))
+    if not files:
+        print(f"Error: no {LOG_GLOB} files in {args.logs}")
+        return
+    size_mb = sum(f.stat().st_size for f in files) / (1024 * 1024)
+    print(f"   {len(files)} files, {size_mb:.1f} MB")
+
+    print("\n2. Aggregating entries...")
+    workers = args.workers or default_workers()
+    if workers > 1:
+        print(f"   Using {workers} worker processes")
+    with profiler.stage('aggregate'):
+        stats = QueryStats()
+        for partial in sharded_map(aggregate_file, files, args.since, workers):
+            stats += partial
+    profiler.record(files=len(files), entries=stats.entries)
+    print(f"   {stats.entries} entries, {len(stats.asked)} distinct questions")
+    if stats.malformed:
+        print(f"   Skipped {stats.malformed} malformed lines")
+
+    print("\n3. Building report...")
+    with profiler.stage('report'):
+        questions = {r.id: r.question for r in iter_db_questions(args.db)} if args.db.exists() else {}
+        report = build_report(stats, questions, args.top, args.min_count)
+
+    print("\n   Most-asked clusters:")
+    for row in report['clusters']:
+        print(f"   {row['count']:>6}  #{row['id']} {row['question'] or '(not in DB)'}  ({row['phrasings']} phrasings)")
+    print("\n   Zero-hit queries:")
+    for row in report['zeroHits']:
+        print(f"   {row['count']:>6}  {row['message']}")
+    print(f"\n   Cache candidates (reached the model {args.min_count}+ times):")
+    for row in report['cacheCandidates']:
+        print(f"   {row['count']:>6}  {row['message']}  (best FAQ score {row['bestFaqScore']:.2f})")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+
+    print("\n" + "=" * 70)
+    print("📊 SUMMARY:")
+    print(f"   Entries: {report['entries']} ({report['from']} to {report['to']})")
+    print("   Paths: " + ", ".join(f"{path} {count} ({report['meanMs'][path]} ms avg)"
+                                   for path, count in sorted(report['paths'].items())))
+    print(f"   Search success rate: {report['searchSuccessRate']:.1%}")
+    if stats.routed:
+        routing = report['routing']
+        print(f"   Retrieval routing: {routing['widenedRate']:.1%} widened, "
+              f"{routing['meanCandidates']} documents scored on average")
+    print(f"   Zero-hit questions: {len(stats.zero_hits)}")
+    print(f"   Cache candidates: {sum(1 for c in stats.model_answers.values() if c >= args.min_count)}")
+    if args.output:
+        print(f"   Saved to: {args.output}")
+    print("=" * 70)
+
+def main():
+    args = parse_args()
+    with StageProfiler.from_args(args) as profiler:
+        run(args, profiler)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Script to build qa-data.ts, its indexes and reports as a cached stage DAG
+
+The same work as import-all-questions.py followed by merge-sources.py,
+expressed as stages (see qa_tools/pipeline.py):
+
+    extract_markdown -> clean -+-> categorize -+-> generate -> data/qa-data.ts
+                               +-> keywords ---+
+                               +-> related ----+
+                               +-> passages -> data/passages.json
+    markdown_sources ---+
+    extract_pdf --------+-> merge (+ clean, categorize) -> scripts/merged-sources.json
+    synonyms -> data/synonyms.json
+    category_rules -> data/category-rules.json
+
+Every stage is cached under a hash of its inputs and code, so an
+unchanged source costs a hash check per stage, and editing one module
+only reruns the stages that use it. Stages whose inputs are ready run
+in parallel in a process pool (--jobs).
+"""
+
+import argparse
+from pathlib import Path
+
+from qa_tools.categorize import CATEGORY_RULES_PATH, categorize_records, category_rules_json
+from qa_tools.importer import build_qa_data, clean_blocks, corpus_version, extract_markdown_blocks
+from qa_tools.keywords import extract_corpus_keywords
+from qa_tools.merge import merge_report
+from qa_tools.parallel import default_workers
+from qa_tools.passages import PASSAGES_PATH, passages_json
+from qa_tools.pipeline import CACHE_DIR, Pipeline, Stage
+from qa_tools.profiling import StageProfiler, add_profile_args
+from qa_tools.related import related_questions
+from qa_tools.sources import DB_PATH, MD_PATH, PDF_PATH, markdown_records, pdf_records
+from qa_tools.synonyms import SYNONYMS_PATH, synonyms_json
+from qa_tools.updates import UPDATES_PATH, describe_update, retire_updates
+
+MERGED_PATH = Path(__file__).parent / 'merged-sources.json'
+
+def pdf_reader_version():
+    """Installed pypdf version, or None; without pypdf the PDF stage yields nothing"""
+    try:
+        import pypdf
+    except ImportError:
+        return None
+    return pypdf.__version__
+
+def build_stages(args):
+    return [
+        Stage('extract_markdown', extract_markdown_blocks, files=[args.markdown],
+              params={'md_path': args.markdown}),
+        Stage('clean', clean_blocks, deps=['extract_markdown']),
+        Stage('categorize', categorize_records, deps=['clean']),
+        Stage('keywords', extract_corpus_keywords, deps=['clean'], params={'top_n': args.keywords}),
+        Stage('related', related_questions, deps=['clean'], params={'k': args.related}),
+        Stage('generate', build_qa_data, deps=['clean', 'categorize', 'keywords', 'related'],
+              target=args.output, backup=True),
+        Stage('passages', passages_json, deps=['clean'], target=PASSAGES_PATH),
+        Stage('synonyms', synonyms_json, target=SYNONYMS_PATH),
+        Stage('category_rules', category_rules_json, target=CATEGORY_RULES_PATH),
+        Stage('markdown_sources', markdown_records, files=[args.markdown],
+              params={'md_path': args.markdown}),
+        Stage('extract_pdf', pdf_records, files=[args.pdf],
+              params={'pdf_path': args.pdf}, versions={'pypdf': pdf_reader_version()}),
+        Stage('merge', merge_report, deps=['markdown_sources', 'extract_pdf', 'clean', 'categorize'],
+              target=args.merged),
+    ]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--markdown', type=Path, default=MD_PATH, help='Markdown source file')
+    parser.add_argument('--pdf', type=Path, default=PDF_PATH, help='PDF source file')
+    parser.add_argument('--output', type=Path, default=DB_PATH, help='Where to write qa-data.ts')
+    parser.add_argument('--merged', type=Path, default=MERGED_PATH, help='Where to write the merge report')
+    parser.add_argument('--keywords', type=int, default=6,
+                        help='TF-IDF keywords to store per question (0 to skip)')
+    parser.add_argument('--related', type=int, default=5,
+                        help='Related questions to store per question (0 to skip)')
+    parser.add_argument('--stage', action='append', default=None,
+                        help='Only bring this stage and its inputs up to date (repeatable)')
+    parser.add_argument('--force', action='append', default=[],
+                        help="Rerun this stage even if cached (repeatable; 'all' for every stage)")
+    parser.add_argument('--jobs', type=int, default=default_workers(),
+                        help='Stages to run at once (1 runs everything in this process)')
+    parser.add_argument('--cache-dir', type=Path, default=CACHE_DIR, help='Stage output cache')
+    add_profile_args(parser)
+    return parser.parse_args()
+
+def run(args, profiler):
+    print("=" * 70)
+    print("Building qa-data.ts (cached stage pipeline)")
+    print("=" * 70)
+
+    if not args.markdown.exists():
+        print(f"Error: Markdown file not found at {args.markdown}")
+        return
+
+    print("\n1. Planning stages...")
+    try:
+        pipeline = Pipeline(build_stages(args), cache_dir=args.cache_dir, workers=args.jobs, force=args.force)
+        needed = pipeline.needed(args.stage)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    print(f"   {len(needed)} stages, up to {args.jobs} at once, cache in {args.cache_dir}")
+
+    print("\n2. Running stages...")
+    with profiler.stage('pipeline'):
+        results = pipeline.run(args.stage)
+    ran = [name for name, result in results.items() if result.status == 'ran']
+    wrote = [name for name, result in results.items() if result.wrote]
+    profiler.record(stages=len(results), ran=len(ran))
+
+    print("\n" + "=" * 70)
+    print("📊 SUMMARY:")
+    print(f"   Ran: {len(ran)}   Cached: {len(results) - len(ran)}   Files written: {len(wrote)}")
+    if ran:
+        print(f"   Stage time: {sum(results[name].seconds for name in ran):.2f}s "
+              f"({', '.join(sorted(ran))})")
+    if 'generate' in results and args.output.exists():
+        ts_content = args.output.read_text(encoding='utf-8')
+        print(f"   Corpus version: {corpus_version(ts_content)} (rebuild to publish /api/faq/<version>/)")
+    # Live edits to the previous corpus no longer line up with its ids; only the app's corpus has them
+    if 'generate' in results and args.output.resolve() == DB_PATH.resolve():
+        archive, retired = retire_updates(corpus_version(args.output.read_text(encoding='utf-8')), UPDATES_PATH)
+        if retired:
+            print(f"   Moved {len(retired)} live edits made against the previous corpus to {archive}")
+            for entry in retired:
+                print(f"     {describe_update(entry)}")
+    print("=" * 70)
+
+def main():
+    args = parse_args()
+    with StageProfiler.from_args(args) as profiler:
+        run(args, profiler)
+
+if __name__ == "__main__":
+    main()
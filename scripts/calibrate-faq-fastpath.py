@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Script to calibrate the chat FAQ fast path against a labeled query set
+
+The chat route answers directly from qa-data.ts, without calling the LLM,
+when a message's best FAQ score clears a minimum and beats the runner-up
+by a margin. This grid-searches both numbers for the most direct answers
+at the target precision and writes them to data/faq-fastpath.json.
+
+Labeled queries come from --queries (JSON Lines of {"query": ..., "id": N}
+with "id": null for questions the FAQ should not answer directly) and,
+unless --no-synthetic, from variants of the FAQ questions themselves:
+  - positives: typos, a dropped word, greetings and thanks around the question
+  - negatives: every question left out of the index (an unseen question
+    that happens to look like the ones around it)
+  - hard negatives: the question with one critical word changed (another
+    major, another season, a negation added or removed, another number),
+    which reads almost the same but asks something else. These count as
+    right only when they land on an FAQ question that says exactly that.
+"""
+
+import argparse
+import json
+import random
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+from qa_tools.fastpath import NEGATIONS, FAQIndex, is_direct
+from qa_tools.profiling import StageProfiler, add_profile_args
+from qa_tools.records import normalize_text
+from qa_tools.sources import DB_PATH, iter_db_questions
+
+OUTPUT_PATH = Path(__file__).parent.parent / 'data' / 'faq-fastpath.json'
+
+PREFIXES = ['hi, ', 'hello! ', 'quick question: ', 'hey ']
+SUFFIXES = [' thanks', ' thank you!', ' please']
+
+# The three majors, as a question may name them; "ID" only as capitals
+MAJOR_RE = re.compile(r'\b(?:visual communications? design|vcd|interaction design|ixd|industrial design)\b|\bID\b',
+                      re.IGNORECASE)
+MAJORS = ['VCD', 'IxD', 'ID']
+SEASON_RE = re.compile(r'\b(spring|summer|autumn|fall|winter)\b', re.IGNORECASE)
+SEASON_SWAPS = {'spring': 'autumn', 'summer': 'winter', 'autumn': 'spring', 'fall': 'spring', 'winter': 'summer'}
+AUXILIARY_RE = re.compile(r'\b(can|do|does|did|is|are|was|were|should|will|would|could)\b', re.IGNORECASE)
+NUMBER_RE = re.compile(r'\b[0-9]+\b')
+
+def typo(text, rng):
+    """Swap two adjacent letters inside one longer word"""
+    words = text.split()
+    candidates = [i for i, w in enumerate(words) if len(w) >= 4 and w.isalpha()]
+    if not candidates:
+        return None
+    i = rng.choice(candidates)
+    w = words[i]
+    j = rng.randrange(len(w) - 1)
+    words[i] = w[:j] + w[j + 1] + w[j] + w[j + 2:]
+    return ' '.join(words)
+
+def drop_word(text, rng):
+    """Remove one word from a question of five words or more"""
+    words = text.split()
+    if len(words) < 5:
+        return None
+    del words[rng.randrange(len(words))]
+    return ' '.join(words)
+
+def swap_major(text, rng):
+    """Name a different major than the question does"""
+    match = MAJOR_RE.search(text)
+    if not match or match.group(0) == 'id':
+        return None
+    named = match.group(0).lower()
+    current = 'IxD' if named in ('ixd', 'interaction design') else 'ID' if named in ('id', 'industrial design') else 'VCD'
+    other = rng.choice([major for major in MAJORS if major != current])
+    return text[:match.start()] + other + text[match.end():]
+
+def swap_season(text, rng):
+    """Ask about another season"""
+    match = SEASON_RE.search(text)
+    if not match:
+        return None
+    return text[:match.start()] + SEASON_SWAPS[match.group(1).lower()] + text[match.end():]
+
+def flip_negation(text, rng):
+    """Drop the question's negation, or negate its first auxiliary verb"""
+    words = text.split()
+    negated = [i for i, w in enumerate(words) if normalize_text(w) in NEGATIONS]
+    if negated:
+        del words[negated[0]]
+        return ' '.join(words)
+    match = AUXILIARY_RE.search(text)
+    if not match:
+        return None
+    negation = 'cannot' if match.group(1).lower() == 'can' else match.group(1) + ' not'
+    return text[:match.start()] + negation + text[match.end():]
+
+def change_number(text, rng):
+    """Ask about a different number"""
+    match = NUMBER_RE.search(text)
+    if not match:
+        return None
+    return text[:match.start()] + str(int(match.group(0)) + rng.randint(1, 3)) + text[match.end():]
+
+HARD_NEGATIVES = [swap_major, swap_season, flip_negation, change_number]
+
+def synthesize_queries(index, records, seed=166):
+    """Yield (query, expected position or None, excluded position) triples"""
+    rng = random.Random(seed)
+    for record in records:
+        position = index.exact.get(record.key)
+        if position is None:
+            continue
+        question = record.question
+        variants = [
+            typo(question, rng),
+            drop_word(question, rng),
+            rng.choice(PREFIXES) + question,
+            question + rng.choice(SUFFIXES),
+        ]
+        for variant in variants:
+            if variant:
+                yield variant, position, None
+        # Leave-one-out: with the question gone, no direct answer is right
+        yield question, None, position
+        # One critical word changed: only the FAQ question that says so is right
+        for mutate in HARD_NEGATIVES:
+            variant = mutate(question, rng)
+            if variant and normalize_text(variant) != record.key:
+                yield variant, index.exact.get(normalize_text(variant)), None
+
+def load_labeled_queries(path, index, records):
+    """Yield (query, expected position or None, None) from a JSON Lines file"""
+    positions = {}
+    for record in records:
+        position = index.exact.get(record.key)
+        if position is not None and record.id is not None:
+            positions[record.id] = position
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            expected = item.get('id')
+            yield item['query'], positions.get(expected) if expected is not None else None, None
+
+def evaluate(scored, min_score, margin):
+    """Return (direct answers, correct direct answers)"""
+    direct = correct = 0
+    for expected, best, score, runner_up, exact, agrees in scored:
+        if is_direct(score, runner_up, exact, agrees, min_score, margin):
+            direct += 1
+            if expected is not None and best == expected:
+                correct += 1
+    return direct, correct
+
+def grid_search(scored, target_precision):
+    """Most correct direct answers at or above the target precision"""
+    positives = sum(1 for item in scored if item[0] is not None)
+    best = None
+    for min_step in range(50, 100):
+        min_score = min_step / 100
+        for margin_step in range(0, 31):
+            margin = margin_step / 100
+            direct, correct = evaluate(scored, min_score, margin)
+            precision = correct / direct if direct else 1.0
+            if precision < target_precision:
+                continue
+            # Prefer more coverage, then the stricter thresholds
+            rank = (correct, min_score, margin)
+            if best is None or rank > best[0]:
+                best = (rank, {
+                    'minScore': min_score,
+                    'margin': margin,
+                    'precision': round(precision, 4),
+                    'recall': round(correct / positives, 4) if positives else 0.0,
+                    'directAnswers': direct,
+                })
+    return best[1] if best else None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--db', type=Path, default=DB_PATH, help='qa-data.ts database file')
+    parser.add_argument('--queries', type=Path, default=None,
+                        help='Labeled queries as JSON Lines of {"query": ..., "id": N or null}')
+    parser.add_argument('--no-synthetic', action='store_true',
+                        help='Only use --queries, not variants generated from the FAQ')
+    parser.add_argument('--target-precision', type=float, default=0.99,
+                        help='Minimum share of direct answers that must be the right FAQ')
+    parser.add_argument('--output', type=Path, default=OUTPUT_PATH,
+                        help='Where to write the calibrated thresholds')
+    add_profile_args(parser)
+    return parser.parse_args()
+
+def run(args, profiler):
+    print("=" * 70)
+    print("Calibrating the FAQ Fast Path")
+    print("=" * 70)
+
+    print("\n1. Loading FAQ questions...")
+    with profiler.stage('load_existing_db'):
+        records = list(iter_db_questions(args.db))
+        index = FAQIndex(records)
+    print(f"   {len(records)} questions, {len(index.keys)} distinct")
+
+    print("\n2. Building labeled queries...")
+    queries = []
+    if not args.no_synthetic:
+        queries.extend(synthesize_queries(index, records))
+    if args.queries:
+        queries.extend(load_labeled_queries(args.queries, index, records))
+    positives = sum(1 for _, expected, _ in queries if expected is not None)
+    print(f"   {len(queries)} queries ({positives} should match, {len(queries) - positives} should not)")
+    if not queries:
+        print("Error: no labeled queries")
+        return
+
+    print("\n3. Scoring queries...")
+    with profiler.stage('score_queries'):
+        scored = []
+        for query, expected, exclude in queries:
+            best, score, runner_up, exact = index.top2(query, exclude=exclude)
+            scored.append((expected, best, score, runner_up, exact, index.agrees(query, best)))
+    profiler.record(questions=len(records), queries=len(queries))
+
+    print("\n4. Searching thresholds...")
+    with profiler.stage('grid_search'):
+        result = grid_search(scored, args.target_precision)
+    if result is None:
+        print(f"Error: no threshold reaches {args.target_precision:.0%} precision")
+        return
+
+    result.update({
+        'targetPrecision': args.target_precision,
+        'queries': len(queries),
+        'calibratedAt': datetime.now(timezone.utc).strftime('%Y-%m-%d'),
+    })
+    args.output.write_text(json.dumps(result, indent=2) + '\n', encoding='utf-8')
+
+    print("\n" + "=" * 70)
+    print("📊 SUMMARY:")
+    print(f"   minScore: {result['minScore']:.2f}   margin: {result['margin']:.2f}")
+    print(f"   Precision: {result['precision']:.1%}   Recall: {result['recall']:.1%}")
+    print(f"   Saved to: {args.output}")
+    print("=" * 70)
+
+def main():
+    args = parse_args()
+    with StageProfiler.from_args(args) as profiler:
+        run(args, profiler)
+
+if __name__ == "__main__":
+    main()
@@ -4,49 +4,17 @@ Script to categorize missing questions from Markdown file
 """
 
 import re
+import argparse
 from pathlib import Path
 from collections import defaultdict
 
-def categorize_question(question, answer=""):
-    """Categorize question based on keywords"""
-    text = (question + " " + answer).lower()
-    
-    # Application & Admission
-    if any(word in text for word in ['application', 'apply', 'admission', 'admit', 'portfolio application', 
-                                     'portfolio review', 'work samples', '5-10', 'infosession', 'info session']):
-        return 'application'
-    
-    # Portfolio
-    if any(word in text for word in ['portfolio', 'work sample', 'showcase', 'project page', 'hero image',
-                                     'template', 'organize', 'revision', 'improve past work']):
-        return 'portfolio'
-    
-    # Major Selection
-    if any(word in text for word in ['major', 'vcd', 'ixd', 'industrial design', 'id', 'choose', 'select',
-                                     'creative direction', 'career', 'interior design', 'minor', 'dxarts',
-                                     'animation', 'fashion', 'program', 'pathway']):
-        return 'major'
-    
-    # Grades & Requirements
-    if any(word in text for word in ['grade', 'gpa', '3.7', 'curve', 'grading', 'canvas grade', 'final grade',
-                                     'points', 'rubric', 'criteria', 'requirement']):
-        return 'grade'
-    
-    # Academic Advising
-    if any(word in text for word in ['advisor', 'advising', 'counsel', 'academic advisor', 'contact', 'appointment',
-                                     'opt', 'stem', 'visa', 'international', 'study abroad', 'internship',
-                                     'transfer', 'credit']):
-        return 'advising'
-    
-    # Projects & Assignments
-    if any(word in text for word in ['project', 'assignment', 'deliverable', 'critique', 'submission', 'stool',
-                                     'cardboard', 'mockup', 'slide', 'deck', 'template', 'process', 'concept',
-                                     'photography', 'photo', 'cover', 'magazine', 'illustration', 'collage',
-                                     'photoshop', 'illustrator', 'printing', 'mounting', 'bleed', 'crop mark']):
-        return 'project'
-    
-    # Default to general
-    return 'general'
+from qa_tools.categorize import categorize_question
+from qa_tools.matching import DEFAULT_MIN_SCORE, match_all
+from qa_tools.parallel import default_workers
+from qa_tools.profiling import StageProfiler, add_profile_args
+from qa_tools.records import QARecord
+from qa_tools.report import REPORT_FORMATS, ReportWriter
+from qa_tools.sources import iter_db_questions
 
 def extract_questions_from_markdown(md_path):
     """Extract questions from Markdown file"""
@@ -65,10 +33,10 @@ def extract_questions_from_markdown(md_path):
         a_clean = re.sub(r'https?://[^\s]+', '', a_clean)
         a_clean = re.sub(r'\s+', ' ', a_clean).strip()
         
-        questions.append({
-            'question': q.strip(),
-            'answer': a_clean
-        })
+        questions.append(QARecord(
+            question=q.strip(),
+            answer=a_clean
+        ))
     
     # Also extract from lines ending with ?
     lines = content.split('\n')
@@ -87,10 +55,10 @@ def extract_questions_from_markdown(md_path):
                 answer_text = re.sub(r'\s+', ' ', answer_text).strip()
                 
                 if answer_text and len(answer_text) > 10:
-                    questions.append({
-                        'question': current_question,
-                        'answer': answer_text
-                    })
+                    questions.append(QARecord(
+                        question=current_question,
+                        answer=answer_text
+                    ))
                 current_question = None
                 current_answer = []
                 in_answer = False
@@ -104,10 +72,10 @@ def extract_questions_from_markdown(md_path):
                 answer_text = re.sub(r'\s+', ' ', answer_text).strip()
                 
                 if answer_text and len(answer_text) > 10:
-                    questions.append({
-                        'question': current_question,
-                        'answer': answer_text
-                    })
+                    questions.append(QARecord(
+                        question=current_question,
+                        answer=answer_text
+                    ))
             
             q_clean = re.sub(r'\*\*', '', line_stripped).strip()
             current_question = q_clean
@@ -122,10 +90,10 @@ def extract_questions_from_markdown(md_path):
                     answer_text = re.sub(r'\s+', ' ', answer_text).strip()
                     
                     if answer_text and len(answer_text) > 10:
-                        questions.append({
-                            'question': current_question,
-                            'answer': answer_text
-                        })
+                        questions.append(QARecord(
+                            question=current_question,
+                            answer=answer_text
+                        ))
                 current_question = None
                 current_answer = []
                 in_answer = False
@@ -141,10 +109,10 @@ def extract_questions_from_markdown(md_path):
         answer_text = re.sub(r'\s+', ' ', answer_text).strip()
         
         if answer_text and len(answer_text) > 10:
-            questions.append({
-                'question': current_question,
-                'answer': answer_text
-            })
+            questions.append(QARecord(
+                question=current_question,
+                answer=answer_text
+            ))
     
     # Remove duplicates
     seen = set()
@@ -157,81 +125,83 @@ def extract_questions_from_markdown(md_path):
     
     return unique_questions
 
-def load_existing_db():
-    """Load existing QA data from TypeScript file"""
-    db_path = Path(__file__).parent.parent / 'data' / 'qa-data.ts'
-    
-    if not db_path.exists():
-        return []
-    
-    with open(db_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    qa_items = []
-    pattern = r'\{\s*id:\s*(\d+),.*?category:\s*"([^"]+)",.*?question:\s*"([^"]+)",.*?answer:\s*"([^"]+)"'
-    matches = re.findall(pattern, content, re.DOTALL)
-    
-    for match in matches:
-        if len(match) >= 4:
-            qa_items.append({
-                'id': int(match[0]),
-                'category': match[1],
-                'question': match[2].replace('\\"', '"').replace('\\n', '\n'),
-                'answer': match[3].replace('\\"', '"').replace('\\n', '\n')
-            })
-    
-    return qa_items
+def iter_missing_questions(md_questions, db_questions, workers=1, min_score=DEFAULT_MIN_SCORE):
+    """Yield Markdown questions that have no match in the database"""
+    db_keys = list(dict.fromkeys(q.key for q in db_questions))
+    md_keys = [q.key for q in md_questions]
+    
+    # Same matching rules as compare-markdown-with-db.py
+    for md_q, (db_index, _, _) in zip(md_questions, match_all(md_keys, db_keys, workers, min_score)):
+        if db_index is None:
+            yield md_q
 
-def normalize_text(text):
-    """Normalize text for comparison"""
-    if not text:
-        return ""
-    text = re.sub(r'\s+', ' ', text.lower().strip())
-    text = re.sub(r'[^\w\s]', '', text)
-    return text
+def parse_args():
+    parser = argparse.ArgumentParser(description="Categorize Markdown questions missing from the database")
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='jsonl',
+                        help='Report format: streaming jsonl/csv rows, or the legacy text report')
+    parser.add_argument('--output', type=Path, default=None,
+                        help='Report path (default: scripts/categorized-missing-questions.<format>)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for the missing-question scan (0 = one per CPU)')
+    parser.add_argument('--min-score', type=float, default=DEFAULT_MIN_SCORE,
+                        help='Minimum edit similarity (0-1) for fuzzy and typo-level matches')
+    add_profile_args(parser)
+    return parser.parse_args()
 
-def main():
+def run(args, profiler):
     print("=" * 70)
     print("Categorizing Missing Questions from Markdown")
     print("=" * 70)
     
     md_path = Path(__file__).parent.parent / 'DES166 Questions.md'
-    output_path = Path(__file__).parent.parent / 'scripts' / 'categorized-missing-questions.txt'
+    extension = 'txt' if args.format == 'text' else args.format
+    output_path = args.output or Path(__file__).parent.parent / 'scripts' / f'categorized-missing-questions.{extension}'
     
     if not md_path.exists():
         print(f"Error: Markdown file not found at {md_path}")
         return
     
     print(f"\n1. Extracting questions from Markdown...")
-    md_questions = extract_questions_from_markdown(md_path)
+    with profiler.stage('extract_markdown'):
+        md_questions = extract_questions_from_markdown(md_path)
     print(f"   Found {len(md_questions)} questions")
     
     print("\n2. Loading existing database...")
-    db_questions = load_existing_db()
+    with profiler.stage('load_existing_db'):
+        db_questions = list(iter_db_questions())
+    profiler.record(source_questions=len(md_questions), db_questions=len(db_questions))
     print(f"   Found {len(db_questions)} questions in database")
     
     print("\n3. Finding missing questions...")
-    db_normalized = {normalize_text(q['question']): q for q in db_questions}
-    missing_questions = []
-    
-    for md_q in md_questions:
-        md_q_norm = normalize_text(md_q['question'])
-        found = False
-        for db_q_norm in db_normalized:
-            if md_q_norm == db_q_norm or md_q_norm in db_q_norm or db_q_norm in md_q_norm:
-                found = True
-                break
-        if not found:
-            missing_questions.append(md_q)
+    workers = args.workers or default_workers()
+    if args.format != 'text':
+        # Stream each missing question with its category as soon as it is found
+        category_counts = defaultdict(int)
+        with profiler.stage('find_and_categorize_missing'), ReportWriter(output_path, args.format) as writer:
+            for q in iter_missing_questions(md_questions, db_questions, workers, args.min_score):
+                category = categorize_question(q['question'], q.get('answer', ''))
+                category_counts[category] += 1
+                writer.write('missing', question=q['question'], answer=q.get('answer'), category=category)
+        
+        writer.print_summary("CATEGORIZED MISSING QUESTIONS SUMMARY", labels={'missing': 'Total Missing Questions'})
+        total = writer.counts['missing']
+        print("\n📊 SUMMARY BY CATEGORY:")
+        for category, count in sorted(category_counts.items(), key=lambda x: x[1], reverse=True):
+            percentage = (count / total * 100) if total else 0
+            print(f"   {category:25s}: {count:3d} questions ({percentage:5.1f}%)")
+        return
     
+    with profiler.stage('find_missing'):
+        missing_questions = list(iter_missing_questions(md_questions, db_questions, workers, args.min_score))
     print(f"   Found {len(missing_questions)} missing questions")
     
     print("\n4. Categorizing missing questions...")
     categorized = defaultdict(list)
     
-    for q in missing_questions:
-        category = categorize_question(q['question'], q.get('answer', ''))
-        categorized[category].append(q)
+    with profiler.stage('categorize'):
+        for q in missing_questions:
+            category = categorize_question(q['question'], q.get('answer', ''))
+            categorized[category].append(q)
     
     # Generate report
     report = []
@@ -247,8 +217,7 @@ def main():
         'major': 'Major Selection',
         'grade': 'Grades & Requirements',
         'advising': 'Academic Advising',
-        'project': 'Projects & Assignments',
-        'general': 'General/Other'
+        'project': 'Projects & Assignments'
     }
     
     # Sort categories by count
@@ -294,6 +263,11 @@ def main():
         percentage = (len(questions) / len(missing_questions) * 100) if missing_questions else 0
         print(f"   {category_display:25s}: {len(questions):3d} questions ({percentage:5.1f}%)")
 
+def main():
+    args = parse_args()
+    with StageProfiler.from_args(args) as profiler:
+        run(args, profiler)
+
 if __name__ == "__main__":
     main()
 
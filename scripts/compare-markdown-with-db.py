@@ -5,8 +5,16 @@ Script to extract questions from Markdown file and compare with existing databas
 
 import re
 import json
+import argparse
 from pathlib import Path
 
+from qa_tools.matching import DEFAULT_MIN_SCORE, match_all
+from qa_tools.parallel import default_workers
+from qa_tools.profiling import StageProfiler, add_profile_args
+from qa_tools.records import QARecord
+from qa_tools.report import REPORT_FORMATS, ReportWriter
+from qa_tools.sources import iter_db_questions
+
 def extract_questions_from_markdown(md_path):
     """Extract questions from Markdown file"""
     with open(md_path, 'r', encoding='utf-8') as f:
@@ -25,10 +33,10 @@ def extract_questions_from_markdown(md_path):
         a_clean = re.sub(r'https?://[^\s]+', '', a_clean)  # Remove standalone URLs
         a_clean = re.sub(r'\s+', ' ', a_clean).strip()
         
-        questions.append({
-            'question': q.strip(),
-            'answer': a_clean
-        })
+        questions.append(QARecord(
+            question=q.strip(),
+            answer=a_clean
+        ))
     
     # Pattern 2: Regular text questions ending with ?
     # Look for lines that end with ? and are likely questions
@@ -50,10 +58,10 @@ def extract_questions_from_markdown(md_path):
                 answer_text = re.sub(r'\s+', ' ', answer_text).strip()
                 
                 if answer_text and len(answer_text) > 10:
-                    questions.append({
-                        'question': current_question,
-                        'answer': answer_text
-                    })
+                    questions.append(QARecord(
+                        question=current_question,
+                        answer=answer_text
+                    ))
                 current_question = None
                 current_answer = []
                 in_answer = False
@@ -69,10 +77,10 @@ def extract_questions_from_markdown(md_path):
                 answer_text = re.sub(r'\s+', ' ', answer_text).strip()
                 
                 if answer_text and len(answer_text) > 10:
-                    questions.append({
-                        'question': current_question,
-                        'answer': answer_text
-                    })
+                    questions.append(QARecord(
+                        question=current_question,
+                        answer=answer_text
+                    ))
             
             # Extract question (remove ** markers if present)
             q_clean = re.sub(r'\*\*', '', line_stripped).strip()
@@ -91,10 +99,10 @@ def extract_questions_from_markdown(md_path):
                     answer_text = re.sub(r'\s+', ' ', answer_text).strip()
                     
                     if answer_text and len(answer_text) > 10:
-                        questions.append({
-                            'question': current_question,
-                            'answer': answer_text
-                        })
+                        questions.append(QARecord(
+                            question=current_question,
+                            answer=answer_text
+                        ))
                 current_question = None
                 current_answer = []
                 in_answer = False
@@ -113,120 +121,104 @@ def extract_questions_from_markdown(md_path):
         answer_text = re.sub(r'\s+', ' ', answer_text).strip()
         
         if answer_text and len(answer_text) > 10:
-            questions.append({
-                'question': current_question,
-                'answer': answer_text
-            })
+            questions.append(QARecord(
+                question=current_question,
+                answer=answer_text
+            ))
     
     # Remove duplicates based on normalized question text
     seen = set()
     unique_questions = []
     for q in questions:
-        q_norm = normalize_text(q['question'])
+        q_norm = q.key
         if q_norm not in seen and len(q['question']) > 10 and len(q.get('answer', '')) > 10:
             seen.add(q_norm)
             unique_questions.append(q)
     
     return unique_questions
 
-def load_existing_db():
-    """Load existing QA data from TypeScript file"""
-    db_path = Path(__file__).parent.parent / 'data' / 'qa-data.ts'
-    
-    if not db_path.exists():
-        return []
-    
-    with open(db_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    qa_items = []
-    
-    # Extract QA items using regex
-    # Pattern: { id: X, category: "...", question: "...", answer: "..." }
-    pattern = r'\{\s*id:\s*(\d+),.*?category:\s*"([^"]+)",.*?question:\s*"([^"]+)",.*?answer:\s*"([^"]+)"'
-    matches = re.findall(pattern, content, re.DOTALL)
-    
-    for match in matches:
-        if len(match) >= 4:
-            qa_items.append({
-                'id': int(match[0]),
-                'category': match[1],
-                'question': match[2].replace('\\"', '"').replace('\\n', '\n'),
-                'answer': match[3].replace('\\"', '"').replace('\\n', '\n')
-            })
-    
-    return qa_items
-
-def normalize_text(text):
-    """Normalize text for comparison"""
-    if not text:
-        return ""
-    # Remove extra whitespace, convert to lowercase
-    text = re.sub(r'\s+', ' ', text.lower().strip())
-    # Remove punctuation for fuzzy matching
-    text = re.sub(r'[^\w\s]', '', text)
-    return text
+def iter_comparison(md_questions, db_questions, workers=1, min_score=DEFAULT_MIN_SCORE):
+    """Yield ('match' | 'md_only' | 'db_only', item) as each result is found"""
+    md_normalized = {q.key: q for q in md_questions}
+    db_normalized = {q.key: q for q in db_questions}
+    md_keys = list(md_normalized)
+    db_keys = list(db_normalized)
+    
+    matches = match_all(md_keys, db_keys, workers, min_score)
+    matched_db = set()
+    for md_q_norm, (db_index, match_type, score) in zip(md_keys, matches):
+        md_q = md_normalized[md_q_norm]
+        if db_index is None:
+            yield 'md_only', md_q
+        else:
+            matched_db.add(db_index)
+            yield 'match', {
+                'md': md_q,
+                'db': db_normalized[db_keys[db_index]],
+                'match_type': match_type,
+                'score': score
+            }
+    
+    # DB-only questions: those no Markdown question matched above
+    for db_index, db_q_norm in enumerate(db_keys):
+        if db_index not in matched_db:
+            yield 'db_only', db_normalized[db_q_norm]
 
-def compare_questions(md_questions, db_questions):
+def compare_questions(md_questions, db_questions, workers=1, min_score=DEFAULT_MIN_SCORE):
     """Compare Markdown questions with database questions"""
-    md_normalized = {normalize_text(q['question']): q for q in md_questions}
-    db_normalized = {normalize_text(q['question']): q for q in db_questions}
-    
-    # Find matches
-    matches = []
-    md_only = []
-    db_only = []
-    
-    for md_q_norm, md_q in md_normalized.items():
-        found = False
-        for db_q_norm, db_q in db_normalized.items():
-            # Exact match
-            if md_q_norm == db_q_norm:
-                matches.append({
-                    'md': md_q,
-                    'db': db_q,
-                    'match_type': 'exact'
-                })
-                found = True
-                break
-            # Fuzzy match (one contains the other)
-            elif md_q_norm in db_q_norm or db_q_norm in md_q_norm:
-                if len(md_q_norm) > 20 and len(db_q_norm) > 20:
-                    matches.append({
-                        'md': md_q,
-                        'db': db_q,
-                        'match_type': 'fuzzy'
-                    })
-                    found = True
-                    break
-        
-        if not found:
-            md_only.append(md_q)
-    
-    # Find DB-only questions
-    for db_q_norm, db_q in db_normalized.items():
-        found = False
-        for md_q_norm in md_normalized:
-            if md_q_norm == db_q_norm or md_q_norm in db_q_norm or db_q_norm in md_q_norm:
-                found = True
-                break
-        if not found:
-            db_only.append(db_q)
-    
-    return {
-        'matches': matches,
-        'md_only': md_only,
-        'db_only': db_only
+    result = {
+        'matches': [],
+        'md_only': [],
+        'db_only': []
     }
+    for kind, item in iter_comparison(md_questions, db_questions, workers, min_score):
+        result['matches' if kind == 'match' else kind].append(item)
+    return result
 
-def main():
+def write_streaming_report(md_questions, db_questions, output_path, fmt, workers=1,
+                           min_score=DEFAULT_MIN_SCORE):
+    """Stream comparison rows to a JSONL/CSV file and print only a summary"""
+    with ReportWriter(output_path, fmt) as writer:
+        for kind, item in iter_comparison(md_questions, db_questions, workers, min_score):
+            if kind == 'match':
+                writer.write(kind, question=item['md']['question'], match_type=item['match_type'],
+                             score=round(item['score'], 3), db_id=item['db'].get('id'),
+                             db_question=item['db']['question'])
+            elif kind == 'md_only':
+                writer.write(kind, question=item['question'], answer=item.get('answer'))
+            else:
+                writer.write(kind, question=item['question'], db_id=item.get('id'),
+                             category=item.get('category'))
+    
+    writer.print_summary("MARKDOWN TO DATABASE COMPARISON SUMMARY", labels={
+        'match': 'Matched',
+        'md_only': 'Markdown Only (Missing in DB)',
+        'db_only': 'DB Only (Not in Markdown)',
+    })
+    return writer.counts
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare Markdown questions with the database")
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='jsonl',
+                        help='Report format: streaming jsonl/csv rows, or the legacy text report')
+    parser.add_argument('--output', type=Path, default=None,
+                        help='Report path (default: scripts/markdown-comparison-report.<format>)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for the comparison (0 = one per CPU)')
+    parser.add_argument('--min-score', type=float, default=DEFAULT_MIN_SCORE,
+                        help='Minimum edit similarity (0-1) for fuzzy and typo-level matches')
+    add_profile_args(parser)
+    return parser.parse_args()
+
+def run(args, profiler):
     print("=" * 70)
     print("Markdown to Database Comparison Tool")
     print("=" * 70)
     
     # Paths
     md_path = Path(__file__).parent.parent / 'DES166 Questions.md'
-    output_path = Path(__file__).parent.parent / 'scripts' / 'markdown-comparison-report.txt'
+    extension = 'txt' if args.format == 'text' else args.format
+    output_path = args.output or Path(__file__).parent.parent / 'scripts' / f'markdown-comparison-report.{extension}'
     
     if not md_path.exists():
         print(f"Error: Markdown file not found at {md_path}")
@@ -236,15 +228,32 @@ def main():
     print(f"   File size: {md_path.stat().st_size} bytes")
     
     print("\n2. Extracting questions from Markdown...")
-    md_questions = extract_questions_from_markdown(md_path)
+    with profiler.stage('extract_markdown'):
+        md_questions = extract_questions_from_markdown(md_path)
     print(f"   Found {len(md_questions)} questions in Markdown")
     
     print("\n3. Loading existing database...")
-    db_questions = load_existing_db()
+    with profiler.stage('load_existing_db'):
+        db_questions = list(iter_db_questions())
+    profiler.record(source_questions=len(md_questions), db_questions=len(db_questions))
     print(f"   Found {len(db_questions)} questions in database")
     
     print("\n4. Comparing questions...")
-    comparison = compare_questions(md_questions, db_questions)
+    workers = args.workers or default_workers()
+    if workers > 1:
+        print(f"   Using {workers} worker processes")
+    if args.format != 'text':
+        with profiler.stage('compare_questions'):
+            counts = write_streaming_report(md_questions, db_questions, output_path, args.format,
+                                            workers, args.min_score)
+        coverage = (counts['match'] / len(md_questions) * 100) if md_questions else 0
+        print(f"\n📊 SUMMARY:")
+        print(f"   Coverage: {coverage:.1f}% of Markdown questions are in database")
+        print(f"   Missing: {counts['md_only']} questions need to be added")
+        return
+    
+    with profiler.stage('compare_questions'):
+        comparison = compare_questions(md_questions, db_questions, workers, args.min_score)
     
     # Generate report
     report = []
@@ -285,7 +294,7 @@ def main():
     report.append(f"\nFound {len(comparison['matches'])} matching questions")
     for i, match in enumerate(comparison['matches'][:10], 1):  # Show first 10 matches
         report.append(f"\n{i}. {match['md']['question'][:80]}")
-        report.append(f"   Match type: {match['match_type']}")
+        report.append(f"   Match type: {match['match_type']} (score {match['score']:.2f})")
     
     # Print to console
     full_report = "\n".join(report)
@@ -311,6 +320,11 @@ def main():
     print(f"   Coverage: {coverage:.1f}% of Markdown questions are in database")
     print(f"   Missing: {len(comparison['md_only'])} questions need to be added")
 
+def main():
+    args = parse_args()
+    with StageProfiler.from_args(args) as profiler:
+        run(args, profiler)
+
 if __name__ == "__main__":
     main()
 
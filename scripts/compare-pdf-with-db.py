@@ -5,8 +5,16 @@ Script to extract questions from PDF and compare with existing database
 
 import re
 import json
+import argparse
 from pathlib import Path
 
+from qa_tools.matching import DEFAULT_MIN_SCORE, match_all
+from qa_tools.parallel import default_workers
+from qa_tools.profiling import StageProfiler, add_profile_args
+from qa_tools.records import QARecord
+from qa_tools.report import REPORT_FORMATS, ReportWriter
+from qa_tools.sources import iter_db_questions
+
 try:
     from pypdf import PdfReader
     PDF_AVAILABLE = True
@@ -52,10 +60,10 @@ def extract_questions_from_text(text):
         if line.endswith('?') or line.startswith('Q:') or line.startswith('Question:'):
             # Save previous Q&A if exists
             if current_question and current_answer:
-                questions.append({
-                    'question': current_question,
-                    'answer': current_answer.strip()
-                })
+                questions.append(QARecord(
+                    question=current_question,
+                    answer=current_answer.strip()
+                ))
             
             # Extract question
             if line.startswith('Q:') or line.startswith('Question:'):
@@ -72,10 +80,10 @@ def extract_questions_from_text(text):
     
     # Add last Q&A
     if current_question and current_answer:
-        questions.append({
-            'question': current_question,
-            'answer': current_answer.strip()
-        })
+        questions.append(QARecord(
+            question=current_question,
+            answer=current_answer.strip()
+        ))
     
     # Also try to find standalone questions
     question_pattern = r'([A-Z][^?]*\?)'
@@ -83,131 +91,103 @@ def extract_questions_from_text(text):
     for match in matches:
         match = match.strip()
         if len(match) > 10 and match not in [q['question'] for q in questions]:
-            questions.append({
-                'question': match,
-                'answer': ''  # Will need manual extraction
-            })
+            questions.append(QARecord(
+                question=match,
+                answer=''  # Will need manual extraction
+            ))
     
     return questions
 
-def load_existing_db():
-    """Load existing QA data from TypeScript file"""
-    db_path = Path(__file__).parent.parent / 'data' / 'qa-data.ts'
-    
-    if not db_path.exists():
-        return []
-    
-    with open(db_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Extract QA items using regex
-    qa_items = []
-    
-    # Pattern to match QA items
-    pattern = r'\{[^}]*id:\s*(\d+),[^}]*category:\s*"([^"]+)",[^}]*question:\s*"([^"]+)",[^}]*answer:\s*"([^"]+)"'
-    
-    # More flexible pattern
-    qa_blocks = re.findall(r'\{\s*id:\s*(\d+),.*?category:\s*"([^"]+)",.*?question:\s*"([^"]+)",.*?answer:\s*"([^"]+)"', content, re.DOTALL)
-    
-    for match in qa_blocks:
-        if len(match) >= 4:
-            qa_items.append({
-                'id': int(match[0]),
-                'category': match[1],
-                'question': match[2].replace('\\"', '"').replace('\\n', '\n'),
-                'answer': match[3].replace('\\"', '"').replace('\\n', '\n')
-            })
-    
-    # Alternative: extract by parsing more carefully
-    if not qa_items:
-        # Try to find question strings
-        question_pattern = r'question:\s*"([^"]+)"'
-        questions = re.findall(question_pattern, content)
-        for i, q in enumerate(questions):
-            qa_items.append({
-                'id': i + 1,
-                'question': q.replace('\\"', '"').replace('\\n', '\n')
-            })
-    
-    return qa_items
+def iter_comparison(pdf_questions, db_questions, workers=1, min_score=DEFAULT_MIN_SCORE):
+    """Yield ('match' | 'pdf_only' | 'db_only', item) as each result is found"""
+    pdf_normalized = {q.key: q for q in pdf_questions}
+    db_normalized = {q.key: q for q in db_questions}
+    pdf_keys = list(pdf_normalized)
+    db_keys = list(db_normalized)
+    
+    matches = match_all(pdf_keys, db_keys, workers, min_score)
+    matched_db = set()
+    for pdf_q_norm, (db_index, match_type, score) in zip(pdf_keys, matches):
+        pdf_q = pdf_normalized[pdf_q_norm]
+        if db_index is None:
+            yield 'pdf_only', pdf_q
+        else:
+            matched_db.add(db_index)
+            yield 'match', {
+                'pdf': pdf_q,
+                'db': db_normalized[db_keys[db_index]],
+                'match_type': match_type,
+                'score': score
+            }
+    
+    # DB-only questions: those no PDF question matched above
+    for db_index, db_q_norm in enumerate(db_keys):
+        if db_index not in matched_db:
+            yield 'db_only', db_normalized[db_q_norm]
 
-def normalize_text(text):
-    """Normalize text for comparison"""
-    if not text:
-        return ""
-    # Remove extra whitespace, convert to lowercase
-    text = re.sub(r'\s+', ' ', text.lower().strip())
-    # Remove punctuation for fuzzy matching
-    text = re.sub(r'[^\w\s]', '', text)
-    return text
-
-def compare_questions(pdf_questions, db_questions):
+def compare_questions(pdf_questions, db_questions, workers=1, min_score=DEFAULT_MIN_SCORE):
     """Compare PDF questions with database questions"""
-    pdf_normalized = {normalize_text(q['question']): q for q in pdf_questions}
-    db_normalized = {normalize_text(q['question']): q for q in db_questions}
-    
-    # Find matches
-    matches = []
-    pdf_only = []
-    db_only = []
-    
-    for pdf_q_norm, pdf_q in pdf_normalized.items():
-        found = False
-        for db_q_norm, db_q in db_normalized.items():
-            # Exact match
-            if pdf_q_norm == db_q_norm:
-                matches.append({
-                    'pdf': pdf_q,
-                    'db': db_q,
-                    'match_type': 'exact'
-                })
-                found = True
-                break
-            # Fuzzy match (similarity > 80%)
-            elif pdf_q_norm in db_q_norm or db_q_norm in pdf_q_norm:
-                if len(pdf_q_norm) > 20 and len(db_q_norm) > 20:
-                    matches.append({
-                        'pdf': pdf_q,
-                        'db': db_q,
-                        'match_type': 'fuzzy'
-                    })
-                    found = True
-                    break
-        
-        if not found:
-            pdf_only.append(pdf_q)
-    
-    # Find DB-only questions
-    for db_q_norm, db_q in db_normalized.items():
-        found = False
-        for pdf_q_norm in pdf_normalized:
-            if pdf_q_norm == db_q_norm or pdf_q_norm in db_q_norm or db_q_norm in pdf_q_norm:
-                found = True
-                break
-        if not found:
-            db_only.append(db_q)
-    
-    return {
-        'matches': matches,
-        'pdf_only': pdf_only,
-        'db_only': db_only
+    result = {
+        'matches': [],
+        'pdf_only': [],
+        'db_only': []
     }
+    for kind, item in iter_comparison(pdf_questions, db_questions, workers, min_score):
+        result['matches' if kind == 'match' else kind].append(item)
+    return result
 
-def main():
+def write_streaming_report(pdf_questions, db_questions, output_path, fmt, workers=1,
+                           min_score=DEFAULT_MIN_SCORE):
+    """Stream comparison rows to a JSONL/CSV file and print only a summary"""
+    with ReportWriter(output_path, fmt) as writer:
+        for kind, item in iter_comparison(pdf_questions, db_questions, workers, min_score):
+            if kind == 'match':
+                writer.write(kind, question=item['pdf']['question'], match_type=item['match_type'],
+                             score=round(item['score'], 3), db_id=item['db'].get('id'),
+                             db_question=item['db']['question'])
+            elif kind == 'pdf_only':
+                writer.write(kind, question=item['question'], answer=item.get('answer'))
+            else:
+                writer.write(kind, question=item['question'], db_id=item.get('id'),
+                             category=item.get('category'))
+    
+    writer.print_summary("PDF TO DATABASE COMPARISON SUMMARY", labels={
+        'match': 'Matched',
+        'pdf_only': 'PDF Only (Missing in DB)',
+        'db_only': 'DB Only (Not in PDF)',
+    })
+    return writer.counts
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare PDF questions with the database")
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='jsonl',
+                        help='Report format: streaming jsonl/csv rows, or the legacy text report')
+    parser.add_argument('--output', type=Path, default=None,
+                        help='Report path (default: scripts/comparison-report.<format>)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for the comparison (0 = one per CPU)')
+    parser.add_argument('--min-score', type=float, default=DEFAULT_MIN_SCORE,
+                        help='Minimum edit similarity (0-1) for fuzzy and typo-level matches')
+    add_profile_args(parser)
+    return parser.parse_args()
+
+def run(args, profiler):
     print("=" * 70)
     print("PDF to Database Comparison Tool")
     print("=" * 70)
     
     # Paths
     pdf_path = Path(__file__).parent.parent / 'DES166 Questions (1).pdf'
-    output_path = Path(__file__).parent.parent / 'scripts' / 'comparison-report.txt'
+    extension = 'txt' if args.format == 'text' else args.format
+    output_path = args.output or Path(__file__).parent.parent / 'scripts' / f'comparison-report.{extension}'
     
     if not pdf_path.exists():
         print(f"Error: PDF file not found at {pdf_path}")
         return
     
     print(f"\n1. Extracting text from PDF: {pdf_path.name}")
-    pdf_text = extract_text_from_pdf(pdf_path)
+    with profiler.stage('extract_text_from_pdf'):
+        pdf_text = extract_text_from_pdf(pdf_path)
     
     if not pdf_text:
         print("   Failed to extract text from PDF")
@@ -216,15 +196,32 @@ def main():
     print(f"   Extracted {len(pdf_text)} characters")
     
     print("\n2. Extracting questions from PDF text...")
-    pdf_questions = extract_questions_from_text(pdf_text)
+    with profiler.stage('extract_questions_from_text'):
+        pdf_questions = extract_questions_from_text(pdf_text)
     print(f"   Found {len(pdf_questions)} questions in PDF")
     
     print("\n3. Loading existing database...")
-    db_questions = load_existing_db()
+    with profiler.stage('load_existing_db'):
+        db_questions = list(iter_db_questions())
+    profiler.record(source_questions=len(pdf_questions), db_questions=len(db_questions))
     print(f"   Found {len(db_questions)} questions in database")
     
     print("\n4. Comparing questions...")
-    comparison = compare_questions(pdf_questions, db_questions)
+    workers = args.workers or default_workers()
+    if workers > 1:
+        print(f"   Using {workers} worker processes")
+    if args.format != 'text':
+        with profiler.stage('compare_questions'):
+            counts = write_streaming_report(pdf_questions, db_questions, output_path, args.format,
+                                            workers, args.min_score)
+        coverage = (counts['match'] / len(pdf_questions) * 100) if pdf_questions else 0
+        print(f"\n📊 SUMMARY:")
+        print(f"   Coverage: {coverage:.1f}% of PDF questions are in database")
+        print(f"   Missing: {counts['pdf_only']} questions need to be added")
+        return
+    
+    with profiler.stage('compare_questions'):
+        comparison = compare_questions(pdf_questions, db_questions, workers, args.min_score)
     
     # Generate report
     report = []
@@ -280,6 +277,11 @@ def main():
     print(f"\n\nReport saved to: {output_path}")
     print("\n" + "=" * 70)
 
+def main():
+    args = parse_args()
+    with StageProfiler.from_args(args) as profiler:
+        run(args, profiler)
+
 if __name__ == "__main__":
     main()
 
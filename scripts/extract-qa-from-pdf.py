@@ -12,6 +12,9 @@ Usage:
 import re
 import json
 
+from qa_tools.categorize import categorize_question
+from qa_tools.keywords import extract_corpus_keywords
+
 def parse_pdf_text(file_path):
     """
     Parse the PDF text and extract QA pairs
@@ -48,7 +51,7 @@ def parse_pdf_text(file_path):
             urls = re.findall(r'https?://[^\s]+', answer)
             
             # Try to categorize based on keywords
-            category = categorize_question(question + ' ' + answer)
+            category = categorize_question(question, answer)
             
             qa_item = {
                 'id': id_counter,
@@ -56,58 +59,29 @@ def parse_pdf_text(file_path):
                 'question': question,
                 'answer': answer,
                 'links': urls if urls else None,
-                'keywords': extract_keywords(question + ' ' + answer)
             }
             
             qa_items.append(qa_item)
             id_counter += 1
     
-    return qa_items
-
-def categorize_question(text):
-    """Categorize based on keywords"""
-    text_lower = text.lower()
+    # Keywords need statistics from the whole corpus, so score them in one batch
+    for qa_item, keywords in zip(qa_items, extract_corpus_keywords(qa_items)):
+        qa_item['keywords'] = keywords
     
-    if any(word in text_lower for word in ['application', 'apply', 'admission', 'admit']):
-        return 'application'
-    elif any(word in text_lower for word in ['portfolio', 'work sample', 'showcase']):
-        return 'portfolio'
-    elif any(word in text_lower for word in ['major', 'vcd', 'ixd', 'industrial design']):
-        return 'major'
-    elif any(word in text_lower for word in ['grade', 'gpa', '3.7', 'curve']):
-        return 'grade'
-    elif any(word in text_lower for word in ['advisor', 'advising', 'counsel']):
-        return 'advising'
-    elif any(word in text_lower for word in ['project', 'assignment', 'deliverable']):
-        return 'project'
-    else:
-        return 'general'
-
-def extract_keywords(text):
-    """Extract potential keywords"""
-    # Simple word frequency approach
-    words = re.findall(r'\b[a-z]{4,}\b', text.lower())
-    common_words = {'that', 'this', 'with', 'from', 'have', 'will', 'what', 'when', 'where', 'which', 'their', 'there', 'about', 'would', 'could', 'should'}
-    
-    word_freq = {}
-    for word in words:
-        if word not in common_words:
-            word_freq[word] = word_freq.get(word, 0) + 1
-    
-    # Return top keywords
-    keywords = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:5]
-    return [k[0] for k in keywords]
+    return qa_items
 
 def convert_to_typescript(qa_items):
     """Convert parsed QA items to TypeScript format"""
     
     output = []
     for item in qa_items:
+        question = item['question'].replace('"', '\\"')
+        answer = item['answer'].replace('"', '\\"')
         ts_item = f"""  {{
     id: {item['id']},
     category: "{item['category']}",
-    question: "{item['question'].replace('"', '\\"')}",
-    answer: "{item['answer'].replace('"', '\\"')}","""
+    question: "{question}",
+    answer: "{answer}","""
         
         if item.get('links'):
             links = '", "'.join(item['links'])
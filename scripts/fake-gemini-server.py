@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Script to run a local stand-in for the Gemini generateContent API
+
+Point the app at it with GEMINI_BASE_URL=http://127.0.0.1:8166 (and any
+GEMINI_API_KEY other than the placeholder) to load test /api/chat without
+network access or quota. Every call sleeps for a latency drawn from
+--latency (or a per-model override), then fails or answers:
+  - 503 "The model is overloaded" with --overload-rate, or whenever more
+    than --capacity calls are in flight (what the model fallback chain and
+    upstream shedding react to)
+  - 429 quota exhausted with --rate-limit-rate
+  - 500 internal error with --error-rate
+  - otherwise a canned plain-text answer of --response-words words
+
+GET /<version>/models/<model> answers with model metadata, as the app's
+GEMINI_WARM_UP request expects. --connect-latency delays the first response
+on every new connection, standing in for the DNS, TCP and TLS round trips
+a real endpoint costs, so connection reuse shows up in the latencies.
+
+GET /stats returns calls, outcomes, latency percentiles per model and
+connections opened; POST /reset clears them. load-test.py reads both.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from qa_tools.loadtest import DISTRIBUTIONS, LatencyModel, summarize
+
+GENERATE_RE = re.compile(r'^/[^/]+/models/([^/:]+):generateContent$')
+MODEL_RE = re.compile(r'^/[^/]+/models/([^/:]+)$')
+
+ERRORS = {
+    'overloaded': (503, 'UNAVAILABLE', 'The model is overloaded. Please try again later.'),
+    'rate_limit': (429, 'RESOURCE_EXHAUSTED', 'Resource has been exhausted (e.g. check quota).'),
+    'error': (500, 'INTERNAL', 'An internal error has occurred.'),
+}
+
+FILLER = ('Based on the course FAQ, you can find this information on the DES166 Canvas page '
+          'and your academic advisor can help with anything that is not covered there').split()
+
+class FakeGemini:
+    """Failure injection, capacity and per-model statistics, shared by all handler threads"""
+
+    def __init__(self, args):
+        self.args = args
+        self.latency = LatencyModel(args.latency)
+        self.model_latency = {model: LatencyModel(spec) for model, spec in args.model_latency}
+        self.model_overload = dict(args.model_overload)
+        self.lock = threading.Lock()
+        self.rng = random.Random(args.seed)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.in_flight = 0
+            self.peak_in_flight = 0
+            self.connections = 0
+            self.metadata_requests = 0
+            self.outcomes = defaultdict(Counter)
+            self.latencies = defaultdict(list)
+            self.started = time.time()
+
+    def admit(self, model):
+        """Draw this call's latency and fate; None means success"""
+        with self.lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            latency = self.model_latency.get(model, self.latency).sample(self.rng)
+            roll = self.rng.random()
+            over_capacity = self.args.capacity and self.in_flight > self.args.capacity
+        overload = self.model_overload.get(model, self.args.overload_rate)
+        if over_capacity or roll < overload:
+            return latency, 'overloaded'
+        roll -= overload
+        if roll < self.args.rate_limit_rate:
+            return latency, 'rate_limit'
+        if roll < self.args.rate_limit_rate + self.args.error_rate:
+            return latency, 'error'
+        return latency, None
+
+    def finish(self, model, outcome, seconds):
+        with self.lock:
+            self.in_flight -= 1
+            self.outcomes[model][outcome or 'success'] += 1
+            self.latencies[model].append(seconds)
+
+    def connected(self):
+        with self.lock:
+            self.connections += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'uptime': time.time() - self.started,
+                'inFlight': self.in_flight,
+                'peakInFlight': self.peak_in_flight,
+                'connections': self.connections,
+                'metadataRequests': self.metadata_requests,
+                'models': {
+                    model: {'outcomes': dict(self.outcomes[model]), 'latency': summarize(self.latencies[model])}
+                    for model in self.outcomes
+                },
+            }
+
+    def answer(self, prompt):
+        words = [FILLER[i % len(FILLER)] for i in range(self.args.response_words)]
+        return ' '.join(words) + '.'
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; don't let Nagle hold the body back
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            fake.connected()
+            # Paid once per connection, before its first request is read
+            self.handshake = fake.args.connect_latency / 1000
+
+        def handle_one_request(self):
+            if self.handshake:
+                time.sleep(self.handshake)
+                self.handshake = 0
+            super().handle_one_request()
+
+        def log_message(self, format, *args):
+            if fake.args.verbose:
+                super().log_message(format, *args)
+
+        def send_json(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def read_body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return self.rfile.read(length) if length else b''
+
+        def do_GET(self):
+            match = MODEL_RE.match(self.path.split('?')[0])
+            if self.path == '/stats':
+                self.send_json(200, fake.stats())
+            elif match:
+                with fake.lock:
+                    fake.metadata_requests += 1
+                model = match.group(1)
+                self.send_json(200, {
+                    'name': f'models/{model}',
+                    'displayName': model,
+                    'inputTokenLimit': 1048576,
+                    'outputTokenLimit': 8192,
+                    'supportedGenerationMethods': ['generateContent', 'countTokens'],
+                })
+            else:
+                self.send_json(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+
+        def do_POST(self):
+            body = self.read_body()
+            if self.path == '/reset':
+                fake.reset()
+                self.send_json(200, {'ok': True})
+                return
+            match = GENERATE_RE.match(self.path.split('?')[0])
+            if not match:
+                self.send_json(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+                return
+
+            model = match.group(1)
+            started = time.perf_counter()
+            latency, outcome = fake.admit(model)
+            try:
+                time.sleep(latency)
+                if outcome:
+                    code, status, message = ERRORS[outcome]
+                    self.send_json(code, {'error': {'code': code, 'message': message, 'status': status}})
+                    return
+                try:
+                    request = json.loads(body or b'{}')
+                    prompt = request['contents'][0]['parts'][0]['text']
+                except (ValueError, KeyError, IndexError, TypeError):
+                    prompt = ''
+                text = fake.answer(prompt)
+                self.send_json(200, {
+                    'candidates': [{
+                        'content': {'parts': [{'text': text}], 'role': 'model'},
+                        'finishReason': 'STOP',
+                        'index': 0,
+                    }],
+                    'usageMetadata': {
+                        'promptTokenCount': len(prompt) // 4,
+                        'candidatesTokenCount': len(text) // 4,
+                        'totalTokenCount': (len(prompt) + len(text)) // 4,
+                    },
+                    'modelVersion': model,
+                })
+            finally:
+                fake.finish(model, outcome, time.perf_counter() - started)
+
+    return Handler
+
+def model_option(value):
+    """'gemini-2.5-flash=lognormal:1500:0.6' -> (model, value)"""
+    model, sep, rest = value.partition('=')
+    if not sep or not model or not rest:
+        raise argparse.ArgumentTypeError(f"expected MODEL=VALUE, got {value!r}")
+    return model, rest
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8166)
+    parser.add_argument('--latency', default='lognormal:800:0.5',
+                        help=f"Latency in ms for every model: {' | '.join(DISTRIBUTIONS)} with parameters, "
+                             "e.g. fixed:500, uniform:200:1200, exponential:600, lognormal:800:0.5")
+    parser.add_argument('--model-latency', type=model_option, action='append', default=[],
+                        metavar='MODEL=SPEC', help='Latency for one model (repeatable)')
+    parser.add_argument('--overload-rate', type=float, default=0.0,
+                        help='Share of calls answered 503 overloaded')
+    parser.add_argument('--model-overload', type=model_option, action='append', default=[],
+                        metavar='MODEL=RATE', help='Overload rate for one model (repeatable)')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                        help='Share of calls answered 429 quota exhausted')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Share of calls answered 500 internal error')
+    parser.add_argument('--capacity', type=int, default=0,
+                        help='Calls in flight beyond this are answered 503 overloaded (0: unlimited)')
+    parser.add_argument('--connect-latency', type=float, default=0.0,
+                        help='Extra ms before the first response on each new connection (handshake cost)')
+    parser.add_argument('--response-words', type=int, default=120,
+                        help='Length of the canned answer')
+    parser.add_argument('--seed', type=int, default=166)
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+    try:
+        LatencyModel(args.latency)
+        for _, spec in args.model_latency:
+            LatencyModel(spec)
+        args.model_overload = [(model, float(rate)) for model, rate in args.model_overload]
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+def main():
+    args = parse_args()
+    fake = FakeGemini(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(fake))
+    server.daemon_threads = True
+
+    print("=" * 70)
+    print("Fake Gemini API")
+    print("=" * 70)
+    print(f"   Listening on: http://{args.host}:{args.port}")
+    print(f"   Latency: {fake.latency}" + ''.join(f", {m}: {l}" for m, l in fake.model_latency.items()))
+    print(f"   Overloaded: {args.overload_rate:.1%}" + ''.join(f", {m}: {r:.1%}" for m, r in fake.model_overload.items()))
+    print(f"   Rate limited: {args.rate_limit_rate:.1%}   Errors: {args.error_rate:.1%}   "
+          f"Capacity: {args.capacity or 'unlimited'}   Connect latency: {args.connect_latency:g} ms")
+    print(f"\n   Start the app with GEMINI_BASE_URL=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    stats = fake.stats()
+    print("\n" + "=" * 70)
+    print("📊 SUMMARY:")
+    print(f"   Peak calls in flight: {stats['peakInFlight']}")
+    print(f"   Connections opened: {stats['connections']}   Metadata requests: {stats['metadataRequests']}")
+    for model, entry in sorted(stats['models'].items()):
+        outcomes = ', '.join(f"{k}: {v}" for k, v in sorted(entry['outcomes'].items()))
+        print(f"   {model}: {outcomes}")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Script to load test /api/chat and /api/qa and report capacity
+
+Requests are drawn from qa-data.ts (see qa_tools/loadtest.py for the
+query kinds) and sent from --clients simulated users, each with its own
+X-Forwarded-For address and chat conversation (the app must run with the
+default TRUSTED_PROXY_HOPS=1 and no proxy in between, so that address is
+the one it trusts). Two ways to apply load:
+  - closed loop (--concurrency N): N users send back to back, which finds
+    the throughput the app sustains
+  - open loop (--rate R): requests arrive at R per second (Poisson)
+    whether or not earlier ones finished, which shows latency at a given
+    traffic level. Latency counts from the scheduled arrival, so a stalled
+    server can't hide its queueing delay.
+
+Run it against `npm run dev` or `npm start` with GEMINI_BASE_URL pointing
+at scripts/fake-gemini-server.py. The report gives throughput, latency
+percentiles and error rates per route and outcome (FAQ fast path, model
+answer, degraded FAQ answer and why, error), plus how the model fallback
+chain behaved, from /api/metrics deltas and the fake server's /stats.
+/api/metrics needs the app's METRICS_TOKEN (or QA_ADMIN_TOKEN), taken
+from --metrics-token or the same environment variables.
+
+Admission control (CHAT_*_RATE_PER_MINUTE etc. in .env.example) sheds
+anything beyond its limits; raise them to measure raw capacity.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from qa_tools.loadtest import (CHAT_KINDS, QA_KINDS, QueryMix, metric_deltas, parse_metrics,
+                               parse_weights, summarize)
+from qa_tools.profiling import StageProfiler, add_profile_args
+from qa_tools.sources import DB_PATH, iter_db_questions
+
+ROUTES = ('chat', 'qa')
+
+class Client:
+    """Keep-alive HTTP connection per thread to one base URL"""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == 'https'
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            factory = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self.local.conn = factory(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def request(self, method, path, body=None, headers=None):
+        """(status, parsed JSON body or None); reconnects once on a dropped keep-alive"""
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = dict(headers or {})
+        if data is not None:
+            headers['Content-Type'] = 'application/json'
+        for attempt in (0, 1):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                response = conn.getresponse()
+                raw = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                self.local.conn = None
+                if attempt:
+                    raise
+            except Exception:
+                conn.close()
+                self.local.conn = None
+                raise
+        try:
+            parsed = json.loads(raw) if raw else None
+        except ValueError:
+            parsed = None
+        return response.status, parsed
+
+    def text(self, path, headers=None):
+        conn = self._connection()
+        try:
+            conn.request('GET', path, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, response.read().decode('utf-8', 'replace')
+        except Exception:
+            conn.close()
+            self.local.conn = None
+            raise
+
+class LoadGenerator:
+    """Builds one request at a time and records what happened to it"""
+
+    def __init__(self, args, mix):
+        self.args = args
+        self.mix = mix
+        self.route_weights = parse_weights(args.mix, ROUTES)
+        self.client = Client(args.url, args.timeout)
+        self.conversations = [str(uuid.uuid4()) for _ in range(args.clients)]
+        self.lock = threading.Lock()
+        self.results = []
+        self.dropped = 0
+        self.in_flight = 0
+
+    def route(self, rng):
+        total = sum(self.route_weights.values())
+        x = rng.random() * total
+        for name, weight in self.route_weights.items():
+            if x < weight:
+                return name
+            x -= weight
+        return name
+
+    def send(self, rng, scheduled=None):
+        """One request; latency counts from `scheduled` when given (open loop)"""
+        user = rng.randrange(self.args.clients)
+        headers = {'X-Forwarded-For': f'10.166.{user // 256}.{user % 256}'}
+        route = self.route(rng)
+        kind = '?'
+        started = time.perf_counter()
+        try:
+            if route == 'chat':
+                kind, message = self.mix.chat_message(rng)
+                body = {'message': message, 'conversationId': self.conversations[user]}
+                status, response = self.client.request('POST', '/api/chat', body, headers)
+                outcome = chat_outcome(status, response)
+            else:
+                kind, path = self.mix.qa_path(rng)
+                status, response = self.client.request('GET', path, headers=headers)
+                outcome = 'ok' if status == 200 else 'error'
+        except Exception as e:
+            status, outcome = 0, f'transport:{type(e).__name__}'
+        finished = time.perf_counter()
+        with self.lock:
+            self.results.append((route, kind, outcome, status, started, finished - (scheduled or started)))
+
+def chat_outcome(status, body):
+    """Which path answered a chat request, from its response"""
+    body = body if isinstance(body, dict) else {}
+    if status == 200:
+        if body.get('faq'):
+            return 'faq'
+        if body.get('degraded'):
+            return f"degraded:{body['degraded']}"
+        return 'model'
+    if body.get('degraded'):
+        return f"shed:{body['degraded']}"
+    return 'error'
+
+def run_closed_loop(generator, args, deadline):
+    def user_loop(worker):
+        rng = random.Random(args.seed + worker)
+        while time.perf_counter() < deadline:
+            generator.send(rng)
+
+    threads = [threading.Thread(target=user_loop, args=(i,), daemon=True) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def run_open_loop(generator, args, deadline):
+    rng = random.Random(args.seed)
+    # Each request gets its own seed so results don't depend on thread timing
+    seeds = random.Random(args.seed + 1)
+
+    def task(seed, scheduled):
+        try:
+            generator.send(random.Random(seed), scheduled)
+        finally:
+            with generator.lock:
+                generator.in_flight -= 1
+
+    with ThreadPoolExecutor(max_workers=args.max_in_flight) as pool:
+        next_arrival = time.perf_counter()
+        while True:
+            next_arrival += rng.expovariate(args.rate)
+            if next_arrival >= deadline:
+                break
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            with generator.lock:
+                if generator.in_flight >= args.max_in_flight:
+                    # The generator itself is saturated; count it rather than queue forever
+                    generator.dropped += 1
+                    continue
+                generator.in_flight += 1
+            pool.submit(task, seeds.getrandbits(32), next_arrival)
+
+def snapshot_metrics(client, token):
+    try:
+        status, text = client.text('/api/metrics', {'Authorization': f'Bearer {token}'} if token else None)
+        return parse_metrics(text, ('chat_', 'process_event_loop_')) if status == 200 else None
+    except Exception:
+        return None
+
+def fake_gemini(url, method, path):
+    """JSON from the fake Gemini server, or None if it isn't reachable"""
+    try:
+        status, body = Client(url, 5).request(method, path)
+        return body if status == 200 else None
+    except Exception:
+        return None
+
+def build_report(generator, args, measured_from, finished, before, after, upstream):
+    measured = [r for r in generator.results if r[4] >= measured_from]
+    window = max(finished - measured_from, 1e-9)
+
+    by_route = defaultdict(list)
+    by_outcome = defaultdict(list)
+    by_kind = defaultdict(Counter)
+    statuses = Counter()
+    for route, kind, outcome, status, _, latency in measured:
+        by_route[route].append(latency)
+        by_outcome[(route, outcome)].append(latency)
+        by_kind[(route, kind)][outcome] += 1
+        statuses[f'{route}:{status}'] += 1
+
+    failed = Counter(route for route, _, outcome, *_ in measured
+                     if outcome == 'error' or outcome.startswith(('transport', 'shed')))
+    report = {
+        'config': {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        'mode': 'open' if args.rate else 'closed',
+        'seconds': window,
+        'requests': len(measured),
+        'throughput': len(measured) / window,
+        'droppedByGenerator': generator.dropped,
+        'routes': {
+            route: dict(summarize(latencies), throughput=len(latencies) / window,
+                        errorRate=failed[route] / len(latencies))
+            for route, latencies in sorted(by_route.items())
+        },
+        'outcomes': {
+            f'{route} {outcome}': dict(summarize(latencies), share=len(latencies) / len(by_route[route]))
+            for (route, outcome), latencies in sorted(by_outcome.items())
+        },
+        'kinds': {f'{route} {kind}': dict(counts) for (route, kind), counts in sorted(by_kind.items())},
+        'statuses': dict(sorted(statuses.items())),
+    }
+    if before is not None and after is not None:
+        report['fallbackChain'] = {
+            'attempts': metric_deltas(before, after, 'chat_model_attempts_total'),
+            'fallbacks': metric_deltas(before, after, 'chat_model_fallbacks_total'),
+            'shed': metric_deltas(before, after, 'chat_shed_total'),
+            'errors': metric_deltas(before, after, 'chat_errors_total'),
+        }
+        # A gauge over the app's last few seconds, i.e. the end of the run
+        report['eventLoopLag'] = {
+            dict(labels).get('quantile'): value for (metric, labels), value in after.items()
+            if metric == 'process_event_loop_lag_seconds'
+        }
+    if upstream is not None:
+        report['upstream'] = upstream
+    return report
+
+def print_report(report):
+    ms = lambda seconds: f'{seconds * 1000:8.1f}'
+    print("\n" + "=" * 70)
+    print("📊 SUMMARY:")
+    print(f"   Mode: {report['mode']} loop   Window: {report['seconds']:.1f}s   "
+          f"Requests: {report['requests']}   Throughput: {report['throughput']:.1f} req/s")
+    if report['droppedByGenerator']:
+        print(f"   ⚠️  {report['droppedByGenerator']} arrivals dropped: raise --max-in-flight")
+
+    print(f"\n   {'route / outcome':34s} {'count':>6s} {'share':>6s} {'p50 ms':>8s} {'p90 ms':>8s} "
+          f"{'p99 ms':>8s} {'max ms':>8s}")
+    for route, entry in report['routes'].items():
+        print(f"   {route:34s} {entry['count']:6d} {'':>6s} {ms(entry['p50'])} {ms(entry['p90'])} "
+              f"{ms(entry['p99'])} {ms(entry['max'])}")
+        print(f"     {entry['throughput']:.1f} req/s, {entry['errorRate']:.1%} failed")
+        for name, outcome in report['outcomes'].items():
+            if name.split(' ', 1)[0] != route:
+                continue
+            print(f"     {name.split(' ', 1)[1]:32s} {outcome['count']:6d} {outcome['share']:6.1%} "
+                  f"{ms(outcome['p50'])} {ms(outcome['p90'])} {ms(outcome['p99'])} {ms(outcome['max'])}")
+
+    print("\n   Outcomes by query kind:")
+    for name, counts in report['kinds'].items():
+        total = sum(counts.values())
+        parts = ', '.join(f"{outcome} {count / total:.0%}" for outcome, count in
+                          sorted(counts.items(), key=lambda item: -item[1]))
+        print(f"     {name:22s} {total:6d}  {parts}")
+    print(f"\n   Status codes: {', '.join(f'{k} x{v}' for k, v in report['statuses'].items())}")
+
+    chain = report.get('fallbackChain')
+    if chain:
+        print("\n   Fallback chain (from /api/metrics):")
+        for section in ('attempts', 'fallbacks', 'shed', 'errors'):
+            values = sorted(chain[section].items()) or [('none', None)]
+            for i, (labels, value) in enumerate(values):
+                print(f"     {section if i == 0 else '':10s} {labels}" + (f": {value:g}" if value is not None else ''))
+    else:
+        print("\n   Fallback chain: /api/metrics not reachable (is --metrics-token set?)")
+    lag = report.get('eventLoopLag')
+    if lag:
+        print(f"   Event-loop lag, last window: p50 {ms(lag.get('0.5', 0)).strip()} ms, "
+              f"p99 {ms(lag.get('0.99', 0)).strip()} ms, max {ms(lag.get('1', 0)).strip()} ms")
+
+    upstream = report.get('upstream')
+    if upstream:
+        print(f"\n   Fake Gemini (peak {upstream['peakInFlight']} calls in flight, "
+              f"{upstream.get('connections', 0)} connections opened):")
+        for model, entry in sorted(upstream['models'].items()):
+            outcomes = ', '.join(f"{k}: {v}" for k, v in sorted(entry['outcomes'].items()))
+            print(f"     {model:22s} {outcomes}   p50 {ms(entry['latency']['p50']).strip()} ms, "
+                  f"p99 {ms(entry['latency']['p99']).strip()} ms")
+    print("=" * 70)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--url', default='http://localhost:3011', help='Base URL of the running app')
+    parser.add_argument('--db', type=Path, default=DB_PATH, help='qa-data.ts to draw queries from')
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument('--concurrency', type=int, default=8,
+                      help='Closed loop: simulated users sending back to back')
+    load.add_argument('--rate', type=float, default=None,
+                      help='Open loop: Poisson arrivals per second (overrides --concurrency)')
+    parser.add_argument('--max-in-flight', type=int, default=256,
+                        help='Open loop: cap on outstanding requests; later arrivals are dropped')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of load, warmup included')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds left out of the report')
+    parser.add_argument('--clients', type=int, default=50,
+                        help='Distinct client addresses and conversations')
+    parser.add_argument('--mix', default='chat=0.7,qa=0.3', help='Route weights')
+    parser.add_argument('--chat-mix', default='faq=0.3,keywords=0.3,typo=0.2,followup=0.1,offtopic=0.1',
+                        help=f"Chat query kind weights ({', '.join(CHAT_KINDS)})")
+    parser.add_argument('--qa-mix', default='all=0.1,category=0.5,featured=0.2,related=0.2',
+                        help=f"/api/qa request weights ({', '.join(QA_KINDS)})")
+    parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds')
+    parser.add_argument('--fake-gemini', default='http://127.0.0.1:8166',
+                        help="Fake Gemini server to reset and read stats from ('' to skip)")
+    parser.add_argument('--metrics-token',
+                        default=os.environ.get('METRICS_TOKEN') or os.environ.get('QA_ADMIN_TOKEN'),
+                        help='Bearer token for /api/metrics (default: $METRICS_TOKEN, then $QA_ADMIN_TOKEN)')
+    parser.add_argument('--output', type=Path, default=None, help='Also write the report as JSON')
+    parser.add_argument('--seed', type=int, default=166)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    if args.warmup >= args.duration:
+        parser.error('--warmup must be shorter than --duration')
+    try:
+        args.chat_weights = parse_weights(args.chat_mix, CHAT_KINDS)
+        args.qa_weights = parse_weights(args.qa_mix, QA_KINDS)
+        parse_weights(args.mix, ROUTES)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+def run(args, profiler):
+    print("=" * 70)
+    print("Load Testing the Chat and QA APIs")
+    print("=" * 70)
+
+    print("\n1. Building the query mix...")
+    records = list(iter_db_questions(args.db))
+    mix = QueryMix(records, args.chat_weights, args.qa_weights)
+    print(f"   {len(mix.questions)} FAQ questions, {len(mix.categories)} categories")
+
+    generator = LoadGenerator(args, mix)
+    print("\n2. Checking the app...")
+    try:
+        status, _ = generator.client.request('GET', '/api/qa?limit=1')
+    except Exception as e:
+        print(f"Error: {args.url} is not reachable ({e})")
+        return
+    print(f"   {args.url} answered {status}")
+    before = snapshot_metrics(generator.client, args.metrics_token)
+    if args.fake_gemini:
+        reset = fake_gemini(args.fake_gemini, 'POST', '/reset')
+        print(f"   Fake Gemini: {'reset' if reset else 'not reachable, model calls go wherever the app points'}")
+
+    if args.rate:
+        print(f"\n3. Open loop: {args.rate:g} req/s for {args.duration:g}s ({args.warmup:g}s warmup)...")
+    else:
+        print(f"\n3. Closed loop: {args.concurrency} users for {args.duration:g}s ({args.warmup:g}s warmup)...")
+    with profiler.stage('load'):
+        started = time.perf_counter()
+        deadline = started + args.duration
+        if args.rate:
+            run_open_loop(generator, args, deadline)
+        else:
+            run_closed_loop(generator, args, deadline)
+        finished = time.perf_counter()
+    profiler.record(requests=len(generator.results))
+
+    print("\n4. Collecting results...")
+    after = snapshot_metrics(generator.client, args.metrics_token) if before is not None else None
+    upstream = fake_gemini(args.fake_gemini, 'GET', '/stats') if args.fake_gemini else None
+    report = build_report(generator, args, started + args.warmup, finished, before, after, upstream)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+        print(f"   Report saved to: {args.output}")
+
+    print_report(report)
+
+def main():
+    args = parse_args()
+    with StageProfiler.from_args(args) as profiler:
+        run(args, profiler)
+
+if __name__ == "__main__":
+    main()
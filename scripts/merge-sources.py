@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Script to merge the Markdown file, the PDF and the existing database in one run
+
+Replaces running compare-markdown-with-db.py, compare-pdf-with-db.py and
+categorize-missing-questions.py one after another: every source is read
+once and streamed into a single keyed index.
+"""
+
+import argparse
+from collections import defaultdict
+from pathlib import Path
+
+from qa_tools.merge import merge_sources, merged_sources_json
+from qa_tools.profiling import StageProfiler, add_profile_args
+from qa_tools.sources import (
+    DB_PATH, MD_PATH, PDF_PATH,
+    iter_db_questions, iter_markdown_questions, iter_pdf_questions,
+)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--markdown', type=Path, default=MD_PATH, help='Markdown source file')
+    parser.add_argument('--pdf', type=Path, default=PDF_PATH, help='PDF source file')
+    parser.add_argument('--db', type=Path, default=DB_PATH, help='qa-data.ts database file')
+    parser.add_argument('--output', type=Path,
+                        default=Path(__file__).parent / 'merged-sources.json',
+                        help='Where to write the merged JSON result')
+    add_profile_args(parser)
+    return parser.parse_args()
+
+def run(args, profiler):
+    print("=" * 70)
+    print("Multi-Source Merge (Markdown + PDF + Database)")
+    print("=" * 70)
+
+    streams = []
+    print("\n1. Opening sources...")
+    for name, path, reader in [
+        ('markdown', args.markdown, iter_markdown_questions),
+        ('pdf', args.pdf, iter_pdf_questions),
+        ('db', args.db, iter_db_questions),
+    ]:
+        if path.exists():
+            print(f"   {name:8s}: {path.name}")
+            streams.append(reader(path))
+        else:
+            print(f"   {name:8s}: not found at {path}, skipping")
+
+    if not streams:
+        print("Error: no sources found")
+        return
+
+    print("\n2. Merging records...")
+    with profiler.stage('extract_and_merge'):
+        result = merge_sources(*streams)
+    profiler.record(records=len(result['records']))
+
+    per_source = defaultdict(int)
+    for entry in result['records']:
+        for source in entry['sources']:
+            per_source[source] += 1
+
+    print(f"   Unique questions: {len(result['records'])}")
+    for source, count in sorted(per_source.items()):
+        print(f"     {source}: {count} questions")
+    print(f"   Conflicting answers: {len(result['conflicts'])}")
+    print(f"   Missing in DB: {len(result['missing'])}")
+
+    print("\n3. Writing merged result...")
+    with profiler.stage('write_output'):
+        args.output.write_text(merged_sources_json(result), encoding='utf-8')
+    print(f"   Saved to {args.output}")
+
+    missing_by_category = defaultdict(int)
+    for entry in result['missing']:
+        missing_by_category[entry['category']] += 1
+
+    print("\n" + "=" * 70)
+    print("\n📊 MISSING IN DB BY CATEGORY:")
+    for category, count in sorted(missing_by_category.items(), key=lambda x: x[1], reverse=True):
+        print(f"   {category:25s}: {count:3d} questions")
+
+def main():
+    args = parse_args()
+    with StageProfiler.from_args(args) as profiler:
+        run(args, profiler)
+
+if __name__ == "__main__":
+    main()
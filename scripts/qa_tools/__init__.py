@@ -0,0 +1,6 @@
+"""
+Shared helpers for the DES166 Q&A ingestion scripts.
+
+The scripts in this folder are run directly (python scripts/<name>.py), so
+this package is importable from them without any path setup.
+"""
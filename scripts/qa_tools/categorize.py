@@ -0,0 +1,76 @@
+"""
+Keyword-based category assignment shared by the import and merge scripts
+
+The keyword lists name each term once, in its canonical form. Other
+spellings and acronyms ("VCD", "infosession", "GPA") come from the
+synonym table in qa_tools/synonyms.py, the same one retrieval indexes with.
+
+The same rules are written to data/category-rules.json, where
+lib/category-router.ts uses them to route chat queries to categories.
+"""
+
+import json
+from pathlib import Path
+
+from qa_tools.synonyms import synonym_forms
+
+CATEGORY_RULES_PATH = Path(__file__).parent.parent.parent / 'data' / 'category-rules.json'
+
+# Checked in order; the first category with a matching keyword wins
+CATEGORY_RULES = [
+    # Application & Admission
+    ('application', ['application', 'apply', 'admission', 'admit', 'portfolio application',
+                     'portfolio review', 'work samples', '5-10', 'info session',
+                     'deadline', '3.7', 'acceptance']),
+    # Portfolio
+    ('portfolio', ['portfolio', 'work sample', 'showcase', 'project page', 'hero image',
+                   'template', 'organize', 'revision', 'improve past work']),
+    # Major Selection
+    ('major', ['major', 'visual communication design', 'interaction design',
+               'industrial design', 'choose', 'select',
+               'creative direction', 'career', 'interior design', 'minor', 'dxarts',
+               'animation', 'fashion', 'program', 'pathway', 'degree']),
+    # Grades & Requirements
+    ('grade', ['grade', 'grade point average', '3.7', 'curve', 'grading', 'canvas grade', 'final grade',
+               'points', 'rubric', 'criteria', 'requirement', 'workshop']),
+    # Academic Advising
+    ('advising', ['advisor', 'advising', 'counsel', 'academic advisor', 'contact', 'appointment',
+                  'optional practical training', 'science technology engineering and mathematics',
+                  'visa', 'international', 'study abroad', 'internship', 'transfer', 'credit']),
+    # Projects & Assignments
+    ('project', ['project', 'assignment', 'deliverable', 'critique', 'submission', 'stool',
+                 'cardboard', 'mockup', 'slide', 'deck', 'template', 'process', 'concept',
+                 'photography', 'photo', 'cover', 'magazine', 'illustration', 'collage',
+                 'photoshop', 'illustrator', 'printing', 'mounting', 'bleed', 'crop mark',
+                 'canvas', 'clue', 'office hours']),
+]
+
+# Default to general (but we'll map it to a valid category)
+DEFAULT_CATEGORY = 'advising'
+
+def categorize_question(question, answer=""):
+    """Categorize question based on keywords"""
+    raw = question + " " + answer
+    # Every form of every synonym group mentioned, so canonical keywords match
+    text = raw.lower() + " " + " | ".join(synonym_forms(raw))
+
+    for category, keywords in CATEGORY_RULES:
+        if any(word in text for word in keywords):
+            return category
+    return DEFAULT_CATEGORY
+
+def categorize_records(records):
+    """Category per record, in order"""
+    return [categorize_question(r.question, r.answer) for r in records]
+
+def category_rules_json(rules=CATEGORY_RULES, default=DEFAULT_CATEGORY):
+    """Contents of data/category-rules.json"""
+    table = {
+        'default': default,
+        'rules': [{'category': category, 'keywords': keywords} for category, keywords in rules],
+    }
+    return json.dumps(table, indent=2) + '\n'
+
+def write_category_rules(path=CATEGORY_RULES_PATH):
+    """Write the rules for lib/category-router.ts"""
+    Path(path).write_text(category_rules_json(), encoding='utf-8')
@@ -0,0 +1,168 @@
+"""
+Question-to-FAQ confidence scoring for the chat fast path.
+
+A query is scored against every FAQ question with the Dice coefficient of
+their character bigram multisets (after normalize_text). The chat route
+answers straight from the FAQ when the best score clears a minimum and
+beats the runner-up by a margin, and the two questions agree on their
+discriminators. Both numbers are calibrated offline by
+scripts/calibrate-faq-fastpath.py.
+
+Discriminators are the words one of which changes what a question asks
+while barely moving its bigram score: acronyms and the programs they name
+(the synonym groups in qa_tools/synonyms.py), negations, numbers and
+seasons. "Can IxD students..." and "Can VCD students..." score over 0.9
+against each other, so without the check one would be answered with the
+other's answer.
+
+lib/faq-match.ts implements the same normalization and scoring. Keep the
+two in step, or the calibrated thresholds stop meaning anything.
+
+With NumPy the FAQ side is a dense (question x bigram) count matrix and a
+query is scored against all questions at once over its own bigram columns.
+"""
+
+import re
+from collections import Counter
+
+from qa_tools.records import normalize_text
+from qa_tools.synonyms import synonym_groups
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+NEGATIONS = frozenset("""
+not no never cannot cant dont doesnt didnt isnt arent wasnt werent wont wouldnt
+shouldnt couldnt havent hasnt without
+""".split())
+SEASONS = frozenset(['spring', 'summer', 'autumn', 'fall', 'winter'])
+NUMBER_RE = re.compile(r'[0-9]+')
+
+def discriminators(question):
+    """
+    What a fuzzy match must agree on, as a string: synonym groups (read
+    from the raw text, since "ID" is case-sensitive), how many negations,
+    the numbers and the season words
+    """
+    key = normalize_text(question)
+    words = key.split()
+    return '|'.join([
+        ','.join(str(group) for group in synonym_groups(question)),
+        str(sum(1 for word in words if word in NEGATIONS)),
+        ','.join(sorted(NUMBER_RE.findall(key))),
+        ','.join(sorted({word for word in words if word in SEASONS})),
+    ])
+
+def bigrams(key):
+    """Character bigram counts of a normalized string"""
+    return Counter(key[i:i + 2] for i in range(len(key) - 1))
+
+def dice(a, a_size, b, b_size):
+    """Dice coefficient of two bigram multisets"""
+    if not a_size or not b_size:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    shared = sum(min(count, b.get(gram, 0)) for gram, count in a.items())
+    return 2.0 * shared / (a_size + b_size)
+
+class FAQIndex:
+    """Bigram profiles of the FAQ questions, one per distinct normalized question"""
+
+    def __init__(self, records):
+        self.ids = []
+        self.keys = []
+        self.profiles = []
+        self.sizes = []
+        self.signatures = []
+        self.exact = {}
+        for record in records:
+            key = normalize_text(record['question'])
+            if not key or key in self.exact:
+                continue
+            self.exact[key] = len(self.ids)
+            profile = bigrams(key)
+            self.ids.append(record.get('id'))
+            self.keys.append(key)
+            self.profiles.append(profile)
+            self.sizes.append(max(0, len(key) - 1))
+            self.signatures.append(discriminators(record['question']))
+
+        self._matrix = None
+        if NUMPY_AVAILABLE and self.keys:
+            self._vocab = {}
+            for profile in self.profiles:
+                for gram in profile:
+                    self._vocab.setdefault(gram, len(self._vocab))
+            self._matrix = np.zeros((len(self.keys), len(self._vocab)), dtype=np.int32)
+            for row, profile in enumerate(self.profiles):
+                for gram, count in profile.items():
+                    self._matrix[row, self._vocab[gram]] = count
+            self._sizes = np.asarray(self.sizes, dtype=np.float64)
+
+    def top2(self, query, exclude=None):
+        """Return (best position, best score, runner-up score, exact)
+
+        exclude skips one position, which turns every FAQ question into a
+        leave-one-out query that should not get a direct answer.
+        """
+        key = normalize_text(query)
+        if not key:
+            return None, 0.0, 0.0, False
+        exact = self.exact.get(key)
+        if exact is not None and exact != exclude:
+            return exact, 1.0, 0.0, True
+
+        profile = bigrams(key)
+        size = max(0, len(key) - 1)
+        if self._matrix is not None:
+            return self._top2_numpy(profile, size, exclude)
+
+        best, best_score, second = None, 0.0, 0.0
+        for i, other_size in enumerate(self.sizes):
+            if i == exclude:
+                continue
+            # Upper bound from the sizes alone; skip what can't reach the top two
+            if size + other_size == 0 or 2.0 * min(size, other_size) / (size + other_size) <= second:
+                continue
+            score = dice(profile, size, self.profiles[i], other_size)
+            if score > best_score:
+                best, best_score, second = i, score, best_score
+            elif score > second:
+                second = score
+        return best, best_score, second, False
+
+    def agrees(self, query, position):
+        """Whether the query has the same discriminators as the question at position"""
+        return position is not None and discriminators(query) == self.signatures[position]
+
+    def _top2_numpy(self, profile, size, exclude):
+        """top2() over all questions at once; same scores and tie order"""
+        cols, counts = [], []
+        for gram, count in profile.items():
+            col = self._vocab.get(gram)
+            if col is not None:
+                cols.append(col)
+                counts.append(count)
+        shared = np.minimum(self._matrix[:, cols], np.asarray(counts, dtype=np.int32)).sum(axis=1)
+        total = size + self._sizes
+        scores = np.divide(2.0 * shared, total, out=np.zeros(len(total)), where=total > 0)
+        if not size:
+            scores[:] = 0.0
+        if exclude is not None:
+            scores[exclude] = -1.0
+
+        best = int(np.argmax(scores))
+        best_score = float(scores[best])
+        if best_score <= 0.0:
+            return None, 0.0, 0.0, False
+        scores[best] = -1.0
+        second = max(0.0, float(scores.max())) if len(scores) > 1 else 0.0
+        return best, best_score, second, False
+
+def is_direct(score, runner_up, exact, agrees, min_score, margin):
+    """The fast-path decision, shared by calibration and (in TS) the route"""
+    return exact or (agrees and score >= min_score and score - runner_up >= margin)
@@ -0,0 +1,222 @@
+"""
+Markdown parsing and qa-data.ts generation for the import.
+
+import-all-questions.py and the stages in build-qa-data.py share these, so
+both write byte-identical qa-data.ts files from the same Markdown.
+
+Parsing is split in two so each half can be cached on its own:
+extract_markdown_blocks() finds the raw question/answer blocks, and
+clean_block() turns one into a QARecord (links pulled out, Markdown
+stripped, whitespace collapsed).
+"""
+
+import hashlib
+import re
+
+from qa_tools.records import QARecord
+from qa_tools.sources import extract_links
+
+def extract_markdown_blocks(md_path):
+    """
+    Raw (question, answer text, strip_bold) blocks from the Markdown file.
+    Blocks closed by a new section or the end of a section historically
+    kept their bold markers; strip_bold preserves that.
+    """
+    with open(md_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    blocks = []
+
+    def close(question, answer_lines, strip_bold):
+        answer_text = '\n'.join(answer_lines).strip()
+        if answer_text and len(answer_text) > 10:
+            blocks.append((question, answer_text, strip_bold))
+
+    # Split by sections (## headers)
+    sections = re.split(r'\n##+\s+', content)
+
+    for section in sections:
+        lines = section.split('\n')
+        current_question = None
+        current_answer = []
+        in_answer = False
+
+        for line in lines:
+            line_stripped = line.strip()
+
+            # Skip empty lines at start
+            if not line_stripped:
+                if current_question and current_answer and in_answer:
+                    close(current_question, current_answer, True)
+                    current_question = None
+                    current_answer = []
+                    in_answer = False
+                continue
+
+            # Check if line is a question (bold text ending with ?)
+            if line_stripped.startswith('**') and '?' in line_stripped:
+                # Save previous Q&A if exists
+                if current_question and current_answer and in_answer:
+                    close(current_question, current_answer, True)
+
+                # Extract new question
+                q_match = re.match(r'\*\*([^*?]+\?)\*\*', line_stripped)
+                if q_match:
+                    current_question = q_match.group(1).strip()
+                    current_answer = []
+                    in_answer = True
+                    # Get answer part after question mark
+                    after_q = line_stripped.split('?', 1)
+                    if len(after_q) > 1 and after_q[1].strip():
+                        current_answer.append(after_q[1].strip())
+                else:
+                    # Try to extract question from line
+                    q_clean = re.sub(r'\*\*', '', line_stripped)
+                    if '?' in q_clean:
+                        current_question = q_clean.split('?')[0].strip() + '?'
+                        current_answer = []
+                        in_answer = True
+            elif current_question:
+                # This is part of the answer
+                if line_stripped.startswith('##'):
+                    # New section, save current Q&A
+                    if current_answer and in_answer:
+                        close(current_question, current_answer, False)
+                    current_question = None
+                    current_answer = []
+                    in_answer = False
+                elif not line_stripped.startswith('**') and len(line_stripped) > 3:
+                    in_answer = True
+                    current_answer.append(line_stripped)
+
+        # Save last Q&A in section
+        if current_question and current_answer and in_answer:
+            close(current_question, current_answer, False)
+
+    return blocks
+
+def clean_block(question, answer_text, strip_bold=True):
+    """QARecord for one raw block, with links extracted and Markdown removed"""
+    links = extract_links(answer_text)
+    answer_clean = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', answer_text)
+    if strip_bold:
+        answer_clean = re.sub(r'\*\*', '', answer_clean)  # Remove bold markers
+    answer_clean = re.sub(r'\s+', ' ', answer_clean).strip()
+    return QARecord(question=question, answer=answer_clean, links=links)
+
+def clean_blocks(blocks):
+    """One QARecord per raw block, in order"""
+    return [clean_block(*block) for block in blocks]
+
+def extract_questions_from_markdown(md_path):
+    """Extract all questions from Markdown file"""
+    return clean_blocks(extract_markdown_blocks(md_path))
+
+CATEGORIES_TS = '''export type QAItem = {
+  id: number;
+  category: string;
+  question: string;
+  answer: string;
+  links?: string[];
+  date?: string;
+  keywords?: string[];
+  related?: number[];
+};
+
+export type Category = {
+  id: string;
+  name: string;
+  icon: string;
+  description: string;
+};
+
+export const categories: Category[] = [
+  {
+    id: "application",
+    name: "Application & Admission",
+    icon: "📝",
+    description: "Questions about applying to the design major",
+  },
+  {
+    id: "portfolio",
+    name: "Portfolio",
+    icon: "🎨",
+    description: "Portfolio requirements and tips",
+  },
+  {
+    id: "major",
+    name: "Major Selection",
+    icon: "🎓",
+    description: "Choosing between VCD, IxD, and ID",
+  },
+  {
+    id: "grade",
+    name: "Grades & Requirements",
+    icon: "📊",
+    description: "GPA requirements and grading policies",
+  },
+  {
+    id: "advising",
+    name: "Academic Advising",
+    icon: "💬",
+    description: "Academic planning and advising resources",
+  },
+  {
+    id: "project",
+    name: "Projects & Assignments",
+    icon: "✏️",
+    description: "Course projects and deliverables",
+  },
+];
+'''
+
+def generate_typescript(qa_items, related=None):
+    """Generate TypeScript code for qa-data.ts"""
+    ts_lines = CATEGORIES_TS.split('\n')
+    ts_lines.append('export const qaData: QAItem[] = [')
+
+    for i, item in enumerate(qa_items, 1):
+        ts_lines.append('  {')
+        ts_lines.append(f'    id: {i},')
+        ts_lines.append(f'    category: "{item.category}",')
+
+        # Escape quotes in question
+        question_escaped = item.question.replace('"', '\\"')
+        ts_lines.append(f'    question: "{question_escaped}",')
+
+        # Escape quotes and newlines in answer
+        answer_escaped = item.answer.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        ts_lines.append(f'    answer: "{answer_escaped}",')
+
+        if item.links:
+            ts_lines.append('    links: [')
+            for link in item.links:
+                link_escaped = link.replace('\\', '\\\\').replace('"', '\\"')
+                ts_lines.append(f'      "{link_escaped}",')
+            ts_lines.append('    ],')
+
+        if item.keywords:
+            keywords = ', '.join('"' + k.replace('\\', '\\\\').replace('"', '\\"') + '"' for k in item.keywords)
+            ts_lines.append(f'    keywords: [{keywords}],')
+
+        # Neighbor positions become ids, which are 1-based positions
+        if related and related[i - 1]:
+            ids = ', '.join(str(j + 1) for j in related[i - 1])
+            ts_lines.append(f'    related: [{ids}],')
+
+        ts_lines.append('  },')
+
+    ts_lines.append('];')
+
+    return '\n'.join(ts_lines)
+
+def build_qa_data(records, categories, keywords, related):
+    """qa-data.ts contents from cleaned records and the per-record stage outputs"""
+    for record, category, words in zip(records, categories, keywords):
+        record.category = category
+        record.keywords = words
+    return generate_typescript(records, related)
+
+def corpus_version(ts_content):
+    """Same content hash of qa-data.ts next.config.js computes as CORPUS_VERSION"""
+    return hashlib.sha256(ts_content.encode('utf-8')).hexdigest()[:12]
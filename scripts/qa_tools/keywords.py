@@ -0,0 +1,180 @@
+"""
+Corpus-wide TF-IDF keyword extraction for QAItem.keywords.
+
+Every record is scored against statistics from the whole corpus, so the
+keywords that come out are the terms that set an entry apart from the rest
+of the FAQ, not just its most frequent words. Candidate terms are single
+words plus two-word phrases ("crop mark", "hero image") that occur in more
+than one record, with stopwords and generic English words left out.
+
+The scoring is vectorized with NumPy over a sparse (record, term) matrix.
+Without NumPy the same math runs in pure Python.
+"""
+
+import math
+import re
+from collections import Counter
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been
+before being below between both but by can could did do does doing don down during
+each etc even ever every few for from further get gets getting go goes going good got
+had has have having he her here hers him his how however i if in into is it its
+itself just know let like make many may me might more most much must my need no nor
+not now of off often on once one only or other our ours out over own per please
+really same see she should so some still such sure take than that the their theirs
+them then there these they thing things think this those through to too try under
+until up us use used using very want was way we well were what when where whether
+which while who whom why will with within would yes yet you your yours
+aren couldn didn doesn hasn haven isn shouldn wasn weren won wouldn
+""".split())
+
+# Everyday English that is rare enough in the FAQ to score well on IDF but
+# says nothing about what an entry is about ("available", "without", "time")
+GENERIC_WORDS = frozenset("""
+able absolutely across actually add added adding again ago ahead allow allowed
+almost alone along already although always amount another anybody anyone anything
+anyway anywhere appropriate around ask asked asking available away back bad
+basically become becomes begin best better big bit bring bringing called came can't
+certain certainly change changed changes clear clearly come comes coming completely
+consider considered correct create currently day days definitely different difficult
+done each else enough entire especially everyone everything exactly example except
+expect expected find fine first follow following found free full generally give
+given gives giving great happen happens hard help helpful high important include
+included including instead interesting keep kind kinds last late later least less
+little long look looked looking looks lot lots made main making matter maybe mean
+means mostly move near necessary needed new next normal nothing number okay old open
+order others otherwise outside part particular people perfect place point possible
+pretty probably provided put question quite rather ready reason right said say says
+second seem seems several show shown side similar simple simply since small somebody
+someone something sometimes somewhere soon specific start started stay still
+supposed take taken taking tell thanks though thought time times together top total
+true turn usually various versus via whatever whenever without word words working
+worry wrong
+""".split())
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.+-][a-z0-9]+)*")
+URL_RE = re.compile(r'https?://\S+')
+
+# Recurring two-word phrases are more specific than either word alone
+PHRASE_BOOST = 1.5
+
+def tokenize(text):
+    """Lowercase word tokens with URLs removed"""
+    return TOKEN_RE.findall(URL_RE.sub(' ', text.lower()))
+
+def _is_term(token):
+    """Whether a token can start or end a keyword"""
+    return (token not in STOPWORDS and token not in GENERIC_WORDS
+            and len(token) >= 3 and not token.isdigit())
+
+def candidate_terms(question, answer):
+    """Term counts for one record; question terms count double"""
+    counts = Counter()
+    for text, weight in ((question, 2), (answer, 1)):
+        tokens = tokenize(text)
+        for i, token in enumerate(tokens):
+            if not _is_term(token):
+                continue
+            counts[token] += weight
+            if i + 1 < len(tokens):
+                nxt = tokens[i + 1]
+                if _is_term(nxt):
+                    counts[f"{token} {nxt}"] += weight
+    return counts
+
+def extract_corpus_keywords(records, top_n=6, max_df=0.5):
+    """Return a top-N keyword list per record, scored by corpus-wide TF-IDF"""
+    if top_n <= 0:
+        return [[] for _ in records]
+    docs = [candidate_terms(r['question'], r.get('answer', '')) for r in records]
+    if not docs:
+        return []
+
+    # Document frequency per term, then drop noise and near-universal terms
+    df = Counter()
+    for counts in docs:
+        df.update(counts.keys())
+    n_docs = len(docs)
+    max_count = max(2, int(max_df * n_docs))
+    vocab = {}
+    for term, freq in df.items():
+        # Phrases must recur to be worth keeping; single words may be unique
+        if freq > max_count or (' ' in term and freq < 2):
+            continue
+        vocab[term] = len(vocab)
+    terms = list(vocab)
+
+    if NUMPY_AVAILABLE:
+        return _score_numpy(docs, vocab, terms, df, n_docs, top_n)
+    return _score_python(docs, vocab, df, n_docs, top_n)
+
+def _score_numpy(docs, vocab, terms, df, n_docs, top_n):
+    """Vectorized sparse TF-IDF over all records at once"""
+    rows, cols, vals = [], [], []
+    for row, counts in enumerate(docs):
+        for term, count in counts.items():
+            col = vocab.get(term)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+                vals.append(count)
+    if not rows:
+        return [[] for _ in docs]
+
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    tf = 1.0 + np.log(np.asarray(vals, dtype=np.float64))
+
+    df_arr = np.array([df[t] for t in terms], dtype=np.float64)
+    boost = np.array([PHRASE_BOOST if ' ' in t else 1.0 for t in terms])
+    idf = (np.log((1.0 + n_docs) / (1.0 + df_arr)) + 1.0) * boost
+    scores = tf * idf[cols]
+
+    # L2-normalize each record so long answers don't dominate
+    norms = np.sqrt(np.bincount(rows, weights=scores * scores, minlength=len(docs)))
+    scores = scores / norms[rows]
+
+    # Sort by record, then score descending, then term for stable ties
+    order = np.lexsort((cols, -scores, rows))
+    rows, cols = rows[order], cols[order]
+    starts = np.searchsorted(rows, np.arange(len(docs)), side='left')
+    ends = np.searchsorted(rows, np.arange(len(docs)), side='right')
+
+    return [_pick(terms[c] for c in cols[s:e])[:top_n] for s, e in zip(starts, ends)]
+
+def _score_python(docs, vocab, df, n_docs, top_n):
+    """Same scoring as _score_numpy without NumPy"""
+    results = []
+    for counts in docs:
+        scored = []
+        for term, count in counts.items():
+            col = vocab.get(term)
+            if col is None:
+                continue
+            idf = math.log((1.0 + n_docs) / (1.0 + df[term])) + 1.0
+            if ' ' in term:
+                idf *= PHRASE_BOOST
+            scored.append(((1.0 + math.log(count)) * idf, col, term))
+        # Normalization doesn't change the order within a record
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        results.append(_pick(term for _, _, term in scored)[:top_n])
+    return results
+
+def _pick(ranked_terms):
+    """Drop single words already covered by a higher-ranked phrase"""
+    picked = []
+    covered = set()
+    for term in ranked_terms:
+        if term in covered:
+            continue
+        picked.append(term)
+        if ' ' in term:
+            covered.update(term.split())
+    return picked
@@ -0,0 +1,202 @@
+"""
+Shared pieces of the local load-testing harness.
+
+fake-gemini-server.py stands in for the Gemini API, with latency drawn
+from a LatencyModel and injected failures. load-test.py drives /api/chat
+and /api/qa with a QueryMix built from qa-data.ts. Both report latency
+with summarize(), and load-test.py reads before/after deltas of the app's
+counters from /api/metrics with parse_metrics().
+"""
+
+import math
+import re
+
+from qa_tools.keywords import STOPWORDS
+
+DISTRIBUTIONS = ('fixed', 'uniform', 'exponential', 'lognormal')
+
+class LatencyModel:
+    """
+    Random latency in seconds, from a spec in milliseconds:
+      fixed:MS
+      uniform:LOW:HIGH
+      exponential:MEAN
+      lognormal:MEDIAN:SIGMA   (long right tail, like real model calls)
+    """
+
+    def __init__(self, spec):
+        name, *params = spec.split(':')
+        if name not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {name!r} (use one of {', '.join(DISTRIBUTIONS)})")
+        expected = {'fixed': 1, 'uniform': 2, 'exponential': 1, 'lognormal': 2}[name]
+        if len(params) != expected:
+            raise ValueError(f"Latency spec {spec!r} needs {expected} parameter(s)")
+        self.spec = spec
+        self.name = name
+        self.params = [float(p) for p in params]
+
+    def sample(self, rng):
+        if self.name == 'fixed':
+            ms = self.params[0]
+        elif self.name == 'uniform':
+            ms = rng.uniform(*self.params)
+        elif self.name == 'exponential':
+            ms = rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0
+        else:
+            median, sigma = self.params
+            ms = rng.lognormvariate(math.log(median), sigma) if median > 0 else 0
+        return max(0.0, ms) / 1000
+
+    def __repr__(self):
+        return self.spec
+
+def parse_weights(spec, allowed):
+    """'chat=0.7,qa=0.3' -> {'chat': 0.7, 'qa': 0.3}, checked against allowed names"""
+    weights = {}
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        name, _, value = part.partition('=')
+        name = name.strip()
+        if name not in allowed:
+            raise ValueError(f"Unknown mix entry {name!r} (use {', '.join(allowed)})")
+        weights[name] = float(value)
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError(f"Mix {spec!r} has no positive weights")
+    return weights
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def summarize(latencies):
+    """Count, mean and tail percentiles (seconds) of a list of latencies"""
+    ordered = sorted(latencies)
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered) if ordered else 0.0,
+        'p50': percentile(ordered, 50),
+        'p90': percentile(ordered, 90),
+        'p99': percentile(ordered, 99),
+        'max': ordered[-1] if ordered else 0.0,
+    }
+
+# faq: a verbatim FAQ question (fast path); keywords, typo: paraphrases that
+# go to retrieval and the model; followup: a short anaphoric turn in the
+# client's conversation; offtopic: no retrieval hits at all
+CHAT_KINDS = ('faq', 'keywords', 'typo', 'followup', 'offtopic')
+QA_KINDS = ('all', 'category', 'featured', 'related')
+
+OFF_TOPIC = [
+    "what's the weather in seattle this weekend",
+    'can you recommend a good pizza place near campus',
+    'write me a poem about design',
+    'who won the game last night',
+    'how do I fix my bike chain',
+]
+
+# Majors a follow-up can switch to ("what about for IxD?")
+FOLLOW_UP_TOPICS = ['IxD', 'VCD', 'industrial design', 'interaction design', 'transfer students']
+
+WORD_RE = re.compile(r"[a-z]+")
+
+class QueryMix:
+    """Realistic chat messages and /api/qa paths drawn from the FAQ"""
+
+    def __init__(self, records, chat_weights, qa_weights):
+        self.questions = [r.question for r in records if r.question]
+        self.categories = sorted({r.category for r in records if r.category})
+        if not self.questions:
+            raise ValueError('No FAQ questions to draw queries from')
+        self.chat_kinds, self.chat_cum = self._cumulative(chat_weights)
+        self.qa_kinds, self.qa_cum = self._cumulative(qa_weights)
+
+    @staticmethod
+    def _cumulative(weights):
+        kinds = list(weights)
+        total = 0.0
+        cumulative = []
+        for kind in kinds:
+            total += weights[kind]
+            cumulative.append(total)
+        return kinds, cumulative
+
+    @staticmethod
+    def _pick(rng, kinds, cumulative):
+        x = rng.random() * cumulative[-1]
+        for kind, bound in zip(kinds, cumulative):
+            if x < bound:
+                return kind
+        return kinds[-1]
+
+    def chat_message(self, rng):
+        """(kind, message); 'followup' messages only make sense in a conversation"""
+        kind = self._pick(rng, self.chat_kinds, self.chat_cum)
+        question = rng.choice(self.questions)
+        if kind == 'faq':
+            return kind, question
+        if kind == 'keywords':
+            words = [w for w in WORD_RE.findall(question.lower()) if w not in STOPWORDS and len(w) > 2]
+            rng.shuffle(words)
+            return kind, ' '.join(words[:4]) or question
+        if kind == 'typo':
+            return kind, _typo(question, rng)
+        if kind == 'followup':
+            return kind, f'what about for {rng.choice(FOLLOW_UP_TOPICS)}?'
+        return kind, rng.choice(OFF_TOPIC)
+
+    def qa_path(self, rng):
+        """(kind, path with query string) for /api/qa"""
+        kind = self._pick(rng, self.qa_kinds, self.qa_cum)
+        if kind == 'category' and self.categories:
+            return kind, f'/api/qa?category={rng.choice(self.categories)}&limit={rng.choice([5, 10, 20])}'
+        if kind == 'featured':
+            return kind, '/api/qa?onePerCategory=true'
+        if kind == 'related':
+            return kind, f'/api/qa?related=true&limit={rng.choice([10, 20, 50])}'
+        return 'all', '/api/qa'
+
+def _typo(text, rng):
+    """Swap two adjacent letters in one word of five letters or more"""
+    words = text.split()
+    candidates = [i for i, w in enumerate(words) if len(w) >= 5 and w.isalpha()]
+    if not candidates:
+        return text
+    i = rng.choice(candidates)
+    w = words[i]
+    j = rng.randrange(len(w) - 1)
+    words[i] = w[:j] + w[j + 1] + w[j] + w[j + 2:]
+    return ' '.join(words)
+
+METRIC_LINE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})?\s+(\S+)$')
+LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+def parse_metrics(text, prefixes=('chat_',)):
+    """{(name, ((label, value), ...)): value} from Prometheus text exposition"""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = METRIC_LINE_RE.match(line)
+        if not match or not match.group(1).startswith(prefixes):
+            continue
+        labels = tuple(sorted(LABEL_RE.findall(match.group(2) or '')))
+        try:
+            samples[(match.group(1), labels)] = float(match.group(3))
+        except ValueError:
+            continue
+    return samples
+
+def metric_deltas(before, after, name):
+    """{labels: increase} for one counter between two parse_metrics() snapshots"""
+    deltas = {}
+    for (metric, labels), value in after.items():
+        if metric != name:
+            continue
+        increase = value - before.get((metric, labels), 0.0)
+        if increase:
+            deltas[','.join(f'{k}={v}' for k, v in labels) or '-'] = increase
+    return deltas
@@ -0,0 +1,83 @@
+"""
+Question matching rules shared by the compare and categorize scripts.
+
+A source question matches a DB question when:
+  - 'exact':   the normalized texts are equal (score 1.0)
+  - 'fuzzy':   one contains the other, both are longer than 20 characters,
+               and the edit similarity clears min_score
+  - 'similar': no containment, but a DB question sharing enough words
+               has edit similarity >= min_score (typos, small rewordings)
+
+Containment alone used to be enough. It is now verified with a score, so
+a short question inside a long one no longer counts as a match.
+
+Every function takes a MatchIndex built once over the DB keys, so the work
+can be sharded across processes with qa_tools.parallel.sharded_map.
+A DB question is unmatched when no source question matched it, so both
+sides of a comparison follow the same rules.
+"""
+
+from collections import Counter, defaultdict
+
+from qa_tools.parallel import sharded_map
+from qa_tools.similarity import Pattern
+
+FUZZY_MIN_LENGTH = 20
+DEFAULT_MIN_SCORE = 0.8
+# Candidates scored per key on the typo path
+MAX_CANDIDATES = 20
+
+class MatchIndex:
+    """Normalized DB keys plus a word index for typo-level candidates"""
+
+    def __init__(self, keys, min_score=DEFAULT_MIN_SCORE):
+        self.keys = list(keys)
+        self.min_score = min_score
+        self.positions = {}
+        self.postings = defaultdict(list)
+        for i, key in enumerate(self.keys):
+            self.positions.setdefault(key, i)
+            for token in set(key.split()):
+                self.postings[token].append(i)
+
+    def candidates(self, key):
+        """Indices of keys sharing at least half of key's words, most shared first"""
+        tokens = set(key.split())
+        if not tokens:
+            return []
+        shared = Counter()
+        for token in tokens:
+            shared.update(self.postings.get(token, ()))
+        needed = max(1, len(tokens) // 2)
+        ranked = [i for i, count in shared.most_common() if count >= needed]
+        return ranked[:MAX_CANDIDATES]
+
+def find_match(key, index):
+    """Return (db_index, match_type, score) for one source key, or (None, None, 0.0)"""
+    exact = index.positions.get(key)
+    if exact is not None:
+        return exact, 'exact', 1.0
+
+    pattern = Pattern(key)
+    for i, candidate in enumerate(index.keys):
+        # Fuzzy match (one contains the other), verified by edit similarity
+        if key in candidate or candidate in key:
+            if len(key) > FUZZY_MIN_LENGTH and len(candidate) > FUZZY_MIN_LENGTH:
+                score = pattern.score(candidate, index.min_score)
+                if score >= index.min_score:
+                    return i, 'fuzzy', score
+
+    # Typo-level match among keys that share most of the words
+    best, best_score = None, 0.0
+    for i in index.candidates(key):
+        score = pattern.score(index.keys[i], max(index.min_score, best_score))
+        if score > best_score:
+            best, best_score = i, score
+    if best is not None and best_score >= index.min_score:
+        return best, 'similar', best_score
+    return None, None, 0.0
+
+def match_all(keys, candidate_keys, workers=1, min_score=DEFAULT_MIN_SCORE):
+    """Yield find_match() for every key, in order"""
+    index = MatchIndex(candidate_keys, min_score)
+    return sharded_map(find_match, keys, index, workers=workers)
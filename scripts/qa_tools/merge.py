@@ -0,0 +1,105 @@
+"""
+One-pass merge of every Q&A source into a single keyed index.
+
+Records from all sources are streamed into one dict keyed by the
+normalized question, so the whole merge is a single linear pass instead of
+a pairwise comparison per source. The result carries:
+  - records:   one merged entry per distinct question, with provenance
+  - conflicts: questions whose answer differs between sources
+  - missing:   questions found in a source file but not in the database
+"""
+
+import json
+from itertools import chain
+
+from qa_tools.categorize import categorize_question
+from qa_tools.records import QARecord, normalize_answer
+
+def merge_sources(*streams, db_source='db'):
+    """Merge record streams into one index keyed by normalized question"""
+    index = {}
+
+    for record in chain(*streams):
+        key = record.key
+        if not key:
+            continue
+
+        entry = index.get(key)
+        if entry is None:
+            entry = {
+                'key': key,
+                'question': record.question,
+                'sources': [],
+                'answers': {},
+                'links': None,
+                'id': None,
+                'category': None,
+            }
+            index[key] = entry
+
+        source = record.source
+        if source in entry['answers']:
+            # Duplicate within one source - keep the first occurrence
+            continue
+
+        entry['sources'].append(source)
+        entry['answers'][source] = record.answer
+        if record.links and not entry['links']:
+            entry['links'] = record.links
+        if source == db_source:
+            # The database wording and category win over the raw sources
+            entry['question'] = record.question
+            entry['id'] = record.id
+            entry['category'] = record.category
+
+    return summarize(index, db_source=db_source)
+
+def summarize(index, db_source='db'):
+    """Split a merged index into records, conflicts and missing-in-DB sets"""
+    records = []
+    conflicts = []
+    missing = []
+
+    for entry in index.values():
+        if entry['category'] is None:
+            first_answer = next(iter(entry['answers'].values()), '')
+            entry['category'] = categorize_question(entry['question'], first_answer)
+        records.append(entry)
+
+        # Compare answers once per entry; empty answers carry no signal
+        distinct = {}
+        for source, answer in entry['answers'].items():
+            answer_key = normalize_answer(answer)
+            if answer_key:
+                distinct.setdefault(answer_key, []).append(source)
+        if len(distinct) > 1:
+            conflicts.append(entry)
+
+        if db_source not in entry['answers']:
+            missing.append(entry)
+
+    return {
+        'records': records,
+        'conflicts': conflicts,
+        'missing': missing,
+    }
+
+def merged_sources_json(result):
+    """merged-sources.json contents: every record, plus conflict and missing keys"""
+    return json.dumps({
+        'records': result['records'],
+        'conflicts': [entry['key'] for entry in result['conflicts']],
+        'missing': [entry['key'] for entry in result['missing']],
+    }, ensure_ascii=False, indent=2)
+
+def merge_report(markdown, pdf, records, categories, db_source='db'):
+    """
+    merged-sources.json for the raw sources against a freshly built corpus,
+    with the ids (1-based positions) and fields iter_db_questions() would
+    read back from the generated qa-data.ts
+    """
+    db = [
+        QARecord(r.question, r.answer, category=category, source=db_source, id=i)
+        for i, (r, category) in enumerate(zip(records, categories), 1)
+    ]
+    return merged_sources_json(merge_sources(markdown, pdf, db, db_source=db_source))
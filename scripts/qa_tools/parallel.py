@@ -0,0 +1,56 @@
+"""
+Order-preserving process-pool map for the comparison scripts.
+
+The large read-only inputs (the source keys and the DB index) are placed
+in module state before the pool starts. With the 'fork' start method the
+workers inherit them copy-on-write, so each task only pickles a
+(start, end) shard range and gets back small result tuples. Where fork is
+unavailable the state is sent once per worker through the pool
+initializer, never once per task.
+
+Shard results are yielded in shard order, so the output sequence is
+identical to a serial run.
+"""
+
+import math
+import multiprocessing
+import os
+
+_STATE = {}
+
+def default_workers():
+    return os.cpu_count() or 1
+
+def _init_worker(state):
+    _STATE.update(state)
+
+def _run_shard(bounds):
+    start, end = bounds
+    func, items, shared = _STATE['func'], _STATE['items'], _STATE['shared']
+    return [func(item, shared) for item in items[start:end]]
+
+def sharded_map(func, items, shared, workers=1, shards_per_worker=4):
+    """Yield func(item, shared) for every item, in input order"""
+    n = len(items)
+    if workers <= 1 or n < workers * 2:
+        for item in items:
+            yield func(item, shared)
+        return
+
+    # A few shards per worker smooths out uneven shard cost
+    size = max(1, math.ceil(n / (workers * shards_per_worker)))
+    bounds = [(start, min(start + size, n)) for start in range(0, n, size)]
+    state = {'func': func, 'items': items, 'shared': shared}
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        _STATE.update(state)
+        pool = multiprocessing.get_context('fork').Pool(workers)
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(state,))
+
+    try:
+        with pool:
+            for results in pool.imap(_run_shard, bounds):
+                yield from results
+    finally:
+        _STATE.clear()
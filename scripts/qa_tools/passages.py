@@ -0,0 +1,77 @@
+"""
+Sentence passages of each answer, for snippet-only chat context.
+
+Answers are split into sentences, and neighbouring sentences are packed
+into passages of up to MAX_PASSAGE_CHARS, so a long multi-topic answer
+becomes a few self-contained units. data/passages.json maps each answer's
+QA id (its 1-based position, as generate_typescript() numbers them) to
+its passages, each an exact substring of the answer. Answers that fit in
+one passage are left out; lib/passages.ts treats a missing entry, or one
+that no longer matches an edited answer, as a single passage.
+"""
+
+import json
+import re
+from pathlib import Path
+
+PASSAGES_PATH = Path(__file__).parent.parent.parent / 'data' / 'passages.json'
+
+# A passage grows by whole sentences up to this size...
+MAX_PASSAGE_CHARS = 120
+# ...and shorter pieces are merged into a neighbour rather than stand alone
+MIN_PASSAGE_CHARS = 40
+
+# Terminal punctuation, closing quotes/brackets, then whitespace
+_BOUNDARY_RE = re.compile(r'[.!?]+["”’)\]]*\s+')
+_ABBREVIATIONS = {'e.g.', 'i.e.', 'etc.', 'vs.', 'approx.', 'dr.', 'prof.', 'st.', 'no.', 'u.s.', 'a.m.', 'p.m.'}
+
+def sentence_spans(text):
+    """(start, end) of each sentence in text, whitespace excluded"""
+    spans, start = [], 0
+    for match in _BOUNDARY_RE.finditer(text):
+        end = match.end()
+        words = text[start:match.start() + 1].split()
+        last = words[-1].lower() if words else ''
+        following = text[end:end + 1]
+        # "e.g. Figma", initials like "J. Smith", and lowercase continuations aren't boundaries
+        if last in _ABBREVIATIONS or re.fullmatch(r'\w\.', last) or not following or following.islower():
+            continue
+        spans.append((start, len(text[:end].rstrip())))
+        start = end
+    if start < len(text.rstrip()):
+        spans.append((start, len(text.rstrip())))
+    return spans
+
+def passage_spans(text, max_chars=MAX_PASSAGE_CHARS, min_chars=MIN_PASSAGE_CHARS):
+    """Sentence spans packed into passages of at most max_chars where sentences allow"""
+    passages = []
+    for start, end in sentence_spans(text.rstrip()):
+        if passages:
+            first, last = passages[-1]
+            if last - first < min_chars or end - first <= max_chars:
+                passages[-1] = (first, end)
+                continue
+        passages.append((start, end))
+    # A short tail reads better with the passage before it
+    if len(passages) > 1 and passages[-1][1] - passages[-1][0] < min_chars:
+        passages[-2:] = [(passages[-2][0], passages[-1][1])]
+    return passages
+
+def split_passages(text, max_chars=MAX_PASSAGE_CHARS, min_chars=MIN_PASSAGE_CHARS):
+    """Passages of one answer, in order"""
+    return [text[start:end] for start, end in passage_spans(text, max_chars, min_chars)]
+
+def passages_json(records, max_chars=MAX_PASSAGE_CHARS, min_chars=MIN_PASSAGE_CHARS):
+    """Contents of data/passages.json for the records of qa-data.ts, in order"""
+    table = {}
+    for i, record in enumerate(records, 1):
+        passages = split_passages(record.answer, max_chars, min_chars)
+        if len(passages) > 1:
+            table[str(i)] = passages
+    return json.dumps({'maxChars': max_chars, 'passages': table}, indent=2, ensure_ascii=False) + '\n'
+
+def write_passages(records, path=PASSAGES_PATH):
+    """Write the passages for lib/passages.ts; returns how many answers were split"""
+    text = passages_json(records)
+    Path(path).write_text(text, encoding='utf-8')
+    return len(json.loads(text)['passages'])
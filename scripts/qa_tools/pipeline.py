@@ -0,0 +1,285 @@
+"""
+Content-addressed stage DAG for the ingestion pipeline.
+
+A Stage names a function, the stages whose outputs it takes, the source
+files it reads and its parameters. Its cache key is a SHA-256 over all of
+them: the digests of its dependencies' outputs, the bytes of its files,
+its parameters, and the source of its function's module plus every
+qa_tools module that module reaches. Outputs are pickled to
+<cache>/<stage>/<key>.pickle with their digest in a .json beside it, so a
+stage whose inputs are unchanged costs a hash check and its output is
+only unpickled if a stage downstream has to run.
+
+Downstream keys use the output digest, not the upstream key: when an
+upstream edit produces the same output, everything below stays cached.
+
+Stages start as soon as their dependencies finish, in a process pool
+(forked where available, as in qa_tools.parallel), so independent stages
+run on separate cores. A stage with a target writes its output (a str)
+to that file, and only when the file's contents differ.
+"""
+
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import pickle
+import sys
+import time
+import types
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).parent.parent.parent / '.pipeline-cache'
+# Entries kept per stage besides the current one, for quick switching back
+KEEP_PER_STAGE = 3
+# Bump when the cache layout or key recipe changes
+CACHE_FORMAT = 1
+PACKAGE = __name__.split('.')[0]
+
+class Stage:
+    """One node of the DAG: func(*dependency outputs, **params)"""
+
+    def __init__(self, name, func, deps=(), files=(), params=None, versions=None, target=None, backup=False):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.files = [Path(f) for f in files]
+        self.params = params or {}
+        # Library versions that change the output without being arguments
+        self.versions = versions or {}
+        self.target = Path(target) if target else None
+        # Keep the previous target as <target>.backup when it changes
+        self.backup = backup
+
+class StageResult:
+    def __init__(self, status, key, digest, seconds=0.0):
+        self.status = status
+        self.key = key
+        self.digest = digest
+        self.seconds = seconds
+        self.wrote = False
+
+def digest_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def output_digest(output):
+    """Text outputs hash as their UTF-8 bytes, so a target file can be checked directly"""
+    if isinstance(output, str):
+        return digest_bytes(output.encode('utf-8'))
+    return digest_bytes(pickle.dumps(output, protocol=4))
+
+def file_digest(path):
+    path = Path(path)
+    return digest_bytes(path.read_bytes()) if path.exists() else 'missing'
+
+def _is_local(name):
+    return isinstance(name, str) and (name == PACKAGE or name.startswith(PACKAGE + '.'))
+
+def code_digest(func):
+    """Hash of the source of func's module and every qa_tools module it reaches"""
+    seen = {}
+    pending = [sys.modules[func.__module__]]
+    while pending:
+        module = pending.pop()
+        if module.__name__ in seen:
+            continue
+        try:
+            seen[module.__name__] = digest_bytes(Path(inspect.getsourcefile(module)).read_bytes())
+        except (TypeError, OSError):
+            seen[module.__name__] = 'unknown'
+        for value in vars(module).values():
+            name = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, '__module__', None)
+            if _is_local(name) and name not in seen and name in sys.modules:
+                pending.append(sys.modules[name])
+    return digest_bytes(json.dumps(sorted(seen.items())).encode('utf-8'))
+
+def _execute(func, args, params):
+    """Run one stage; returns (pickled output, digest, seconds)"""
+    started = time.perf_counter()
+    output = func(*args, **params)
+    seconds = time.perf_counter() - started
+    return pickle.dumps(output, protocol=4), output_digest(output), seconds
+
+class Pipeline:
+    """Run a set of stages, reusing cached outputs whose keys still match"""
+
+    def __init__(self, stages, cache_dir=CACHE_DIR, workers=1, force=()):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = Path(cache_dir)
+        self.workers = workers
+        self.force = set(force)
+        self._outputs = {}
+        self._code = {}
+        self._check()
+
+    def _check(self):
+        """Unknown dependencies and cycles are errors before anything runs"""
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Stage cycle: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for dep in self.stages[name].deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {name!r} depends on unknown stage {dep!r}")
+                visit(dep, path + [name])
+            state[name] = 'done'
+
+        for name in self.stages:
+            visit(name, [])
+
+    def needed(self, targets=None):
+        """Names of the targets and everything they depend on"""
+        names, pending = set(), list(targets or self.stages)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage {name!r}")
+            if name not in names:
+                names.add(name)
+                pending.extend(self.stages[name].deps)
+        return names
+
+    def key(self, stage, results):
+        func = stage.func
+        if func not in self._code:
+            self._code[func] = code_digest(func)
+        recipe = {
+            'format': CACHE_FORMAT,
+            'stage': stage.name,
+            'function': f'{func.__module__}.{func.__qualname__}',
+            'code': self._code[func],
+            'params': stage.params,
+            'versions': stage.versions,
+            'files': {str(path): file_digest(path) for path in stage.files},
+            'deps': [results[dep].digest for dep in stage.deps],
+        }
+        return digest_bytes(json.dumps(recipe, sort_keys=True, default=str).encode('utf-8'))
+
+    def _paths(self, name, key):
+        folder = self.cache_dir / name
+        return folder / f'{key}.pickle', folder / f'{key}.json'
+
+    def _lookup(self, stage, key):
+        """Cached digest for a key, or None"""
+        if stage.name in self.force or 'all' in self.force:
+            return None
+        data_path, meta_path = self._paths(stage.name, key)
+        if not (data_path.exists() and meta_path.exists()):
+            return None
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        except ValueError:
+            return None
+        # Recently used entries survive pruning
+        os.utime(meta_path)
+        return meta
+
+    def _store(self, name, key, data, digest, seconds):
+        data_path, meta_path = self._paths(name, key)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so an interrupted run never leaves a torn entry
+        tmp = data_path.with_suffix('.tmp')
+        tmp.write_bytes(data)
+        tmp.replace(data_path)
+        meta_path.write_text(json.dumps({'digest': digest, 'seconds': seconds}), encoding='utf-8')
+
+    def output(self, name, results):
+        """A stage's output, unpickled from the cache on first use"""
+        if name not in self._outputs:
+            data_path, _ = self._paths(name, results[name].key)
+            self._outputs[name] = pickle.loads(data_path.read_bytes())
+        return self._outputs[name]
+
+    def _pool(self):
+        if self.workers <= 1:
+            return None
+        if 'fork' in multiprocessing.get_all_start_methods():
+            return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('fork'))
+        return ProcessPoolExecutor(self.workers)
+
+    def run(self, targets=None, log=print):
+        """Bring the targets (default: every stage) up to date; returns {name: StageResult}"""
+        needed = self.needed(targets)
+        results = {}
+        # future -> (stage name, key) for stages running in the pool
+        running = {}
+        pool = self._pool()
+        try:
+            while len(results) < len(needed):
+                busy = {name for name, _ in running.values()}
+                ready = [
+                    name for name in sorted(needed)
+                    if name not in results and name not in busy
+                    and all(dep in results for dep in self.stages[name].deps)
+                ]
+                for name in ready:
+                    stage = self.stages[name]
+                    key = self.key(stage, results)
+                    meta = self._lookup(stage, key)
+                    if meta is not None:
+                        results[name] = StageResult('cached', key, meta['digest'], meta.get('seconds', 0.0))
+                        log(f"   {name:22s} cached   {key[:12]}")
+                        continue
+                    args = [self.output(dep, results) for dep in stage.deps]
+                    if pool is None:
+                        self._finish(stage, key, _execute(stage.func, args, stage.params), results, log)
+                    else:
+                        running[pool.submit(_execute, stage.func, args, stage.params)] = (name, key)
+                if ready:
+                    continue
+                if not running:
+                    raise RuntimeError('Pipeline stalled with stages left to run')
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key = running.pop(future)
+                    self._finish(self.stages[name], key, future.result(), results, log)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        for name in sorted(needed):
+            self._materialize(self.stages[name], results, log)
+        self._prune(results)
+        return results
+
+    def _finish(self, stage, key, executed, results, log):
+        data, digest, seconds = executed
+        self._store(stage.name, key, data, digest, seconds)
+        results[stage.name] = StageResult('ran', key, digest, seconds)
+        log(f"   {stage.name:22s} ran      {key[:12]}  {seconds:.2f}s")
+
+    def _materialize(self, stage, results, log):
+        """Write a target whose contents don't match the stage output"""
+        if stage.target is None or file_digest(stage.target) == results[stage.name].digest:
+            return
+        text = self.output(stage.name, results)
+        if not isinstance(text, str):
+            raise TypeError(f"Stage {stage.name!r} has a target but did not return text")
+        if stage.backup and stage.target.exists():
+            backup_path = stage.target.with_suffix(stage.target.suffix + '.backup')
+            backup_path.write_bytes(stage.target.read_bytes())
+        stage.target.parent.mkdir(parents=True, exist_ok=True)
+        stage.target.write_text(text, encoding='utf-8')
+        results[stage.name].wrote = True
+        log(f"   {stage.name:22s} wrote    {stage.target}")
+
+    def _prune(self, results):
+        """Keep each stage's current entry and its few most recently used others"""
+        for name, result in results.items():
+            folder = self.cache_dir / name
+            if not folder.is_dir():
+                continue
+            others = sorted(
+                (meta for meta in folder.glob('*.json') if meta.stem != result.key),
+                key=lambda meta: meta.stat().st_mtime,
+                reverse=True,
+            )
+            for meta in others[KEEP_PER_STAGE:]:
+                meta.unlink(missing_ok=True)
+                meta.with_suffix('.pickle').unlink(missing_ok=True)
@@ -0,0 +1,151 @@
+"""
+Per-stage wall time and memory profiling for the ingestion scripts.
+
+Usage inside a script:
+
+    profiler = StageProfiler.from_args(args)
+    with profiler:
+        with profiler.stage('extract'):
+            ...
+
+With --profile off every call is a no-op. With it on, each stage records
+wall time and peak traced memory (tracemalloc), and a stage table sorted
+by time is printed when the run ends. --profile-json appends a
+machine-readable record for benchmark history, and --profile-pstats dumps
+a cProfile file for the whole run.
+
+Stages are sequential - nesting them would reset the outer stage's peak.
+"""
+
+import cProfile
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def add_profile_args(parser):
+    """Register the shared --profile flags on an argparse parser"""
+    group = parser.add_argument_group('profiling')
+    group.add_argument('--profile', action='store_true',
+                       help='Record wall time and peak memory per stage')
+    group.add_argument('--profile-json', type=Path, default=None,
+                       help='Append stage costs as one JSON line to this file (implies --profile)')
+    group.add_argument('--profile-pstats', type=Path, default=None,
+                       help='Dump a cProfile/pstats file for the run (implies --profile)')
+    return parser
+
+class StageProfiler:
+    """Collect wall time and peak memory for named pipeline stages"""
+
+    def __init__(self, enabled=False, json_path=None, pstats_path=None, script=None):
+        self.enabled = enabled or json_path is not None or pstats_path is not None
+        self.json_path = json_path
+        self.pstats_path = pstats_path
+        self.script = script or Path(sys.argv[0]).name
+        self.stages = []
+        self.meta = {}
+        self._cprofile = None
+        self._started = None
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(
+            enabled=getattr(args, 'profile', False),
+            json_path=getattr(args, 'profile_json', None),
+            pstats_path=getattr(args, 'profile_pstats', None),
+        )
+
+    def record(self, **meta):
+        """Attach corpus-size counters (e.g. questions=531) to the run"""
+        self.meta.update(meta)
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            self.stages.append({
+                'stage': name,
+                'seconds': seconds,
+                'peak_kb': peak / 1024,
+                'delta_kb': (current - start_bytes) / 1024,
+            })
+
+    def __enter__(self):
+        if self.enabled:
+            tracemalloc.start()
+            if self.pstats_path:
+                self._cprofile = cProfile.Profile()
+                self._cprofile.enable()
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if not self.enabled:
+            return False
+
+        total = time.perf_counter() - self._started
+        if self._cprofile:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.pstats_path)
+        tracemalloc.stop()
+
+        self.print_table(total)
+        if self.json_path:
+            self.write_json(total)
+        if self.pstats_path:
+            print(f"   cProfile stats saved to: {self.pstats_path}")
+        return False
+
+    def print_table(self, total):
+        print("\n" + "=" * 70)
+        print("PROFILE (sorted by wall time)")
+        print("=" * 70)
+        print(f"   {'stage':28s} {'seconds':>10s} {'%':>6s} {'peak MB':>10s} {'delta MB':>10s}")
+        for s in sorted(self.stages, key=lambda s: s['seconds'], reverse=True):
+            share = (s['seconds'] / total * 100) if total else 0
+            print(f"   {s['stage']:28s} {s['seconds']:10.3f} {share:6.1f} "
+                  f"{s['peak_kb'] / 1024:10.2f} {s['delta_kb'] / 1024:10.2f}")
+        print(f"   {'total':28s} {total:10.3f}")
+        rss = peak_rss_mb()
+        if rss is not None:
+            print(f"   peak RSS: {rss:.1f} MB")
+
+    def write_json(self, total):
+        """Append one JSON line per run so stage costs can be tracked over time"""
+        entry = {
+            'script': self.script,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'total_seconds': total,
+            'peak_rss_mb': peak_rss_mb(),
+            'meta': self.meta,
+            'stages': self.stages,
+        }
+        with open(self.json_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+        print(f"\n   Profile appended to: {self.json_path}")
@@ -0,0 +1,170 @@
+"""
+Streaming aggregation of the chat query log (lib/query-log.ts).
+
+Each log file is read line by line and folded into a QueryStats of
+counters keyed by normalized message, so memory grows with the number of
+distinct questions, not with the number of log lines. Stats from
+separate files merge with +=, which lets analyze-query-logs.py aggregate
+files in worker processes and combine the results.
+
+Rotated files may be gzipped for archiving; .jsonl.gz is read transparently.
+Lines are read as bytes and decoded with orjson when it is installed,
+which roughly halves the time spent on months of logs.
+"""
+
+import gzip
+import json
+from collections import Counter
+
+from qa_tools.records import normalize_text
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+LOG_GLOB = 'query-log*.jsonl*'
+
+class QueryStats:
+    """Counters over a set of query log entries"""
+
+    def __init__(self):
+        self.entries = 0
+        self.malformed = 0
+        self.paths = Counter()
+        self.asked = Counter()
+        # First raw phrasing seen for each normalized message
+        self.samples = {}
+        # Resolved FAQ id (fast-path hit, else top retrieval hit) -> count
+        self.clusters = Counter()
+        self.cluster_phrasings = {}
+        self.zero_hits = Counter()
+        # Normalized messages answered by the model, and their best FAQ score
+        self.model_answers = Counter()
+        self.best_faq_score = {}
+        self.total_ms = Counter()
+        # Retrieval routing: searches, how many widened, documents scored, first category
+        self.routed = 0
+        self.widened = 0
+        self.candidates = 0
+        self.routed_to = Counter()
+        self.first_ts = None
+        self.last_ts = None
+        # Raw message -> normalized key; popular questions repeat verbatim
+        self._keys = {}
+
+    def add(self, entry):
+        message = entry.get('message')
+        if not isinstance(message, str):
+            self.malformed += 1
+            return
+        key = self._keys.get(message)
+        if key is None:
+            key = self._keys[message] = normalize_text(message)
+        if not key:
+            return
+
+        self.entries += 1
+        path = entry.get('path', 'model')
+        self.paths[path] += 1
+        self.total_ms[path] += entry.get('totalMs', 0)
+        self.asked[key] += 1
+        self.samples.setdefault(key, message)
+
+        ts = entry.get('ts')
+        if ts:
+            if self.first_ts is None or ts < self.first_ts:
+                self.first_ts = ts
+            if self.last_ts is None or ts > self.last_ts:
+                self.last_ts = ts
+
+        faq = entry.get('faq') or {}
+        retrieved = entry.get('retrieved') or []
+        if path == 'faq' and faq.get('id') is not None:
+            resolved = faq['id']
+        elif retrieved:
+            resolved = retrieved[0].get('id')
+        else:
+            resolved = None
+
+        routing = entry.get('routing')
+        if routing:
+            self.routed += 1
+            self.widened += 1 if routing.get('widened') else 0
+            self.candidates += routing.get('candidates', 0)
+            searched = routing.get('searched') or []
+            if searched:
+                self.routed_to[searched[0]] += 1
+
+        if resolved is not None:
+            self.clusters[resolved] += 1
+            self.cluster_phrasings.setdefault(resolved, set()).add(key)
+        elif path != 'error':
+            self.zero_hits[key] += 1
+
+        if path == 'model':
+            self.model_answers[key] += 1
+            score = faq.get('score', 0.0)
+            if score > self.best_faq_score.get(key, -1.0):
+                self.best_faq_score[key] = score
+
+    def __iadd__(self, other):
+        self.entries += other.entries
+        self.malformed += other.malformed
+        self.paths.update(other.paths)
+        self.total_ms.update(other.total_ms)
+        self.routed += other.routed
+        self.widened += other.widened
+        self.candidates += other.candidates
+        self.routed_to.update(other.routed_to)
+        self.asked.update(other.asked)
+        for key, message in other.samples.items():
+            self.samples.setdefault(key, message)
+        self.clusters.update(other.clusters)
+        for faq_id, phrasings in other.cluster_phrasings.items():
+            self.cluster_phrasings.setdefault(faq_id, set()).update(phrasings)
+        self.zero_hits.update(other.zero_hits)
+        self.model_answers.update(other.model_answers)
+        for key, score in other.best_faq_score.items():
+            if score > self.best_faq_score.get(key, -1.0):
+                self.best_faq_score[key] = score
+        for ts in (other.first_ts, other.last_ts):
+            if ts is None:
+                continue
+            if self.first_ts is None or ts < self.first_ts:
+                self.first_ts = ts
+            if self.last_ts is None or ts > self.last_ts:
+                self.last_ts = ts
+        return self
+
+    @property
+    def hit_rate(self):
+        """Share of answered queries that found at least one FAQ record"""
+        answered = self.entries - self.paths.get('error', 0)
+        if not answered:
+            return 0.0
+        return 1.0 - sum(self.zero_hits.values()) / answered
+
+def open_log(path):
+    """Binary line reader for a plain or gzipped log file"""
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+def aggregate_file(path, since=None):
+    """QueryStats for one log file, skipping entries older than since (an ISO date)"""
+    stats = QueryStats()
+    loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+    with open_log(path) as f:
+        for line in f:
+            try:
+                entry = loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-append
+                stats.malformed += 1
+                continue
+            if since and entry.get('ts', '') < since:
+                continue
+            stats.add(entry)
+    return stats
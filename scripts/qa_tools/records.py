@@ -0,0 +1,141 @@
+"""
+Compact Q&A record shared by the parsers, matcher, categorizer and
+TypeScript generator.
+
+QARecord uses __slots__ instead of a per-record dict, interns the small
+set of repeated strings (category, source), and computes the normalized
+question key once and caches it on the record. Matching code can then
+index records by record.key directly instead of keeping a second
+normalized dict-of-dicts copy of every question.
+
+For the scripts that still index records like dicts, q['question'] and
+q.get('answer', '') keep working.
+"""
+
+import re
+import sys
+
+def normalize_text(text):
+    """Normalize text for comparison"""
+    if not text:
+        return ""
+    # Remove extra whitespace, convert to lowercase
+    text = re.sub(r'\s+', ' ', text.lower().strip())
+    # Remove punctuation for fuzzy matching
+    text = re.sub(r'[^\w\s]', '', text)
+    return text
+
+def normalize_answer(text):
+    """Normalize an answer so the same answer from different sources compares equal"""
+    if not text:
+        return ""
+    # Links are kept in the DB text but stripped from Markdown/PDF answers
+    text = re.sub(r'\[([^\]]+)\]\(([^\)]+)\)', r'\1', text)
+    text = re.sub(r'https?://[^\s]+', '', text)
+    # qa-data.ts escapes some punctuation (e.g. "\\!")
+    text = text.replace('\\', '')
+    return normalize_text(text)
+
+def _intern(value):
+    return sys.intern(value) if value else value
+
+class QARecord:
+    """One question/answer pair with cached normalized keys"""
+
+    __slots__ = (
+        '_question', '_answer', 'links', 'keywords', 'id',
+        '_category', '_source', '_key', '_answer_key',
+    )
+
+    def __init__(self, question, answer='', links=None, category=None, source=None,
+                 id=None, keywords=None):
+        self._question = question
+        self._answer = answer or ''
+        self.links = links
+        self.keywords = keywords
+        self.id = id
+        self._category = _intern(category)
+        self._source = _intern(source)
+        self._key = None
+        self._answer_key = None
+
+    # Setting the question or answer drops its cached normalized key
+    @property
+    def question(self):
+        return self._question
+
+    @question.setter
+    def question(self, value):
+        self._question = value
+        self._key = None
+
+    @property
+    def answer(self):
+        return self._answer
+
+    @answer.setter
+    def answer(self, value):
+        self._answer = value
+        self._answer_key = None
+
+    @property
+    def category(self):
+        return self._category
+
+    @category.setter
+    def category(self, value):
+        self._category = _intern(value)
+
+    @property
+    def source(self):
+        return self._source
+
+    @source.setter
+    def source(self, value):
+        self._source = _intern(value)
+
+    @property
+    def key(self):
+        """Normalized question, computed on first use"""
+        if self._key is None:
+            self._key = normalize_text(self.question)
+        return self._key
+
+    @property
+    def answer_key(self):
+        """Normalized answer used to detect conflicting answers"""
+        if self._answer_key is None:
+            self._answer_key = normalize_answer(self.answer)
+        return self._answer_key
+
+    # Dict-style access for code that still treats records as dicts
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name, value):
+        if name not in ('question', 'answer', 'links', 'keywords', 'id', 'category', 'source'):
+            raise KeyError(name)
+        setattr(self, name, value)
+
+    def get(self, name, default=None):
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+    def to_dict(self):
+        """Plain dict for JSON output, without empty fields"""
+        data = {
+            'id': self.id,
+            'source': self.source,
+            'category': self.category,
+            'question': self.question,
+            'answer': self.answer,
+            'links': self.links,
+            'keywords': self.keywords,
+        }
+        return {k: v for k, v in data.items() if v is not None}
+
+    def __repr__(self):
+        return f"QARecord(id={self.id!r}, source={self.source!r}, question={self.question[:40]!r})"
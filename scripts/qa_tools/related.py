@@ -0,0 +1,138 @@
+"""
+Related-questions graph for qaData.
+
+Each record becomes an L2-normalized TF-IDF vector over the same candidate
+terms the keyword extractor uses. Its neighbors are the k records with the
+highest cosine similarity. The graph is computed once at import time and
+stored as a short ID list per item, so the app never has to search at
+request time to show related questions.
+
+With NumPy, similarities are computed a block of rows at a time as a
+sparse product: each nonzero (row, term) entry is expanded against the
+posting list of its term and summed with bincount. Terms that appear in
+only one record can't link two records, so they count toward the norms but
+are left out of the product. Without NumPy the same math runs through an
+inverted index in pure Python.
+"""
+
+import heapq
+import math
+from collections import Counter, defaultdict
+
+from qa_tools.keywords import NUMPY_AVAILABLE, PHRASE_BOOST, candidate_terms
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+DEFAULT_K = 5
+# Neighbors below this cosine are too weak to show as related
+MIN_SIMILARITY = 0.1
+# Similarity rows held in memory at once: block rows x corpus size
+BLOCK_CELLS = 4_000_000
+
+def tfidf_vectors(records, max_df=0.5):
+    """Return one {term: weight} dict per record, L2-normalized"""
+    docs = [candidate_terms(r['question'], r.get('answer', '')) for r in records]
+    df = Counter()
+    for counts in docs:
+        df.update(counts.keys())
+    n_docs = len(docs)
+    max_count = max(2, int(max_df * n_docs))
+
+    vectors = []
+    for counts in docs:
+        vector = {}
+        for term, count in counts.items():
+            if df[term] > max_count:
+                continue
+            idf = math.log((1.0 + n_docs) / (1.0 + df[term])) + 1.0
+            if ' ' in term:
+                idf *= PHRASE_BOOST
+            vector[term] = (1.0 + math.log(count)) * idf
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        if norm:
+            vector = {term: w / norm for term, w in vector.items()}
+        vectors.append(vector)
+    return vectors, df
+
+def related_questions(records, k=DEFAULT_K, min_similarity=MIN_SIMILARITY):
+    """Return the indices of each record's k most similar records, best first"""
+    if not records or k <= 0:
+        return [[] for _ in records]
+    vectors, df = tfidf_vectors(records)
+    if NUMPY_AVAILABLE:
+        return _neighbors_numpy(vectors, df, k, min_similarity)
+    return _neighbors_python(vectors, df, k, min_similarity)
+
+def _neighbors_numpy(vectors, df, k, min_similarity):
+    """Blocked sparse cosine top-k over the whole corpus"""
+    n = len(vectors)
+    vocab = {}
+    rows, cols, vals = [], [], []
+    for row, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            if df[term] < 2:
+                continue
+            rows.append(row)
+            cols.append(vocab.setdefault(term, len(vocab)))
+            vals.append(weight)
+    if not rows:
+        return [[] for _ in vectors]
+
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    vals = np.asarray(vals, dtype=np.float64)
+
+    # Column-major copy: the posting list of every term
+    by_col = np.lexsort((rows, cols))
+    post_rows, post_vals = rows[by_col], vals[by_col]
+    col_start = np.searchsorted(cols[by_col], np.arange(len(vocab) + 1))
+    row_start = np.searchsorted(rows, np.arange(n + 1))
+
+    block = max(1, BLOCK_CELLS // n)
+    results = []
+    for lo in range(0, n, block):
+        hi = min(lo + block, n)
+        s, e = row_start[lo], row_start[hi]
+        entry_cols = cols[s:e]
+        lengths = col_start[entry_cols + 1] - col_start[entry_cols]
+
+        # Expand every entry against its term's postings
+        entry = np.repeat(np.arange(s, e), lengths)
+        within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        posting = np.repeat(col_start[entry_cols], lengths) + within
+        weights = vals[entry] * post_vals[posting]
+        cells = (rows[entry] - lo) * n + post_rows[posting]
+        sims = np.bincount(cells, weights=weights, minlength=(hi - lo) * n).reshape(hi - lo, n)
+        sims[np.arange(hi - lo), np.arange(lo, hi)] = -1.0
+
+        kk = min(k, n - 1)
+        if kk <= 0:
+            results.extend([] for _ in range(lo, hi))
+            continue
+        top = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+        for i, candidates in enumerate(top):
+            scores = sims[i, candidates]
+            # Best first, lower index first on ties
+            order = np.lexsort((candidates, -scores))
+            results.append([int(candidates[j]) for j in order if scores[j] >= min_similarity])
+    return results
+
+def _neighbors_python(vectors, df, k, min_similarity):
+    """Same neighbors as _neighbors_numpy through an inverted index"""
+    postings = defaultdict(list)
+    for row, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            if df[term] >= 2:
+                postings[term].append((row, weight))
+
+    results = []
+    for row, vector in enumerate(vectors):
+        sims = defaultdict(float)
+        for term, weight in vector.items():
+            for other, other_weight in postings.get(term, ()):
+                sims[other] += weight * other_weight
+        sims.pop(row, None)
+        best = heapq.nsmallest(k, sims.items(), key=lambda x: (-x[1], x[0]))
+        results.append([other for other, sim in best if sim >= min_similarity])
+    return results
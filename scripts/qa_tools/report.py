@@ -0,0 +1,75 @@
+"""
+Streaming, machine-readable report output for the compare scripts.
+
+Rows are written to disk (JSON Lines or CSV) the moment they are produced,
+so memory stays flat and the first result is readable while the run is
+still going. Only per-kind counts and a few sample rows are kept for the
+console summary.
+"""
+
+import csv
+import json
+from collections import defaultdict
+from pathlib import Path
+
+REPORT_FORMATS = ('jsonl', 'csv', 'text')
+
+REPORT_FIELDS = [
+    'kind', 'question', 'answer', 'category',
+    'match_type', 'score', 'db_id', 'db_question',
+]
+
+class ReportWriter:
+    """Write report rows one at a time as JSON Lines or CSV"""
+
+    def __init__(self, path, fmt='jsonl', fields=REPORT_FIELDS, sample_size=10):
+        if fmt not in ('jsonl', 'csv'):
+            raise ValueError(f"Unsupported report format: {fmt}")
+        self.path = Path(path)
+        self.fmt = fmt
+        self.fields = fields
+        self.sample_size = sample_size
+        self.counts = defaultdict(int)
+        self.samples = defaultdict(list)
+
+        # Line buffering so each row is on disk as soon as it is written
+        self._file = open(self.path, 'w', encoding='utf-8', newline='', buffering=1)
+        self._csv = None
+        if fmt == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=fields, extrasaction='ignore')
+            self._csv.writeheader()
+
+    def write(self, kind, **row):
+        """Emit one row of the given kind"""
+        row = {'kind': kind, **{k: v for k, v in row.items() if v is not None}}
+        if self._csv:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+        self.counts[kind] += 1
+        if len(self.samples[kind]) < self.sample_size:
+            self.samples[kind].append(row)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def print_summary(self, title, labels=None):
+        """Print counts and a few sample questions per kind"""
+        labels = labels or {}
+        print("\n" + "=" * 70)
+        print(title)
+        print("=" * 70)
+        for kind, count in self.counts.items():
+            print(f"\n{labels.get(kind, kind)}: {count}")
+            for i, row in enumerate(self.samples[kind], 1):
+                print(f"  {i}. {row.get('question', '')[:80]}")
+            if count > len(self.samples[kind]):
+                print(f"  ... and {count - len(self.samples[kind])} more")
+        print(f"\nFull report ({self.fmt}) saved to: {self.path}")
@@ -0,0 +1,101 @@
+"""
+Edit-distance similarity for verifying candidate question matches.
+
+levenshtein() uses the bit-parallel algorithm of Myers (1999) in Hyyrö's
+formulation. The shorter string's character positions become bit masks,
+and each character of the longer string updates the whole DP column with
+a handful of integer operations. Python ints are arbitrary width, so the
+single-word version works for strings of any length.
+
+Compile the string that is compared many times (the source question) as a
+Pattern once and call .similarity() for each candidate.
+"""
+
+class Pattern:
+    """A string compiled once for repeated bit-parallel distance queries"""
+
+    __slots__ = ('text', '_peq', '_full', '_last')
+
+    def __init__(self, text):
+        self.text = text
+        # Bit mask of positions in text for every character it contains
+        peq = {}
+        for i, ch in enumerate(text):
+            peq[ch] = peq.get(ch, 0) | (1 << i)
+        self._peq = peq
+        self._full = (1 << len(text)) - 1
+        self._last = 1 << (len(text) - 1) if text else 0
+
+    def distance(self, other, max_distance=None):
+        """Edit distance between the compiled text and other
+
+        With max_distance set, stops early and returns max_distance + 1 as
+        soon as the distance is certain to exceed it.
+        """
+        m = len(self.text)
+        n = len(other)
+        if max_distance is None:
+            max_distance = max(m, n)
+        if abs(m - n) > max_distance:
+            return max_distance + 1
+        if m == 0:
+            return n
+        if other == self.text:
+            return 0
+
+        peq_get = self._peq.get
+        full = self._full
+        last = self._last
+        pv = full
+        mv = 0
+        score = m
+
+        for j, ch in enumerate(other, 1):
+            eq = peq_get(ch, 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | ~(xh | pv)
+            mh = pv & xh
+            if ph & last:
+                score += 1
+            elif mh & last:
+                score -= 1
+            ph = (ph << 1) | 1
+            pv = ((mh << 1) | ~(xv | ph)) & full
+            mv = ph & xv & full
+            # The remaining n - j characters can lower the score by at most one each
+            if score - (n - j) > max_distance:
+                return max_distance + 1
+
+        return score
+
+    def similarity(self, other):
+        """Normalized edit similarity in [0, 1]; 1.0 means identical"""
+        longest = max(len(self.text), len(other))
+        if longest == 0:
+            return 1.0
+        return 1.0 - self.distance(other) / longest
+
+    def score(self, other, min_score=0.0):
+        """similarity(), or 0.0 as soon as it is certain to fall below min_score"""
+        longest = max(len(self.text), len(other))
+        if longest == 0:
+            return 1.0
+        max_distance = int((1.0 - min_score) * longest)
+        distance = self.distance(other, max_distance)
+        if distance > max_distance:
+            return 0.0
+        return 1.0 - distance / longest
+
+def levenshtein(a, b):
+    """Edit distance between a and b (insertions, deletions, substitutions)"""
+    if len(a) < len(b):
+        a, b = b, a
+    return Pattern(b).distance(a)
+
+def similarity(a, b):
+    """Normalized edit similarity in [0, 1]; 1.0 means identical"""
+    longest = max(len(a), len(b))
+    if longest == 0:
+        return 1.0
+    return 1.0 - levenshtein(a, b) / longest
@@ -0,0 +1,164 @@
+"""
+Streaming readers for every Q&A source the pipeline knows about.
+
+Each reader is a generator that yields one QARecord at a time, so callers can consume several sources in a single pass without holding
+a full copy of any of them in memory.
+"""
+
+import re
+from pathlib import Path
+
+from qa_tools.records import QARecord
+
+ROOT = Path(__file__).parent.parent.parent
+MD_PATH = ROOT / 'DES166 Questions.md'
+PDF_PATH = ROOT / 'DES166 Questions (1).pdf'
+DB_PATH = ROOT / 'data' / 'qa-data.ts'
+
+MARKDOWN_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^\)]+)\)')
+PLAIN_URL_RE = re.compile(r'https?://[^\s\)]+')
+# String literals may contain escaped quotes (\"), so match escapes as units
+DB_ITEM_RE = re.compile(
+    r'\{\s*id:\s*(\d+),.*?category:\s*"([^"]+)",'
+    r'.*?question:\s*"((?:[^"\\]|\\.)+)",.*?answer:\s*"((?:[^"\\]|\\.)+)"',
+    re.DOTALL
+)
+TS_ESCAPE_RE = re.compile(r'\\(.)')
+
+def extract_links(text):
+    """Extract URLs from text"""
+    urls = [url for _, url in MARKDOWN_LINK_RE.findall(text) if url.startswith('http')]
+    urls.extend(PLAIN_URL_RE.findall(text))
+
+    # Remove duplicates and clean
+    unique_urls = []
+    seen = set()
+    for url in urls:
+        url_clean = url.rstrip('.,;:')
+        if url_clean not in seen:
+            seen.add(url_clean)
+            unique_urls.append(url_clean)
+
+    return unique_urls if unique_urls else None
+
+def clean_answer(text):
+    """Strip Markdown links, bare URLs and bold markers from an answer"""
+    text = MARKDOWN_LINK_RE.sub(r'\1', text)
+    text = re.sub(r'https?://[^\s]+', '', text)
+    text = re.sub(r'\*\*', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+def _finish(source, question, answer_lines):
+    """Build a record from collected answer lines, or None if it is too short"""
+    raw = ' '.join(answer_lines).strip()
+    answer = clean_answer(raw)
+    if len(question) <= 10 or len(answer) <= 10:
+        return None
+    return QARecord(question, answer, links=extract_links(raw), source=source)
+
+def iter_markdown_questions(md_path=MD_PATH, source='markdown'):
+    """Yield Q&A records from the Markdown file, one line at a time"""
+    seen = set()
+    current_question = None
+    current_answer = []
+
+    def flush():
+        if current_question and current_answer:
+            record = _finish(source, current_question, current_answer)
+            if record:
+                if record.key not in seen:
+                    seen.add(record.key)
+                    return record
+        return None
+
+    with open(md_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line_stripped = line.strip()
+
+            # Blank lines and section headers close the current Q&A
+            if not line_stripped or line_stripped.startswith('##'):
+                record = flush()
+                if record:
+                    yield record
+                current_question = None
+                current_answer = []
+                continue
+
+            # Question lines end with ?, with or without **bold** markers
+            is_bold = line_stripped.startswith('**')
+            q_clean = re.sub(r'\*\*', '', line_stripped).strip()
+            if q_clean.endswith('?') and (is_bold or len(q_clean) > 15):
+                record = flush()
+                if record:
+                    yield record
+                current_question = q_clean
+                current_answer = []
+            elif current_question and len(line_stripped) > 5:
+                current_answer.append(line_stripped)
+
+    record = flush()
+    if record:
+        yield record
+
+def iter_pdf_questions(pdf_path=PDF_PATH, source='pdf'):
+    """Yield Q&A records from the PDF, one page at a time"""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        print("Warning: pypdf not available, skipping PDF source")
+        return
+
+    reader = PdfReader(pdf_path)
+    seen = set()
+    current_question = None
+    current_answer = []
+
+    for page in reader.pages:
+        for line in (page.extract_text() or '').split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.endswith('?') or line.startswith('Q:') or line.startswith('Question:'):
+                if current_question and current_answer:
+                    record = _finish(source, current_question, current_answer)
+                    if record and record.key not in seen:
+                        seen.add(record.key)
+                        yield record
+                current_question = re.sub(r'^(Q:|Question:)\s*', '', line, flags=re.IGNORECASE).strip()
+                current_answer = []
+            elif current_question:
+                current_answer.append(line)
+
+    if current_question and current_answer:
+        record = _finish(source, current_question, current_answer)
+        if record and record.key not in seen:
+            yield record
+
+def _unescape(literal):
+    """Undo the escaping of a TypeScript string literal"""
+    return TS_ESCAPE_RE.sub(lambda m: '\n' if m.group(1) == 'n' else m.group(1), literal)
+
+def iter_db_questions(db_path=DB_PATH, source='db'):
+    """Yield Q&A records from data/qa-data.ts"""
+    db_path = Path(db_path)
+    if not db_path.exists():
+        return
+
+    content = db_path.read_text(encoding='utf-8')
+    for match in DB_ITEM_RE.finditer(content):
+        yield QARecord(
+            question=_unescape(match.group(3)),
+            answer=_unescape(match.group(4)),
+            category=match.group(2),
+            source=source,
+            id=int(match.group(1)),
+        )
+
+def markdown_records(md_path=MD_PATH):
+    """Every Markdown record as a list, for callers that cache them"""
+    return list(iter_markdown_questions(md_path)) if Path(md_path).exists() else []
+
+def pdf_records(pdf_path=PDF_PATH):
+    """Every PDF record as a list; empty without the file or pypdf"""
+    return list(iter_pdf_questions(pdf_path)) if Path(pdf_path).exists() else []
@@ -0,0 +1,97 @@
+"""
+Curated synonym and acronym table for DES166 terminology.
+
+Each group lists the forms of one term, canonical form first. A document
+that mentions any form of a group is indexed under every form of it, so
+"VCD" in a query finds answers that only say "visual communication
+design" and vice versa, without expanding the query at runtime.
+
+Forms are matched on word boundaries. Forms written in lowercase match
+in any case. Forms containing capitals match only as written, for
+acronyms that collide with ordinary words ("ID" vs "id", "OPT" vs "opt
+out", "STEM" vs "stem").
+
+compile_synonyms() turns the table into data/synonyms.json, which
+lib/synonyms.ts loads to expand documents when lib/rag.ts builds its
+index. categorize_question() uses synonym_forms() from here, so retrieval
+and categorization read the same table.
+"""
+
+import json
+import re
+from pathlib import Path
+
+SYNONYMS_PATH = Path(__file__).parent.parent.parent / 'data' / 'synonyms.json'
+
+SYNONYM_GROUPS = [
+    ('visual communication design', 'vcd', 'visual communications design', 'vis comm'),
+    ('interaction design', 'ixd', 'interactive design'),
+    ('industrial design', 'ID'),
+    ('grade point average', 'gpa'),
+    ('info session', 'infosession', 'info-session', 'information session'),
+    ('teaching assistant', 'teaching assistants', 'ta', 'tas'),
+    ('university of washington', 'uw'),
+    ('des166', 'des 166', 'design 166'),
+    ('dxarts', 'dx arts', 'digital arts and experimental media'),
+    ('human centered design and engineering', 'human-centered design and engineering', 'hcde'),
+    ('user experience', 'ux'),
+    ('how might we', 'hmw'),
+    ('new york times', 'nyt'),
+    ('computer aided design', 'computer-aided design', 'cad'),
+    ('optional practical training', 'OPT'),
+    ('science technology engineering and mathematics', 'STEM'),
+    ('prerequisite', 'prerequisites', 'prereq', 'prereqs', 'pre-requisite', 'pre-requisites'),
+]
+
+_META_RE = re.compile(r'([.*+?^${}()|\[\]\\])')
+
+def _alternation(forms):
+    """Word-bounded alternation, longest form first; valid in Python and JS"""
+    if not forms:
+        return None
+    ordered = sorted(set(forms), key=lambda form: (-len(form), form))
+    return r'\b(?:' + '|'.join(_META_RE.sub(r'\\\1', form) for form in ordered) + r')\b'
+
+def compile_synonyms(groups=SYNONYM_GROUPS):
+    """Validated lookup table and match patterns for a list of synonym groups"""
+    index = {}
+    for number, group in enumerate(groups):
+        for form in group:
+            key = form if form != form.lower() else form.lower()
+            if key in index and index[key] != number:
+                raise ValueError(f"Synonym form {form!r} is in more than one group")
+            index[key] = number
+    case_sensitive = [form for form in index if form != form.lower()]
+    case_insensitive = [form for form in index if form == form.lower()]
+    return {
+        'groups': [[form.lower() for form in group] for group in groups],
+        'index': index,
+        'pattern': _alternation(case_insensitive),
+        'casePattern': _alternation(case_sensitive),
+    }
+
+def synonyms_json(groups=SYNONYM_GROUPS):
+    """Contents of data/synonyms.json for a list of synonym groups"""
+    return json.dumps(compile_synonyms(groups), indent=2) + '\n'
+
+def write_synonyms(path=SYNONYMS_PATH, groups=SYNONYM_GROUPS):
+    """Write the compiled table for lib/synonyms.ts; returns it"""
+    Path(path).write_text(synonyms_json(groups), encoding='utf-8')
+    return compile_synonyms(groups)
+
+_TABLE = compile_synonyms()
+_PATTERN = re.compile(_TABLE['pattern'], re.IGNORECASE) if _TABLE['pattern'] else None
+_CASE_PATTERN = re.compile(_TABLE['casePattern']) if _TABLE['casePattern'] else None
+
+def synonym_groups(text):
+    """Numbers of the synonym groups mentioned in text, ascending"""
+    groups = set()
+    if _PATTERN:
+        groups.update(_TABLE['index'][m.lower()] for m in _PATTERN.findall(text))
+    if _CASE_PATTERN:
+        groups.update(_TABLE['index'][m] for m in _CASE_PATTERN.findall(text))
+    return sorted(groups)
+
+def synonym_forms(text):
+    """Every form (lowercased) of every synonym group mentioned in text"""
+    return [form for number in synonym_groups(text) for form in _TABLE['groups'][number]]
@@ -0,0 +1,64 @@
+"""
+The live-edit journal written by /api/admin/qa (lib/qa-updates.ts).
+
+Each line is one upsert or delete, tagged with the corpus version (see
+importer.corpus_version) of the qa-data.ts it was made against, since its
+ids are positions in that file. The app only replays lines for the corpus
+it runs. An import that publishes a new corpus retires the rest: they are
+moved to data/qa-updates.<timestamp>.jsonl and listed, so the edits can be
+made in the Markdown source instead of being silently dropped.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+UPDATES_PATH = Path(os.environ.get('QA_UPDATES_PATH') or
+                    Path(__file__).parent.parent.parent / 'data' / 'qa-updates.jsonl')
+
+def _lines(entries):
+    # Compact, like the JSON.stringify lines the app appends
+    return ''.join(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n' for entry in entries)
+
+def read_updates(path=UPDATES_PATH):
+    """Journal entries, oldest first, skipping torn lines; a missing journal is empty"""
+    path = Path(path)
+    if not path.exists():
+        return []
+    entries = []
+    for line in path.read_text(encoding='utf-8').splitlines():
+        if not line.strip():
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
+
+def retire_updates(version, path=UPDATES_PATH):
+    """
+    Move entries made against any corpus but `version` out of the journal.
+    Returns (archive path, retired entries), or (None, []) if none were.
+    """
+    path = Path(path)
+    entries = read_updates(path)
+    retired = [entry for entry in entries if entry.get('corpus') != version]
+    if not retired:
+        return None, []
+    archive = path.with_name(f"{path.stem}.{time.strftime('%Y%m%d-%H%M%S')}{path.suffix}")
+    with open(archive, 'a', encoding='utf-8') as f:
+        f.write(_lines(retired))
+    current = [entry for entry in entries if entry.get('corpus') == version]
+    if current:
+        path.write_text(_lines(current), encoding='utf-8')
+    else:
+        path.unlink()
+    return archive, retired
+
+def describe_update(entry):
+    """One line per journal entry for the import summary"""
+    if entry.get('op') == 'upsert':
+        qa = entry.get('qa') or {}
+        return f"upsert #{qa.get('id')}: {str(qa.get('question', ''))[:60]}"
+    return f"delete #{entry.get('id')}"